@@ -0,0 +1,66 @@
+"""Add work calendars and exceptions
+
+Revision ID: 4c2e9a7d1b35
+Revises: 06c36a9e3cb3
+Create Date: 2026-10-17 09:12:44.503112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c2e9a7d1b35'
+down_revision: Union[str, Sequence[str], None] = '06c36a9e3cb3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('calendars',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('work_week', sa.JSON(), nullable=False),
+    sa.Column('hours_per_day', sa.Float(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_calendars_id'), 'calendars', ['id'], unique=False)
+    op.create_table('calendar_exceptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('calendar_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('work_hours', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['calendar_id'], ['calendars.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_calendar_exceptions_id'), 'calendar_exceptions', ['id'], unique=False)
+    op.create_index(op.f('ix_calendar_exceptions_calendar_id'), 'calendar_exceptions', ['calendar_id'], unique=False)
+    op.add_column('projects', sa.Column('calendar_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_projects_calendar_id', 'projects', 'calendars', ['calendar_id'], ['id'])
+    op.add_column('tasks', sa.Column('calendar_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_tasks_calendar_id', 'tasks', 'calendars', ['calendar_id'], ['id'])
+    op.add_column('task_relationships', sa.Column('calendar_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_task_relationships_calendar_id', 'task_relationships', 'calendars', ['calendar_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_task_relationships_calendar_id', 'task_relationships', type_='foreignkey')
+    op.drop_column('task_relationships', 'calendar_id')
+    op.drop_constraint('fk_tasks_calendar_id', 'tasks', type_='foreignkey')
+    op.drop_column('tasks', 'calendar_id')
+    op.drop_constraint('fk_projects_calendar_id', 'projects', type_='foreignkey')
+    op.drop_column('projects', 'calendar_id')
+    op.drop_index(op.f('ix_calendar_exceptions_calendar_id'), table_name='calendar_exceptions')
+    op.drop_index(op.f('ix_calendar_exceptions_id'), table_name='calendar_exceptions')
+    op.drop_table('calendar_exceptions')
+    op.drop_index(op.f('ix_calendars_id'), table_name='calendars')
+    op.drop_table('calendars')
@@ -0,0 +1,28 @@
+"""Add task percent_complete
+
+Revision ID: 5e8a2c4f7d19
+Revises: 9b1d3f6e2a47
+Create Date: 2026-10-17 14:32:07.405118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a2c4f7d19'
+down_revision: Union[str, Sequence[str], None] = '9b1d3f6e2a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('percent_complete', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tasks', 'percent_complete')
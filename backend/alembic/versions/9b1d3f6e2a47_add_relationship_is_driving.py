@@ -0,0 +1,28 @@
+"""Add relationship is_driving flag
+
+Revision ID: 9b1d3f6e2a47
+Revises: 4c2e9a7d1b35
+Create Date: 2026-10-17 11:05:21.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1d3f6e2a47'
+down_revision: Union[str, Sequence[str], None] = '4c2e9a7d1b35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task_relationships', sa.Column('is_driving', sa.Boolean(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('task_relationships', 'is_driving')
@@ -0,0 +1,28 @@
+"""Index task_relationships.successor_id
+
+Revision ID: b7e4c1d9a3f2
+Revises: 5e8a2c4f7d19
+Create Date: 2026-10-17 16:05:41.218306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4c1d9a3f2'
+down_revision: Union[str, Sequence[str], None] = '5e8a2c4f7d19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_task_relationships_successor_id'), 'task_relationships', ['successor_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_task_relationships_successor_id'), table_name='task_relationships')
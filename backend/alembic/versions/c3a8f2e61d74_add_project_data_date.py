@@ -0,0 +1,28 @@
+"""Add project data_date
+
+Revision ID: c3a8f2e61d74
+Revises: b7e4c1d9a3f2
+Create Date: 2026-10-17 17:12:26.530871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8f2e61d74'
+down_revision: Union[str, Sequence[str], None] = 'b7e4c1d9a3f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('data_date', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'data_date')
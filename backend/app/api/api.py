@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import login, projects, tasks, tracking, blueprints, reports, risks, analytics, import_project, scheduling, baselines
+from app.api.endpoints import login, projects, tasks, tracking, blueprints, reports, risks, analytics, import_project, scheduling, baselines, calendars
 # from app.api.endpoints import users # TODO: Implement users endpoint
 
 api_router = APIRouter()
@@ -14,4 +14,5 @@ api_router.include_router(analytics.router, prefix="/analytics", tags=["analytic
 api_router.include_router(import_project.router, prefix="/projects", tags=["import"])
 api_router.include_router(scheduling.router, prefix="/projects", tags=["scheduling"])
 api_router.include_router(baselines.router, prefix="/projects", tags=["baselines"])
+api_router.include_router(calendars.router, prefix="/calendars", tags=["calendars"])
 # api_router.include_router(users.router, prefix="/users", tags=["users"])
@@ -0,0 +1,110 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.schemas.calendar import (
+    WorkCalendar as WorkCalendarSchema, WorkCalendarCreate, WorkCalendarUpdate,
+    CalendarException as CalendarExceptionSchema, CalendarExceptionCreate,
+)
+from app.models.calendar import WorkCalendar, CalendarException
+from app.services.calendar_service import CalendarService
+from app.core.database import get_db
+
+router = APIRouter()
+
+async def _get_calendar(db: AsyncSession, calendar_id: int) -> WorkCalendar:
+    result = await db.execute(
+        select(WorkCalendar)
+        .filter(WorkCalendar.id == calendar_id)
+        .options(selectinload(WorkCalendar.exceptions))
+    )
+    calendar = result.scalars().first()
+    if not calendar:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    return calendar
+
+@router.post("/", response_model=WorkCalendarSchema, status_code=status.HTTP_201_CREATED)
+async def create_calendar(calendar_in: WorkCalendarCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Create a named working-time calendar with optional exceptions.
+    """
+    calendar = WorkCalendar(
+        name=calendar_in.name,
+        description=calendar_in.description,
+        work_week=calendar_in.work_week,
+        hours_per_day=calendar_in.hours_per_day,
+        version=1,
+    )
+    calendar.exceptions = [CalendarException(**e.model_dump()) for e in calendar_in.exceptions]
+    db.add(calendar)
+    await db.commit()
+    return await _get_calendar(db, calendar.id)
+
+@router.get("/", response_model=List[WorkCalendarSchema])
+async def list_calendars(db: AsyncSession = Depends(get_db)):
+    """
+    List all calendars.
+    """
+    result = await db.execute(select(WorkCalendar).options(selectinload(WorkCalendar.exceptions)))
+    return result.scalars().all()
+
+@router.get("/{calendar_id}", response_model=WorkCalendarSchema)
+async def get_calendar(calendar_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Get a calendar with its exceptions.
+    """
+    return await _get_calendar(db, calendar_id)
+
+@router.put("/{calendar_id}", response_model=WorkCalendarSchema)
+async def update_calendar(calendar_id: int, calendar_in: WorkCalendarUpdate, db: AsyncSession = Depends(get_db)):
+    """
+    Update a calendar's work week. Bumps the calendar version.
+    """
+    calendar = await _get_calendar(db, calendar_id)
+    for field, value in calendar_in.model_dump(exclude_unset=True).items():
+        setattr(calendar, field, value)
+    CalendarService.touch(calendar)
+    await db.commit()
+    return await _get_calendar(db, calendar_id)
+
+@router.delete("/{calendar_id}")
+async def delete_calendar(calendar_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Delete a calendar. Calendars still used by projects, tasks or relationships are kept (409).
+    """
+    calendar = await _get_calendar(db, calendar_id)
+    references = await CalendarService(db).count_references(calendar_id)
+    if references:
+        used_by = ", ".join(f"{count} {label}" for label, count in references.items())
+        raise HTTPException(status_code=409, detail=f"Calendar is in use by {used_by}")
+    await db.delete(calendar)
+    await db.commit()
+    return {"message": "Success"}
+
+@router.post("/{calendar_id}/exceptions", response_model=CalendarExceptionSchema, status_code=status.HTTP_201_CREATED)
+async def add_calendar_exception(calendar_id: int, exception_in: CalendarExceptionCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Add a holiday, shutdown or overtime exception. Bumps the calendar version.
+    """
+    calendar = await _get_calendar(db, calendar_id)
+    exception = CalendarException(calendar_id=calendar.id, **exception_in.model_dump())
+    db.add(exception)
+    CalendarService.touch(calendar)
+    await db.commit()
+    await db.refresh(exception)
+    return exception
+
+@router.delete("/{calendar_id}/exceptions/{exception_id}")
+async def delete_calendar_exception(calendar_id: int, exception_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Remove a calendar exception. Bumps the calendar version.
+    """
+    calendar = await _get_calendar(db, calendar_id)
+    exception = next((e for e in calendar.exceptions if e.id == exception_id), None)
+    if not exception:
+        raise HTTPException(status_code=404, detail="Calendar exception not found")
+    calendar.exceptions.remove(exception)
+    CalendarService.touch(calendar)
+    await db.commit()
+    return {"message": "Success"}
@@ -182,7 +182,8 @@ async def create_project(project_in: ProjectCreate, db: AsyncSession = Depends(g
         industry=project_in.industry,
         summary=project_in.summary,
         tech_stack=project_in.tech_stack,
-        status=project_in.status
+        status=project_in.status,
+        calendar_id=project_in.calendar_id
     )
     db.add(db_project)
     await db.flush()
@@ -199,6 +200,7 @@ async def create_project(project_in: ProjectCreate, db: AsyncSession = Depends(g
             description=task_in.description,
             original_duration=task_in.original_duration,
             status=task_in.status,
+            calendar_id=task_in.calendar_id,
             # We will process dependencies in a second pass to ensure we have IDs for all tasks 
         )
         db.add(db_task)
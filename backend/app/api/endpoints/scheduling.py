@@ -1,45 +1,307 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
-from app.models.project import Project
-from app.services.scheduling_engine import SchedulingEngine
+from sqlalchemy import select, update
+from app.models.project import Project, Task, Risk
+from app.services.scheduling_engine import SchedulingEngine, ScheduleCycleError
+from app.services.float_paths import FloatPathService
+from app.services.resource_leveling import level_engine, save_leveled_dates
+from app.services.monte_carlo import MonteCarloSimulation, simulate_batch
+from app.core.compute_pool import get_process_pool, compute_workers, run_in_pool
+from app.services.portfolio_scheduler import PortfolioScheduler
+from app.services.what_if import run_what_if
+from app.services.schedule_cache import schedule_cache
+from app.services.schedule_snapshot import load_engine, load_driving_path
+from app.services.wbs_rollup import rollup_project
+from app.services.schedule_queue import schedule_queue
+from app.services.schedule_lock import schedule_locks
+from app.services.schedule_executor import calculate
+from app.schemas.scheduling import LevelingRequest, MonteCarloRequest, BatchScheduleRequest, WhatIfRequest
+import asyncio
 from datetime import datetime
 from typing import Optional
 
 router = APIRouter()
 
+@router.post("/schedule/batch", status_code=status.HTTP_200_OK)
+async def run_portfolio_schedule(
+    batch_in: BatchScheduleRequest,
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    Reschedule many projects at once (data-date rollover): one project per worker process,
+    results written back in bulk. Reports per-project timings and failures.
+    """
+    from datetime import timezone
+    data_date = batch_in.data_date or datetime.now(timezone.utc)
+    return await PortfolioScheduler(db).reschedule(data_date, batch_in.project_ids, pool=get_process_pool())
+
 @router.post("/{project_id}/schedule", status_code=status.HTTP_200_OK)
 async def run_schedule(
     project_id: int,
     data_date: Optional[datetime] = Body(None, embed=True),
+    progress_mode: Optional[str] = Body(None, embed=True),
     db: AsyncSession = Depends(deps.get_db),
 ):
     """
     Run Enhanced P6-style CPM Scheduling (Supports FS, SS, FF, SF, Lag).
+    Projects with actuals are scheduled progress-aware from the data date:
+    progress_mode "retained_logic" (default) or "progress_override".
+    """
+    # Use provided Data Date or current system time (UTC)
+    from datetime import timezone
+    start_date = data_date or datetime.now(timezone.utc)
+
+    async def run():
+        # One CPM per project at a time; the lock lasts until the commit
+        async with schedule_locks.hold(db, [project_id]):
+            # Initialize Engine (scheduling columns only)
+            engine = await load_engine(db, project_id)
+            if engine is None:
+                raise HTTPException(status_code=404, detail="Project not found")
+
+            try:
+                # Large networks are computed in the process pool, off the event loop
+                await calculate(engine, start_date, progress_mode, cache=schedule_cache)
+                await engine.save_dates()
+                await rollup_project(db, project_id)
+                await db.execute(update(Project).where(Project.id == project_id).values(data_date=start_date))
+                await db.commit()
+            except ScheduleCycleError as e:
+                raise HTTPException(status_code=400, detail={"message": str(e), "cycles": e.cycles})
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+
+        return {
+            "message": "Schedule calculation completed successfully",
+            "data_date": start_date,
+            "project_id": project_id
+        }
+
+    # Identical requests arriving while this one runs get its result
+    return await schedule_locks.single_flight(("schedule", project_id, data_date, progress_mode), run)
+
+@router.get("/{project_id}/schedule/status", status_code=status.HTTP_200_OK)
+async def get_schedule_status(
+    project_id: int,
+    revision: Optional[int] = Query(None, description="Wait until this schedule revision is completed"),
+    timeout: float = Query(10.0, ge=0, le=60),
+):
+    """
+    State of the background reschedule queue for a project (revisions are returned by
+    task updates). With `revision`, long-polls until that revision is completed or the
+    timeout expires.
+    """
+    if revision is None:
+        return schedule_queue.status(project_id)
+    return await schedule_queue.wait(project_id, revision, timeout)
+
+@router.get("/{project_id}/schedule/cycles", status_code=status.HTTP_200_OK)
+async def get_schedule_cycles(
+    project_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    Logic loop diagnostic: every cycle's member tasks and the relationships that close it.
+    """
+    engine = await load_engine(db, project_id)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    cycles = engine.find_cycles()
+    return {
+        "project_id": project_id,
+        "has_cycles": bool(cycles),
+        "cycles": cycles,
+    }
+
+@router.get("/{project_id}/schedule/driving-path/{task_id}", status_code=status.HTTP_200_OK)
+async def get_driving_path(
+    project_id: int,
+    task_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    Trace the driving path of an activity back to the start of its chain, following the
+    driving relationships stored by the last schedule run.
+    """
+    task = await db.get(Task, task_id)
+    if not task or task.project_id != project_id:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    path = await load_driving_path(db, project_id, task_id)
+
+    task_ids = [path[0].predecessor_id if path else task_id] + [rel.successor_id for rel in path]
+    result = await db.execute(select(Task).where(Task.id.in_(task_ids)))
+    tasks = {t.id: t for t in result.scalars().all()}
+    links = [None] + path
+    return {
+        "project_id": project_id,
+        "task_id": task_id,
+        "path": [
+            {
+                "task_id": t_id,
+                "title": tasks[t_id].title,
+                "early_start": tasks[t_id].early_start,
+                "early_finish": tasks[t_id].early_finish,
+                "total_float": tasks[t_id].total_float,
+                "free_float": tasks[t_id].free_float,
+                "driving_relationship": SchedulingEngine.describe_relationship(rel) if rel else None,
+            }
+            for t_id, rel in zip(task_ids, links)
+        ],
+    }
+
+@router.get("/{project_id}/schedule/float-paths", status_code=status.HTTP_200_OK)
+async def get_float_paths(
+    project_id: int,
+    target_id: Optional[int] = Query(None, description="Milestone the paths end at (default: project finish)"),
+    max_paths: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    Multiple float paths: path 1 is the critical path into the target, then in ascending float.
+    Uses the dates of the last schedule run.
     """
     project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    
-    # Initialize Engine
+
     engine = SchedulingEngine(db, project_id)
     await engine.load_data()
-    
     try:
-        # Use provided Data Date or current system time (UTC)
-        from datetime import timezone
-        start_date = data_date or datetime.now(timezone.utc)
-        
-        engine.calculate_dates(start_date)
-        await engine.save_dates()
-        await db.commit()
-        
-        return {
-            "message": "Schedule calculation completed successfully",
-            "data_date": start_date,
-            "project_id": project_id
-        }
+        paths = FloatPathService(engine).float_paths(target_id, max_paths)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "project_id": project_id,
+        "target_id": paths[0]["tasks"][-1]["task_id"] if paths else target_id,
+        "paths": paths,
+    }
+
+@router.post("/{project_id}/schedule/level", status_code=status.HTTP_200_OK)
+async def level_resources(
+    project_id: int,
+    leveling_in: LevelingRequest,
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    Run CPM (progress-aware for projects with actuals, as /schedule), then level resources
+    (Task.resource_ids) against the given capacities. Leveled dates are written to
+    planned_start / planned_end.
+    """
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    async with schedule_locks.hold(db, [project_id]):
+        engine = await load_engine(db, project_id)
+        rows = await db.execute(select(Task.id, Task.priority, Task.resource_ids).where(Task.project_id == project_id))
+        assignments = {t_id: (priority, resource_ids) for t_id, priority, resource_ids in rows.all()}
+
+        try:
+            from datetime import timezone
+            start_date = leveling_in.data_date or datetime.now(timezone.utc)
+            # CPM and leveling of large networks both run in the process pool
+            await calculate(engine, start_date, leveling_in.progress_mode, cache=schedule_cache)
+            result = await level_engine(
+                engine,
+                assignments,
+                leveling_in.capacities,
+                default_capacity=leveling_in.default_capacity,
+                bucket_minutes=leveling_in.bucket_minutes,
+                data_date=start_date,
+                progress_mode=leveling_in.progress_mode,
+            )
+            await engine.save_dates()
+            await save_leveled_dates(db, engine)
+            await rollup_project(db, project_id)
+            await db.execute(update(Project).where(Project.id == project_id).values(data_date=start_date))
+            await db.commit()
+        except ScheduleCycleError as e:
+            raise HTTPException(status_code=400, detail={"message": str(e), "cycles": e.cycles})
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "project_id": project_id,
+        "project_finish": result["project_finish"],
+        "delayed_tasks": result["delayed_tasks"],
+        "overallocated": result["overallocated"],
+        "peak_usage": result["peak_usage"],
+        "tasks": [{"task_id": t_id, **values} for t_id, values in result["tasks"].items()],
+    }
+
+@router.post("/{project_id}/schedule/monte-carlo", status_code=status.HTTP_200_OK)
+async def run_monte_carlo(
+    project_id: int,
+    simulation_in: MonteCarloRequest,
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    Monte Carlo schedule risk analysis: P50/P80/P90 finish, criticality index and
+    duration sensitivity per task. Iterations run in batches on the compute process pool.
+    """
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    engine = SchedulingEngine(db, project_id)
+    await engine.load_data()
+    if not engine.tasks:
+        raise HTTPException(status_code=400, detail="Project has no tasks")
+
+    risks = []
+    if simulation_in.use_risks:
+        result = await db.execute(select(Risk).where(Risk.project_id == project_id))
+        risks = result.scalars().all()
+
+    from datetime import timezone
+    start_date = simulation_in.data_date or datetime.now(timezone.utc)
+    simulation = MonteCarloSimulation(
+        engine,
+        iterations=simulation_in.iterations,
+        optimistic_factor=simulation_in.optimistic_factor,
+        pessimistic_factor=simulation_in.pessimistic_factor,
+        task_ranges=simulation_in.task_ranges,
+        risks=risks,
+        seed=simulation_in.seed,
+    )
+    try:
+        simulation.prepare(start_date)
+    except ValueError as e: # Logic loops, task or lag calendars
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results = await asyncio.gather(*(
+        run_in_pool(simulate_batch, payload)
+        for payload in simulation.batches(compute_workers())
+    ))
+    return {"project_id": project_id, "data_date": start_date, **simulation.summarize(results)}
+
+@router.post("/{project_id}/schedule/what-if", status_code=status.HTTP_200_OK)
+async def run_what_if_scenario(
+    project_id: int,
+    scenario_in: WhatIfRequest,
+    db: AsyncSession = Depends(deps.get_db),
+):
+    """
+    What-if scenario: applies hypothetical duration / constraint / link edits to an in-memory
+    copy of the schedule and returns the moved tasks and the finish delta. Nothing is saved.
+    """
+    from datetime import timezone
+    start_date = scenario_in.data_date or datetime.now(timezone.utc)
+    try:
+        result = await run_what_if(
+            db, project_id, start_date,
+            task_edits=[e.model_dump(exclude_unset=True) for e in scenario_in.task_edits],
+            link_edits=[e.model_dump(exclude_unset=True) for e in scenario_in.link_edits],
+            progress_mode=scenario_in.progress_mode,
+        )
+    except ScheduleCycleError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "cycles": e.cycles})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return result
@@ -3,7 +3,8 @@ from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
-from app.services.scheduling_engine import SchedulingEngine
+from app.services.schedule_queue import schedule_queue
+from app.services.wbs_rollup import ROLLUP_FIELDS, rollup_project
 from app.models.project import Task, Material
 from app.schemas.project import Task as TaskSchema, TaskUpdate, TaskCreate
 from app.core.database import get_db
@@ -25,7 +26,8 @@ async def create_task(task_in: TaskCreate, db: AsyncSession = Depends(get_db)):
 
         original_duration=task_in.original_duration if task_in.original_duration else task_in.estimated_hours,
         discipline=task_in.discipline,
-        is_deliverable=task_in.is_deliverable
+        is_deliverable=task_in.is_deliverable,
+        calendar_id=task_in.calendar_id
     )
     db.add(db_task)
     await db.commit()
@@ -81,13 +83,22 @@ async def update_task(task_id: int, task_in: TaskUpdate, db: AsyncSession = Depe
             setattr(task, "original_duration", value)
             setattr(task, "estimated_hours", value)
 
-    # Handle Dependencies
+    # Tasks whose scheduling inputs changed (seeds for incremental CPM)
+    changed_ids = {task_id}
+
     # Handle Dependencies
     if task_in.dependencies is not None:
         # Clear existing predecessors
         from app.models.project import TaskRelationship
         from sqlalchemy import delete
         
+        # Old predecessors lose a successor, so their late dates may move
+        result = await db.execute(
+            select(TaskRelationship.predecessor_id).where(TaskRelationship.successor_id == task_id)
+        )
+        changed_ids.update(result.scalars().all())
+        changed_ids.update(dep.target_id for dep in task_in.dependencies)
+
         # Delete existing predecessors where this task is the successor
         await db.execute(
             delete(TaskRelationship).where(TaskRelationship.successor_id == task_id)
@@ -100,7 +111,8 @@ async def update_task(task_id: int, task_in: TaskUpdate, db: AsyncSession = Depe
                 predecessor_id=dep.target_id,
                 successor_id=task_id,
                 type=dep.relation,
-                lag=dep.lag
+                lag=dep.lag,
+                calendar_id=dep.calendar_id
             )
             db.add(new_rel)
 
@@ -112,48 +124,35 @@ async def update_task(task_id: int, task_in: TaskUpdate, db: AsyncSession = Depe
     # If dependencies, duration, or start date changed, we need to re-calculate the project schedule.
     # This ensures "logical links" (predecessors) actually move successor dates.
     should_schedule = False
+    # Leaves whose values moved; their WBS ancestors are rolled up afterwards
+    rollup_ids = {task_id} if any(f in update_data for f in ROLLUP_FIELDS) else set()
     if task_in.dependencies is not None:
         should_schedule = True
     else:
         # Check if critical fields were updated
-        triggers = ['original_duration', 'estimated_hours', 'planned_start', 'constraint_type', 'constraint_date']
+        triggers = ['original_duration', 'estimated_hours', 'planned_start', 'constraint_type', 'constraint_date', 'calendar_id']
         for field in triggers:
             if field in update_data:
                 should_schedule = True
                 break
     
+    schedule_revision = None
     if should_schedule:
-        try:
-            # Re-run CPM
-            engine = SchedulingEngine(db, task.project_id)
-            await engine.load_data()
-            
-            # Determine Project Start (Anchor) based on earliest existing task
-            # This prevents everything resetting to "Now" if we use datetime.now()
-            project_start = datetime.now()
-            if engine.tasks:
-                starts = [t.planned_start for t in engine.tasks.values() if t.planned_start]
-                if starts:
-                    project_start = min(starts)
-            
-            # Use naive project_start if TZ issues arise, or ensure robust checking? 
-            # engine handles it.
-            engine.calculate_dates(project_start)
-            
-            # Sync Planned Dates with Calculated Dates (CPM)
-            # This ensures the Gantt chart (which uses planned_*) reflects the schedule.
-            for t in engine.tasks.values():
-                if t.early_start:
-                    t.planned_start = t.early_start
-                if t.early_finish:
-                    t.planned_end = t.early_finish
-
-            await engine.save_dates()
-            await db.commit()
-            await db.refresh(task) # Get updated dates
-        except Exception as e:
-            print(f"Warning: Auto-scheduling failed: {e}")
-            # We continue to return the task 
+        # A task calendar change also moves the lags of its outgoing links
+        if 'calendar_id' in update_data:
+            from app.models.project import TaskRelationship
+            result = await db.execute(
+                select(TaskRelationship.successor_id).where(TaskRelationship.predecessor_id == task_id)
+            )
+            changed_ids.update(result.scalars().all())
+        # CPM runs in the background: bursts of edits coalesce into one run
+        # (which also syncs planned dates and rolls up the WBS)
+        schedule_revision = schedule_queue.request(task.project_id, changed_ids)
+    elif rollup_ids:
+        # Only the ancestor chains of the edited task are recomputed
+        await rollup_project(db, task.project_id, rollup_ids)
+        await db.commit()
+        await db.refresh(task)
 
     # Reload with materials
     from sqlalchemy.orm import selectinload
@@ -165,7 +164,9 @@ async def update_task(task_id: int, task_in: TaskUpdate, db: AsyncSession = Depe
             selectinload(Task.relationships_pred)
         )
     )
-    return result.scalars().first()
+    response = TaskSchema.model_validate(result.scalars().first())
+    response.schedule_revision = schedule_revision
+    return response
 
 @router.delete("/{task_id}")
 async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
@@ -5,7 +5,12 @@ from app.api import deps
 from app.models.project import Project, Task, Material
 from app.schemas.project import Task as TaskSchema, Material as MaterialSchema
 from app.core.database import get_db
-from typing import List
+from app.services.scheduling_engine import ScheduleCycleError
+from app.services.schedule_snapshot import load_engine, load_data_date
+from app.services.schedule_cache import schedule_cache
+from app.services.schedule_executor import calculate
+from datetime import datetime, timezone
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -66,98 +71,57 @@ async def get_project_costs(project_id: int, db: AsyncSession = Depends(get_db))
     }
 
 @router.get("/projects/{project_id}/critical-path")
-async def get_critical_path(project_id: int, db: AsyncSession = Depends(get_db)):
+async def get_critical_path(
+    project_id: int,
+    data_date: Optional[datetime] = None,
+    progress_mode: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Calculate the critical path and scheduling details (ES, EF, LS, LF) using CPM.
+    Scheduling details (ES, EF, LS, LF, float) and the ordered critical path, computed by the
+    scheduling engine (served from the schedule cache when the network is unchanged), and
+    progress-aware for projects with actuals as in a schedule run.
+    Defaults to the data date of the last schedule run, or now if it was never scheduled.
     """
-    from sqlalchemy.orm import selectinload
-    result = await db.execute(
-        select(Task)
-        .filter(Task.project_id == project_id)
-        .options(selectinload(Task.materials))
-    )
-    tasks = result.scalars().all()
-    if not tasks:
-        return {"critical_path": [], "schedule": []}
-
-    # Map for easy access
-    id_to_task = {t.id: t for t in tasks}
-    schedule = {t.id: {"title": t.title, "es": 0, "ef": 0, "ls": float('inf'), "lf": float('inf'), "slack": 0} for t in tasks}
-
-    # Forward Pass
-    def calculate_forward(task_id, visited=None):
-        if visited is None: visited = set()
-        if task_id in visited: return schedule[task_id]["ef"]
-        visited.add(task_id)
-        
-        task = id_to_task[task_id]
-        max_prev_ef = 0
-        
-        # dependencies is a list of dicts: {"target_id": ..., "relation": "FS", "lag": 0}
-        deps = task.dependencies or []
-        for dep_info in deps:
-            target_id = None
-            lag = 0
-            if isinstance(dep_info, dict):
-                target_id = dep_info.get("target_id")
-                lag = dep_info.get("lag", 0)
-            elif isinstance(dep_info, int): # Fallback
-                target_id = dep_info
-            
-            if target_id and target_id in id_to_task:
-                # Basic FS logic: Start depends on Finish of predecessor
-                prev_ef = calculate_forward(target_id, visited)
-                max_prev_ef = max(max_prev_ef, prev_ef + lag)
-        
-        schedule[task_id]["es"] = max_prev_ef
-        schedule[task_id]["ef"] = max_prev_ef + (task.estimated_hours or 0)
-        return schedule[task_id]["ef"]
-
-    for t in tasks:
-        calculate_forward(t.id)
-
-    # Project duration
-    project_finish = max(s["ef"] for s in schedule.values()) if schedule else 0
-
-    # Backward Pass
-    # Precompute successors
-    successors = {t.id: [] for t in tasks}
-    for t in tasks:
-        deps = t.dependencies or []
-        for dep_info in deps:
-            target_id = None
-            if isinstance(dep_info, dict):
-                target_id = dep_info.get("target_id")
-            elif isinstance(dep_info, int):
-                target_id = dep_info
-            
-            if target_id and target_id in successors:
-                successors[target_id].append(t.id)
+    engine = await load_engine(db, project_id)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not engine.tasks:
+        return {"project_id": project_id, "critical_path": [], "schedule": {}}
 
-    def calculate_backward(task_id, visited=None):
-        if visited is None: visited = set()
-        if task_id in visited: return schedule[task_id]["ls"]
-        visited.add(task_id)
-        
-        task = id_to_task[task_id]
-        if not successors[task_id]:
-            min_next_ls = project_finish
-        else:
-            min_next_ls = min(calculate_backward(sid, visited) for sid in successors[task_id])
-        
-        schedule[task_id]["lf"] = min_next_ls
-        schedule[task_id]["ls"] = min_next_ls - (task.estimated_hours or 0)
-        schedule[task_id]["slack"] = schedule[task_id]["ls"] - schedule[task_id]["es"]
-        return schedule[task_id]["ls"]
+    if data_date is None:
+        data_date = await load_data_date(db, project_id)
+    if data_date is None:
+        starts = [t.early_start for t in engine.tasks.values() if t.early_start is not None]
+        data_date = min(starts) if starts else datetime.now(timezone.utc)
+    try:
+        await calculate(engine, data_date, progress_mode, cache=schedule_cache)
+    except ScheduleCycleError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "cycles": e.cycles})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    for t in tasks:
-        calculate_backward(t.id)
-
-    critical_path = [t.id for t in tasks if abs(schedule[t.id]["slack"]) < 0.001]
-    
+    result = await db.execute(select(Task.id, Task.title).where(Task.project_id == project_id))
+    titles = dict(result.all())
+    start = min(t.early_start for t in engine.tasks.values())
+    finish = engine.project_finish(start)
     return {
         "project_id": project_id,
-        "project_duration": project_finish,
-        "critical_path": critical_path,
-        "schedule": schedule
+        "data_date": data_date,
+        "project_start": start,
+        "project_finish": finish,
+        "project_duration": engine.calendar.working_hours_between(start, finish),
+        "critical_path": engine.critical_chain(),
+        "schedule": {
+            t.id: {
+                "title": titles.get(t.id),
+                "es": t.early_start,
+                "ef": t.early_finish,
+                "ls": t.late_start,
+                "lf": t.late_finish,
+                "slack": t.total_float,
+                "free_float": t.free_float,
+            }
+            for t in sorted(engine.tasks.values(), key=lambda t: (t.early_start, t.id))
+        },
     }
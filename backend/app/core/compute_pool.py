@@ -0,0 +1,45 @@
+"""
+Shared process pool for CPU-bound scheduling work (CPM, Monte Carlo, batch CPM).
+
+Workers are started with the "spawn" method: the API process holds an event loop and
+database connections that must not be forked, and it is the only method on Windows.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from app.core.config import settings
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def compute_workers() -> int:
+    return settings.COMPUTE_WORKERS or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Returns the shared pool, starting it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=compute_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_in_pool(fn: Callable[..., Any], *args, pool: Optional[Executor] = None) -> Any:
+    """
+    Awaits fn(*args) in the shared pool (or `pool`) without blocking the event loop.
+    fn must be a module-level function and its arguments and result picklable.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool or get_process_pool(), fn, *args)
+
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
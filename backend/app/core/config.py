@@ -28,6 +28,17 @@ class Settings(BaseSettings):
     MODEL_PATH: str | None = None # Path to GGUF model for local provider
     HUGGINGFACE_API_KEY: str | None = None # For remote HF Inference API
 
+    # Compute Configuration
+    COMPUTE_WORKERS: int | None = None # Process pool size for Monte Carlo / batch CPM (default: CPU count)
+    SCHEDULE_CACHE_MB: int = 64 # Memory budget of the CPM result cache (0 disables it)
+    SCHEDULE_DEBOUNCE_MS: int = 300 # Task edits this close together coalesce into one reschedule
+    SCHEDULE_MAX_DELAY_MS: int = 3000 # Longest a reschedule is held back by a stream of edits
+
+    # Import Configuration
+    IMPORT_SPOOL_DIR: str = "uploads/imports" # Uploads wait here until their import job has run
+    IMPORT_WORKERS: int = 2 # Import jobs run at the same time; later ones queue
+    IMPORT_JOB_RETENTION_S: int = 3600 # How long finished import jobs stay queryable
+
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, extra="ignore")
 
 settings = Settings()
@@ -65,6 +65,49 @@ async def global_exception_handler(request: Request, exc: Exception):
 # Register API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+from app.core.compute_pool import shutdown_process_pool
+from app.services.schedule_queue import schedule_queue
+from app.services.import_jobs import import_jobs
+
+@app.on_event("shutdown")
+async def shutdown_compute_pool():
+    """
+    Stop the CPU worker pool, pending reschedules and imports / 停止计算进程池、排队的重排和导入任务
+    """
+    schedule_queue.shutdown()
+    import_jobs.shutdown()
+    shutdown_process_pool()
+
+from fastapi.responses import PlainTextResponse
+from app.services.schedule_cache import schedule_cache
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics (text exposition format) / Prometheus 指标
+    """
+    stats = schedule_cache.stats()
+    queue = schedule_queue.stats()
+    imports = import_jobs.stats()
+    lines = []
+    for name, kind, help_text, value in (
+        ("schedule_cache_hits_total", "counter", "CPM runs served from the result cache", stats["hits"]),
+        ("schedule_cache_misses_total", "counter", "CPM runs computed and stored in the result cache", stats["misses"]),
+        ("schedule_cache_evictions_total", "counter", "Cache entries evicted to stay within the memory budget", stats["evictions"]),
+        ("schedule_cache_entries", "gauge", "Cached CPM results", stats["entries"]),
+        ("schedule_cache_bytes", "gauge", "Estimated memory held by the result cache", stats["bytes"]),
+        ("schedule_cache_max_bytes", "gauge", "Memory budget of the result cache", stats["max_bytes"]),
+        ("schedule_queue_requests_total", "counter", "Reschedules requested by task edits", queue["requests"]),
+        ("schedule_queue_runs_total", "counter", "Coalesced reschedule runs", queue["runs"]),
+        ("schedule_queue_failures_total", "counter", "Reschedule runs that raised", queue["failures"]),
+        ("schedule_queue_pending_projects", "gauge", "Projects with a reschedule waiting or running", queue["pending"]),
+        ("import_jobs_completed_total", "counter", "Import jobs that created a project", imports["imports"]),
+        ("import_jobs_failed_total", "counter", "Import jobs that failed", imports["failures"]),
+        ("import_jobs_active", "gauge", "Import jobs queued or running", imports["active"]),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
 from app.core.templates import ENGINEERING_TEMPLATES
 
 @app.get(f"{settings.API_V1_STR}/templates")
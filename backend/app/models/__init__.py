@@ -1,3 +1,4 @@
 from app.models.project import Project, Task, Material, Blueprint, Risk, TaskRelationship
 from app.models.report import ProjectReport
 from app.models.baseline import ProjectBaseline, TaskBaseline
+from app.models.calendar import WorkCalendar, CalendarException
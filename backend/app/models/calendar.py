@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, DateTime, JSON, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class WorkCalendar(Base):
+    """
+    Named (global) working-time calendar, referenced by projects, tasks and relationship lags.
+    work_week maps weekday ("0" = Monday) to working blocks, e.g.
+    {"0": [["08:00", "12:00"], ["13:00", "17:00"]], ...}. Missing weekdays are non-working.
+    """
+    __tablename__ = "calendars"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    description = Column(Text)
+    work_week = Column(JSON, nullable=False)
+    hours_per_day = Column(Float, default=8.0)
+    # Bumped on every change to the calendar or its exceptions; compiled calendars are cached per version
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    exceptions = relationship("CalendarException", back_populates="calendar", cascade="all, delete-orphan")
+
+class CalendarException(Base):
+    """
+    Overrides the work week for a date range: holidays and shutdowns (no work_hours),
+    or overtime / altered days (explicit work_hours, same block format as work_week).
+    """
+    __tablename__ = "calendar_exceptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    calendar_id = Column(Integer, ForeignKey("calendars.id"), nullable=False, index=True)
+    name = Column(String) # e.g. "Chinese New Year", "Typhoon day"
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False) # Inclusive
+    work_hours = Column(JSON) # NULL or [] = non-working
+
+    calendar = relationship("WorkCalendar", back_populates="exceptions")
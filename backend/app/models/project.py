@@ -14,6 +14,8 @@ class Project(Base):
     tech_stack = Column(JSON, default=list) # Recommended technology stack / 推荐技术栈
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     status = Column(String, default="planning") # planning, active, completed, on_hold
+    calendar_id = Column(Integer, ForeignKey("calendars.id"), nullable=True) # Default calendar for tasks
+    data_date = Column(DateTime(timezone=True)) # Data date of the last schedule run (progress is reported up to it)
 
     tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
     blueprints = relationship("Blueprint", back_populates="project", cascade="all, delete-orphan")
@@ -59,6 +61,7 @@ class Task(Base):
     # Calendar & Duration
     original_duration = Column(Float, default=0.0) # Planned duration in hours/days
     remaining_duration = Column(Float, default=0.0)
+    calendar_id = Column(Integer, ForeignKey("calendars.id"), nullable=True) # Falls back to the project calendar
 
     planned_start = Column(DateTime(timezone=True))
     planned_end = Column(DateTime(timezone=True))
@@ -78,6 +81,7 @@ class Task(Base):
     # Execution Dates (Actual)
     actual_start = Column(DateTime(timezone=True))
     actual_end = Column(DateTime(timezone=True))
+    percent_complete = Column(Float, default=0.0) # 0-100; rolled up to summaries by duration weight
     
     # EVM (Earned Value Management)
     planned_value = Column(Float, default=0.0) # PV (Budgeted Cost of Work Scheduled)
@@ -104,11 +108,13 @@ class TaskRelationship(Base):
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), index=True)
     predecessor_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
-    successor_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    successor_id = Column(Integer, ForeignKey("tasks.id"), nullable=False, index=True) # Driving-path walks go backwards
     
     # Relationship Type: FS (Finish-to-Start), SS, FF, SF
     type = Column(String, default="FS", nullable=False) 
     lag = Column(Float, default=0.0) # Lag in hours/days
+    calendar_id = Column(Integer, ForeignKey("calendars.id"), nullable=True) # Lag calendar, defaults to the predecessor's
+    is_driving = Column(Boolean, default=False) # Determines the successor's early start (set by CPM)
     
     predecessor = relationship("Task", foreign_keys=[predecessor_id], back_populates="relationships_succ")
     successor = relationship("Task", foreign_keys=[successor_id], back_populates="relationships_pred")
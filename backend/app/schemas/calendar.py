@@ -0,0 +1,78 @@
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import Dict, List, Optional
+from datetime import date
+from app.services.work_calendar import parse_blocks, parse_work_week
+
+# A working block is ["HH:MM", "HH:MM"]
+WorkBlocks = List[List[str]]
+
+class CalendarExceptionBase(BaseModel):
+    name: Optional[str] = None
+    start_date: date
+    end_date: date
+    work_hours: Optional[WorkBlocks] = None # None / [] = non-working (holiday, shutdown)
+
+    @field_validator('work_hours')
+    @classmethod
+    def validate_work_hours(cls, v):
+        parse_blocks(v)
+        return v
+
+    @field_validator('end_date')
+    @classmethod
+    def validate_range(cls, v, info):
+        start = info.data.get('start_date')
+        if start and v < start:
+            raise ValueError("end_date must not be before start_date")
+        return v
+
+class CalendarExceptionCreate(CalendarExceptionBase):
+    pass
+
+class CalendarException(CalendarExceptionBase):
+    id: int
+    calendar_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class WorkCalendarBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    work_week: Dict[str, WorkBlocks] # "0" = Monday ... "6" = Sunday
+    hours_per_day: float = 8.0
+
+    @field_validator('work_week')
+    @classmethod
+    def validate_work_week(cls, v):
+        parse_work_week(v)
+        return v
+
+class WorkCalendarCreate(WorkCalendarBase):
+    exceptions: List[CalendarExceptionCreate] = []
+
+class WorkCalendarUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    work_week: Optional[Dict[str, WorkBlocks]] = None
+    hours_per_day: Optional[float] = None
+
+    @field_validator('name', 'work_week', 'hours_per_day')
+    @classmethod
+    def reject_null(cls, v, info):
+        # Optional so they can be left out; the columns themselves are required
+        if v is None:
+            raise ValueError(f"{info.field_name} cannot be null")
+        return v
+
+    @field_validator('work_week')
+    @classmethod
+    def validate_work_week(cls, v):
+        parse_work_week(v)
+        return v
+
+class WorkCalendar(WorkCalendarBase):
+    id: int
+    version: int
+    exceptions: List[CalendarException] = []
+
+    model_config = ConfigDict(from_attributes=True)
@@ -52,6 +52,8 @@ class Dependency(BaseModel):
     target_id: int
     relation: str = "FS" # FS, SS, FF, SF
     lag: float = 0.0
+    calendar_id: Optional[int] = None # Lag calendar (defaults to the predecessor's calendar)
+    is_driving: Optional[bool] = None # Set by CPM, ignored on input
 
 class TaskBase(BaseModel):
     title: str
@@ -68,12 +70,14 @@ class TaskBase(BaseModel):
     planned_end: Optional[datetime] = None
     actual_start: Optional[datetime] = None
     actual_end: Optional[datetime] = None
+    percent_complete: Optional[float] = 0.0
     responsible_party: Optional[str] = None
     helper_party: Optional[str] = None
     dependencies: List[Dependency | str] = []
     notes: Optional[str] = None
     is_summary: bool = False
     outline_level: int = 1
+    calendar_id: Optional[int] = None
     # Engineering Fields
     discipline: Optional[str] = None
     is_deliverable: Optional[bool] = False
@@ -96,16 +100,19 @@ class TaskUpdate(BaseModel):
     planned_end: Optional[datetime] = None
     actual_start: Optional[datetime] = None
     actual_end: Optional[datetime] = None
+    percent_complete: Optional[float] = Field(None, ge=0, le=100)
     responsible_party: Optional[str] = None
     helper_party: Optional[str] = None
     dependencies: Optional[List[Dependency]] = None
     notes: Optional[str] = None
+    calendar_id: Optional[int] = None
 
 class Task(TaskBase):
     id: int
     project_id: int
     actual_cost: Optional[float] = None
     materials: List[Material] = []
+    schedule_revision: Optional[int] = None # Reschedule queued by an update (see GET /projects/{id}/schedule/status)
 
     @model_validator(mode='after')
     def map_dependencies(self) -> 'Task':
@@ -116,7 +123,9 @@ class Task(TaskBase):
                 Dependency(
                     target_id=r.predecessor_id,
                     relation=r.type,
-                    lag=r.lag
+                    lag=r.lag,
+                    calendar_id=getattr(r, "calendar_id", None),
+                    is_driving=getattr(r, "is_driving", None)
                 ) for r in getattr(self, 'relationships_pred', [])
             ]
         return self
@@ -131,6 +140,7 @@ class ProjectBase(BaseModel):
     summary: Optional[str] = None
     tech_stack: List[str] = []
     status: str = "planning"
+    calendar_id: Optional[int] = None
 
 class ProjectCreate(ProjectBase):
     tasks: List[TaskCreate] = []
@@ -143,10 +153,12 @@ class ProjectUpdate(BaseModel):
     summary: Optional[str] = None
     status: Optional[str] = None
     tech_stack: Optional[List[str]] = None
+    calendar_id: Optional[int] = None
 
 class Project(ProjectBase):
     id: int
     created_at: datetime
+    data_date: Optional[datetime] = None # Set by schedule runs
     tasks: List[Task] = []
     risks: List[Risk] = []
     # Project-level materials can be managed through a default task or separately
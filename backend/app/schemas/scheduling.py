@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Literal, Optional
+from datetime import datetime
+
+class LevelingRequest(BaseModel):
+    capacities: Dict[int, float] = {} # resource id -> max units at any time
+    default_capacity: Optional[float] = None # Capacity of resources not listed (None = unlimited)
+    data_date: Optional[datetime] = None
+    progress_mode: Optional[str] = None # As for /schedule: "retained_logic" (default) or "progress_override"
+    bucket_minutes: int = Field(60, ge=1, le=480)
+
+class MonteCarloRequest(BaseModel):
+    iterations: int = Field(1000, ge=1, le=100000)
+    optimistic_factor: float = Field(0.9, ge=0) # x original duration
+    pessimistic_factor: float = Field(1.3, ge=0)
+    task_ranges: Dict[int, List[float]] = {} # task id -> [low, most likely, high] hours
+    use_risks: bool = True # Apply the project's risk register
+    data_date: Optional[datetime] = None
+    seed: Optional[int] = None
+
+    @field_validator('task_ranges')
+    @classmethod
+    def validate_ranges(cls, v):
+        for task_id, values in v.items():
+            if len(values) != 3:
+                raise ValueError(f"Task {task_id}: range must be [low, most likely, high]")
+        return v
+
+class BatchScheduleRequest(BaseModel):
+    data_date: Optional[datetime] = None
+    project_ids: Optional[List[int]] = None # Default: all planning / active projects
+
+class ScenarioTaskEdit(BaseModel):
+    task_id: int
+    original_duration: Optional[float] = Field(None, ge=0) # hours
+    constraint_type: Optional[str] = None # Send null to clear the constraint
+    constraint_date: Optional[datetime] = None
+    calendar_id: Optional[int] = None
+
+class ScenarioLinkEdit(BaseModel):
+    action: Literal["add", "remove", "update"] = "add"
+    predecessor_id: int
+    successor_id: int
+    type: Optional[str] = None # FS, SS, FF, SF (add defaults to FS)
+    lag: Optional[float] = None # hours
+
+class WhatIfRequest(BaseModel):
+    data_date: Optional[datetime] = None
+    progress_mode: Optional[str] = None
+    task_edits: List[ScenarioTaskEdit] = []
+    link_edits: List[ScenarioLinkEdit] = []
@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from app.models.calendar import WorkCalendar
+from app.models.project import Project, Task, TaskRelationship
+from app.services.work_calendar import ProjectCalendar, compile_calendar, get_cached_calendar
+
+class CalendarService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_compiled_calendars(self, calendar_ids: Iterable[Optional[int]]) -> Dict[int, ProjectCalendar]:
+        """
+        Returns compiled calendars by id.
+        Only (id, version) is read for calendars already compiled at that version;
+        work weeks and exceptions are loaded for the rest.
+        """
+        ids = {c for c in calendar_ids if c is not None}
+        if not ids:
+            return {}
+
+        result = await self.session.execute(
+            select(WorkCalendar.id, WorkCalendar.version).where(WorkCalendar.id.in_(ids))
+        )
+        compiled: Dict[int, ProjectCalendar] = {}
+        missing = []
+        for calendar_id, version in result.all():
+            cached = get_cached_calendar(calendar_id, version)
+            if cached is not None:
+                compiled[calendar_id] = cached
+            else:
+                missing.append(calendar_id)
+
+        if missing:
+            result = await self.session.execute(
+                select(WorkCalendar)
+                .where(WorkCalendar.id.in_(missing))
+                .options(selectinload(WorkCalendar.exceptions))
+            )
+            for calendar in result.scalars().all():
+                compiled[calendar.id] = compile_calendar(calendar)
+        return compiled
+
+    async def count_references(self, calendar_id: int) -> Dict[str, int]:
+        """Projects, tasks and relationships (lag calendars) using the calendar; only non-zero counts."""
+        counts = {}
+        for label, model in (("projects", Project), ("tasks", Task), ("relationships", TaskRelationship)):
+            count = (await self.session.execute(
+                select(func.count()).select_from(model).where(model.calendar_id == calendar_id)
+            )).scalar_one()
+            if count:
+                counts[label] = count
+        return counts
+
+    @staticmethod
+    def touch(calendar: WorkCalendar):
+        """Marks a calendar as changed so schedules stop using the old compiled version."""
+        calendar.version = (calendar.version or 0) + 1
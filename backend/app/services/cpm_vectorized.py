@@ -0,0 +1,300 @@
+"""
+Vectorized CPM backend.
+
+Tasks are mapped to dense integer indices ordered by topological layer and
+relationships to CSR arrays, so both passes run layer by layer with NumPy
+max/min reductions in integer working-minute space. Datetimes are only
+produced at the end.
+
+Dates are handled as "keys": 2 * working_offset + flag, where flag = 1 means the
+offset is rendered with start semantics (beginning of the next working block)
+and 0 with finish semantics (end of the previous block). Ordering keys matches
+ordering the datetimes the object engine produces, which keeps both backends'
+results identical, block boundaries included.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from app.services.work_calendar import ProjectCalendar
+
+REL_TYPE_CODES = {'FS': 0, 'SS': 1, 'FF': 2, 'SF': 3}
+_UNKNOWN_TYPE = -1
+
+_NEG = np.iinfo(np.int64).min // 4
+_POS = np.iinfo(np.int64).max // 4
+
+
+def _minutes(hours) -> int:
+    # Same truncation as ProjectCalendar.add_working_duration
+    return int((hours or 0.0) * 60)
+
+
+def shift_keys(keys: np.ndarray, minutes) -> np.ndarray:
+    """Moves keys by working minutes (add_working_duration / subtract_working_duration)."""
+    offsets = (keys >> 1) + minutes
+    flags = np.where(minutes > 0, 0, np.where(minutes < 0, 1, keys & 1))
+    return offsets * 2 + flags
+
+
+class CompiledNetwork:
+    """
+    Dense form of a schedule network.
+    Node i (after relabeling) belongs to layer `level[i]`; layers are contiguous
+    index ranges given by `layer_ptr`. in_* arrays are the CSR of incoming edges
+    grouped by successor, out_* arrays the CSR of outgoing edges grouped by predecessor.
+    """
+    def __init__(self, task_ids: Sequence[int], pred_idx: np.ndarray, succ_idx: np.ndarray,
+                 rel_types: np.ndarray, lags: np.ndarray):
+        n = len(task_ids)
+        self.n = n
+
+        level = self._levels(n, pred_idx, succ_idx)
+        # Relabel nodes so every layer is a contiguous index range
+        order = np.argsort(level, kind='stable')
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n, dtype=np.int64)
+        self.task_ids = np.asarray(task_ids, dtype=np.int64)[order]
+        self.order = order # order[new_index] = original index
+        self.level = level[order]
+        n_levels = int(self.level[-1]) + 1 if n else 0
+        self.layer_ptr = np.searchsorted(self.level, np.arange(n_levels + 1))
+
+        src = rank[pred_idx]
+        dst = rank[succ_idx]
+
+        in_order = np.lexsort((src, dst))
+        self.in_src = src[in_order]
+        self.in_dst = dst[in_order]
+        self.in_type = rel_types[in_order]
+        self.in_lag = lags[in_order]
+        self.in_edge = in_order # position in the caller's relationship arrays
+        self.in_ptr = np.searchsorted(self.in_dst, np.arange(n + 1))
+
+        out_order = np.lexsort((dst, src))
+        self.out_src = src[out_order]
+        self.out_dst = dst[out_order]
+        self.out_type = rel_types[out_order]
+        self.out_lag = lags[out_order]
+        self.out_ptr = np.searchsorted(self.out_src, np.arange(n + 1))
+
+    @staticmethod
+    def _levels(n: int, pred_idx: np.ndarray, succ_idx: np.ndarray) -> np.ndarray:
+        """Longest-path layer of every node (Kahn's algorithm, one frontier at a time)."""
+        order = np.argsort(pred_idx, kind='stable')
+        targets = succ_idx[order]
+        ptr = np.searchsorted(pred_idx[order], np.arange(n + 1))
+        in_degree = np.bincount(succ_idx, minlength=n)
+
+        level = np.zeros(n, dtype=np.int64)
+        frontier = np.flatnonzero(in_degree == 0)
+        seen = frontier.size
+        depth = 0
+        while frontier.size:
+            level[frontier] = depth
+            starts = ptr[frontier]
+            counts = ptr[frontier + 1] - starts
+            total = int(counts.sum())
+            if not total:
+                break
+            # Gather the out-edges of the whole frontier at once
+            edge_idx = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+            nodes, hits = np.unique(targets[edge_idx], return_counts=True)
+            in_degree[nodes] -= hits
+            frontier = nodes[in_degree[nodes] == 0]
+            seen += frontier.size
+            depth += 1
+
+        if seen != n:
+            raise ValueError("Cycle detected in project schedule")
+        return level
+
+    def layers(self):
+        for lvl in range(len(self.layer_ptr) - 1):
+            yield lvl, int(self.layer_ptr[lvl]), int(self.layer_ptr[lvl + 1])
+
+    def forward(self, durations: np.ndarray, es_floor: np.ndarray):
+        """
+        Forward pass in offset space. durations / es_floor may be 1-D (n,) or
+        batched 2-D (iterations, n); es_floor is max(project start, SNET).
+        Returns (ES offsets, EF offsets).
+        """
+        es = np.array(es_floor, dtype=np.int64, copy=True)
+        ef = np.empty_like(es)
+        uses_finish = (self.in_type == 0) | (self.in_type == 2)  # FS, FF
+        minus_duration = (self.in_type == 2) | (self.in_type == 3) # FF, SF
+        unknown = self.in_type == _UNKNOWN_TYPE
+
+        for lvl, a, b in self.layers():
+            if lvl:
+                ia, ib = int(self.in_ptr[a]), int(self.in_ptr[b])
+                p = self.in_src[ia:ib]
+                s = self.in_dst[ia:ib]
+                base = np.where(uses_finish[ia:ib], ef[..., p], es[..., p])
+                cand = base + self.in_lag[ia:ib]
+                cand = cand - np.where(minus_duration[ia:ib], durations[..., s], 0)
+                cand = np.where(unknown[ia:ib], _NEG, cand)
+                best = np.maximum.reduceat(cand, self.in_ptr[a:b] - ia, axis=-1)
+                es[..., a:b] = np.maximum(es[..., a:b], best)
+            ef[..., a:b] = es[..., a:b] + durations[..., a:b]
+        return es, ef
+
+    def edge_starts(self, durations: np.ndarray, es: np.ndarray, ef: np.ndarray) -> np.ndarray:
+        """
+        Early start offset each relationship imposes on its successor, in in-edge order
+        (_NEG for unknown relationship types). Single-run (1-D) arrays only.
+        """
+        uses_finish = (self.in_type == 0) | (self.in_type == 2)
+        minus_duration = (self.in_type == 2) | (self.in_type == 3)
+        cand = np.where(uses_finish, ef[self.in_src], es[self.in_src]) + self.in_lag
+        cand = cand - np.where(minus_duration, durations[self.in_dst], 0)
+        return np.where(self.in_type == _UNKNOWN_TYPE, _NEG, cand)
+
+    def free_float(self, durations: np.ndarray, es: np.ndarray, ef: np.ndarray, project_finish):
+        """
+        Free float in minutes and the driving flag of every in-edge.
+        FF = min(project finish - EF, min over out-edges of successor ES - imposed start).
+        """
+        cand = self.edge_starts(durations, es, ef)
+        known = self.in_type != _UNKNOWN_TYPE
+        gap = es[self.in_dst] - cand
+        free = np.maximum(0, project_finish - ef)
+        np.minimum.at(free, self.in_src[known], np.maximum(0, gap[known]))
+        return free, known & (gap == 0)
+
+    def backward(self, durations: np.ndarray, es: np.ndarray, lf_ceiling_keys: np.ndarray,
+                 project_finish_keys):
+        """
+        Backward pass on keys. lf_ceiling_keys holds FNLT constraints (or _POS).
+        Returns (LF keys, LS keys).
+        """
+        lf = np.minimum(lf_ceiling_keys, np.expand_dims(project_finish_keys, -1)) \
+            if np.ndim(project_finish_keys) else np.minimum(lf_ceiling_keys, project_finish_keys)
+        lf = np.array(lf, dtype=np.int64, copy=True)
+        ls = np.empty_like(lf)
+        from_start = (self.out_type == 0) | (self.out_type == 1) # FS, SS -> successor LS
+        plus_duration = (self.out_type == 1) | (self.out_type == 3) # SS, SF
+        unknown = self.out_type == _UNKNOWN_TYPE
+        counts = np.diff(self.out_ptr)
+
+        for lvl, a, b in reversed(list(self.layers())):
+            oa, ob = int(self.out_ptr[a]), int(self.out_ptr[b])
+            if ob > oa:
+                p = self.out_src[oa:ob]
+                s = self.out_dst[oa:ob]
+                base = np.where(from_start[oa:ob], ls[..., s], lf[..., s])
+                cand = shift_keys(base, -self.out_lag[oa:ob])
+                cand = np.where(plus_duration[oa:ob], shift_keys(cand, durations[..., p]), cand)
+                cand = np.where(unknown[oa:ob], _POS, cand)
+                rows = np.flatnonzero(counts[a:b]) + a
+                best = np.minimum.reduceat(cand, self.out_ptr[rows] - oa, axis=-1)
+                lf[..., rows] = np.minimum(lf[..., rows], best)
+            # LS = next_working_moment(LF - D) -> start semantics
+            ls[..., a:b] = ((lf[..., a:b] >> 1) - durations[..., a:b]) * 2 + 1
+        return lf, ls
+
+
+def compile_network(tasks: Dict[int, object], relationships: Sequence[object]) -> CompiledNetwork:
+    """Builds a CompiledNetwork from task / relationship objects (ORM rows or plain records)."""
+    task_ids = list(tasks.keys())
+    index = {t_id: i for i, t_id in enumerate(task_ids)}
+    kept, preds, succs, types, lags = [], [], [], [], []
+    for rel in relationships:
+        p = index.get(rel.predecessor_id)
+        s = index.get(rel.successor_id)
+        if p is None or s is None:
+            continue
+        kept.append(rel)
+        preds.append(p)
+        succs.append(s)
+        types.append(REL_TYPE_CODES.get(rel.type, _UNKNOWN_TYPE))
+        lags.append(_minutes(rel.lag))
+    network = CompiledNetwork(
+        task_ids,
+        np.asarray(preds, dtype=np.int64),
+        np.asarray(succs, dtype=np.int64),
+        np.asarray(types, dtype=np.int64),
+        np.asarray(lags, dtype=np.int64),
+    )
+    network.relationships = kept # in_edge indexes into this list
+    return network
+
+
+def keys_to_datetimes(calendar: ProjectCalendar, keys: np.ndarray, tz) -> List[datetime]:
+    """Renders keys as datetimes with a single binary search over the calendar index."""
+    if not keys.size:
+        return []
+    offsets = keys >> 1
+    at_start = (keys & 1).astype(bool)
+    epoch, starts, cum = calendar.interval_index(int(offsets.min()), int(offsets.max()))
+    starts = np.asarray(starts, dtype=np.int64)
+    cum = np.asarray(cum, dtype=np.int64)
+    idx = np.where(
+        at_start,
+        np.searchsorted(cum, offsets, side='right') - 1,
+        np.searchsorted(cum, offsets, side='left') - 1,
+    )
+    minutes = starts[idx] + (offsets - cum[idx])
+    values = (np.datetime64(epoch, 'm') + minutes.astype('timedelta64[m]')).astype('datetime64[us]').tolist()
+    if tz is not None:
+        values = [v.replace(tzinfo=tz) for v in values]
+    return values
+
+
+def constraint_bounds(calendar: ProjectCalendar, tasks: Sequence[object], project_start: int):
+    """
+    ES floors (project start / SNET, offsets) and LF ceilings (FNLT, keys) of tasks
+    given in network order.
+    """
+    es_floor = np.full(len(tasks), project_start, dtype=np.int64)
+    lf_ceiling = np.full(len(tasks), _POS, dtype=np.int64)
+    for i, task in enumerate(tasks):
+        if task.constraint_date and task.constraint_type == 'start_no_earlier_than':
+            es_floor[i] = max(es_floor[i], calendar.to_offset(task.constraint_date))
+        elif task.constraint_date and task.constraint_type == 'finish_no_later_than':
+            # prev_working_moment -> finish semantics
+            lf_ceiling[i] = calendar.to_offset(task.constraint_date) * 2
+    return es_floor, lf_ceiling
+
+
+def calculate_dates_vectorized(engine, project_start_date: datetime):
+    """
+    Vectorized equivalent of SchedulingEngine.calculate_dates for single-calendar networks.
+    Writes ES/EF/LS/LF/TF/FF onto engine.tasks and the driving flags onto the relationships.
+    """
+    calendar = engine.calendar
+    tz = project_start_date.tzinfo
+    project_start = calendar.to_offset(calendar.next_working_moment(project_start_date))
+
+    network = compile_network(engine.tasks, engine.relationships)
+    tasks = [engine.tasks[int(t_id)] for t_id in network.task_ids]
+    n = network.n
+
+    durations = np.fromiter((_minutes(t.original_duration) for t in tasks), dtype=np.int64, count=n)
+    es_floor, lf_ceiling = constraint_bounds(calendar, tasks, project_start)
+
+    es, ef = network.forward(durations, es_floor)
+    es_keys = es * 2 + 1
+    ef_keys = shift_keys(es_keys, durations)
+    project_finish = ef_keys.max() if n else project_start * 2 + 1
+    lf_keys, ls_keys = network.backward(durations, es, lf_ceiling, project_finish)
+    total_float = np.maximum(0, (ls_keys >> 1) - es) / 60.0
+    free_minutes, driving = network.free_float(durations, es, ef, project_finish >> 1)
+    free_float = free_minutes / 60.0
+
+    early_starts = keys_to_datetimes(calendar, es_keys, tz)
+    early_finishes = keys_to_datetimes(calendar, ef_keys, tz)
+    late_starts = keys_to_datetimes(calendar, ls_keys, tz)
+    late_finishes = keys_to_datetimes(calendar, lf_keys, tz)
+    floats = total_float.tolist()
+    free_floats = free_float.tolist()
+    for i, task in enumerate(tasks):
+        task.early_start = early_starts[i]
+        task.early_finish = early_finishes[i]
+        task.late_start = late_starts[i]
+        task.late_finish = late_finishes[i]
+        task.total_float = floats[i]
+        task.free_float = free_floats[i]
+    for edge, is_driving in zip(network.in_edge.tolist(), driving.tolist()):
+        network.relationships[edge].is_driving = is_driving
+    return network
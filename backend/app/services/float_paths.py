@@ -0,0 +1,145 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+from app.models.project import TaskRelationship
+from app.services.scheduling_engine import SchedulingEngine
+
+# Relative floats are sums of hour fractions; compare them at this precision
+_FLOAT_DIGITS = 6
+
+class FloatPathService:
+    """
+    Multiple float paths (P6 style) ending at a target activity, computed from the
+    CPM results already stored on the engine's tasks.
+
+    The relative float of an activity is the number of working hours it can slip before
+    it delays the target: the minimum over its successor links of (link gap + successor's
+    relative float). One reverse topological pass over the target's predecessors computes
+    it; paths are then peeled off in ascending relative float, so path 1 is the driving
+    path into the target, path 2 the next most critical, and so on.
+    """
+    def __init__(self, engine: SchedulingEngine):
+        self.engine = engine
+
+    def default_target(self) -> Optional[int]:
+        """The activity finishing last (the project finish)."""
+        tasks = [t for t in self.engine.tasks.values() if t.early_finish is not None]
+        if not tasks:
+            return None
+        return max(tasks, key=lambda t: (t.early_finish, -t.id)).id
+
+    def ancestors(self, target_id: int) -> List[int]:
+        """Predecessors of the target (and the target), predecessors first."""
+        tasks = self.engine.tasks
+        order = []
+        visited = {target_id}
+        stack = [(target_id, iter(self.engine.preds.get(target_id, [])))]
+        while stack:
+            node, rels = stack[-1]
+            for rel in rels:
+                pred = rel.predecessor_id
+                if pred in tasks and pred not in visited:
+                    visited.add(pred)
+                    stack.append((pred, iter(self.engine.preds.get(pred, []))))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+        return order
+
+    def relative_floats(self, order: List[int]) -> Tuple[Dict[int, float], Dict[int, float]]:
+        """Relative float of every task in `order` and the gap of every link between them."""
+        tasks = self.engine.tasks
+        members = set(order)
+        relative = {order[-1]: 0.0}
+        gaps: Dict[int, float] = {} # id(rel) -> gap
+        for t_id in reversed(order):
+            if t_id not in relative:
+                continue # Only reaches the target through links of unknown type
+            succ = tasks[t_id]
+            for rel in self.engine.preds.get(t_id, []):
+                if rel.predecessor_id not in members:
+                    continue
+                gap = self.engine.relationship_gap(rel, tasks[rel.predecessor_id], succ)
+                if gap is None:
+                    continue
+                gaps[id(rel)] = gap
+                value = round(gap + relative[t_id], _FLOAT_DIGITS)
+                if value < relative.get(rel.predecessor_id, float('inf')):
+                    relative[rel.predecessor_id] = value
+        return relative, gaps
+
+    def float_paths(self, target_id: Optional[int] = None, max_paths: int = 10) -> List[Dict]:
+        """
+        Returns up to `max_paths` paths ending at `target_id` (default: the project finish),
+        each with its relative float and its activities in path order.
+        """
+        tasks = self.engine.tasks
+        if target_id is None:
+            target_id = self.default_target()
+        if target_id not in tasks:
+            raise ValueError("Target activity not found in project")
+        if any(t.early_start is None or t.early_finish is None for t in tasks.values()):
+            raise ValueError("Schedule has not been calculated")
+
+        order = self.ancestors(target_id)
+        rank = {t_id: i for i, t_id in enumerate(order)}
+        relative, gaps = self.relative_floats(order)
+
+        # The link each task uses to reach the target with its relative float
+        tight: Dict[int, TaskRelationship] = {}
+        for t_id in order:
+            for rel in self.engine.preds.get(t_id, []):
+                pred = rel.predecessor_id
+                if id(rel) in gaps and pred not in tight and \
+                        round(gaps[id(rel)] + relative[t_id], _FLOAT_DIGITS) == relative[pred]:
+                    tight[pred] = rel
+
+        # Most critical first; among equals, the activity closest to the target
+        heap = [(value, -rank[t_id], t_id) for t_id, value in relative.items()]
+        heapq.heapify(heap)
+        assigned = set()
+        paths = []
+        while heap and len(paths) < max_paths:
+            value, _, t_id = heapq.heappop(heap)
+            if t_id in assigned:
+                continue
+            # Forward along tight links until the target or an earlier path
+            chain = [t_id]
+            current = t_id
+            while current in tight and tight[current].successor_id not in assigned:
+                current = tight[current].successor_id
+                chain.append(current)
+            # Backward through unassigned predecessors with the same relative float
+            head = []
+            current = t_id
+            while True:
+                feeders = [
+                    rel for rel in self.engine.preds.get(current, [])
+                    if id(rel) in gaps and rel.predecessor_id not in assigned
+                    and relative.get(rel.predecessor_id) == value
+                    and round(gaps[id(rel)] + relative[current], _FLOAT_DIGITS) == value
+                ]
+                if not feeders:
+                    break
+                rel = min(feeders, key=lambda r: (not r.is_driving, -rank[r.predecessor_id]))
+                current = rel.predecessor_id
+                head.append(current)
+            path = list(reversed(head)) + chain
+            assigned.update(path)
+            paths.append({
+                "path": len(paths) + 1,
+                "float": value,
+                "tasks": [self._describe(tasks[p], relative[p]) for p in path],
+            })
+        return paths
+
+    @staticmethod
+    def _describe(task, relative_float: float) -> Dict:
+        return {
+            "task_id": task.id,
+            "title": task.title,
+            "early_start": task.early_start,
+            "early_finish": task.early_finish,
+            "total_float": task.total_float,
+            "relative_float": relative_float,
+        }
@@ -0,0 +1,218 @@
+"""
+Background project import jobs.
+
+POST /projects/import spools the upload to IMPORT_SPOOL_DIR and returns a job id at
+once; the import itself (parse, bulk insert, one commit) runs as a background task, at
+most IMPORT_WORKERS at a time, and reports its stage and progress through status().
+Parsing is synchronous, so it is pulled from a worker thread one batch at a time while
+the database writes stay on the event loop. Job state lives in the API process: a
+restart loses queued and running imports (their transaction never commits).
+"""
+import asyncio
+import itertools
+import os
+import shutil
+import time
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.project import Project
+from app.services.import_parsers import parse_upload
+from app.services.import_writer import IMPORT_BATCH_SIZE, ImportWriter
+
+# Stages in order; a job ends in "completed" or "failed"
+IMPORT_STAGES = ("queued", "parsing", "linking", "completed", "failed")
+# Bytes per read when spooling an upload
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+class ImportJob:
+    __slots__ = ('id', 'filename', 'ext', 'path', 'project_title', 'industry', 'stage', 'rows_processed',
+                 'relationships', 'project_id', 'error', 'submitted', 'started', 'finished', 'worker', 'done')
+
+    def __init__(self, filename: str, ext: str, project_title: Optional[str] = None, industry: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.ext = ext
+        self.path: Optional[str] = None # Spooled upload
+        self.project_title = project_title
+        self.industry = industry
+        self.stage = "queued"
+        self.rows_processed = 0 # Tasks parsed and written
+        self.relationships = 0
+        self.project_id: Optional[int] = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.done = asyncio.Event()
+
+    def status(self) -> Dict:
+        elapsed = 0.0
+        if self.started is not None:
+            elapsed = (self.finished or time.time()) - self.started
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "stage": self.stage,
+            "rows_processed": self.rows_processed,
+            "relationships": self.relationships,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0.0, # Tasks per second
+            "project_id": self.project_id,
+            "error": self.error,
+        }
+
+
+def _next_batch(tasks: Iterator[Dict], size: int) -> List[Dict]:
+    return list(itertools.islice(tasks, size))
+
+
+async def import_file(session: AsyncSession, source, job: ImportJob, batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """
+    Imports an uploaded file (binary file object) as a new project and commits once;
+    parsing runs in a worker thread. Updates `job` as it goes and returns the project id.
+    Raises ValueError for files that cannot be parsed or hold no tasks.
+    """
+    job.stage = "parsing"
+    parsed = await asyncio.to_thread(parse_upload, source, job.ext)
+    tasks = iter(parsed.get("tasks") or [])
+    batch = await asyncio.to_thread(_next_batch, tasks, batch_size)
+    if not batch:
+        raise ValueError("No tasks found in the file. Please check the file format.")
+
+    project = Project(
+        title=job.project_title or parsed.get("title", "Imported Project"),
+        description=parsed.get("description") or f"Imported from {job.filename}",
+        industry=job.industry or parsed.get("industry", ""),
+        status="planning",
+    )
+    session.add(project)
+    await session.flush()
+
+    writer = ImportWriter(session, project.id, batch_size)
+    if parsed.get("calendars"):
+        await writer.add_calendars(parsed["calendars"])
+        project.calendar_id = writer.calendar_ids.get(parsed.get("calendar_ref"))
+    while batch:
+        for t_data in batch:
+            await writer.add(t_data)
+        job.rows_processed += len(batch)
+        batch = await asyncio.to_thread(_next_batch, tasks, batch_size)
+
+    job.stage = "linking"
+    await writer.finish()
+    job.relationships = writer.relationship_count
+    # Links listed apart from their tasks (XER), read on from the same stream
+    links = iter(parsed.get("relationships") or [])
+    batch = await asyncio.to_thread(_next_batch, links, batch_size)
+    while batch:
+        await writer.add_links(batch)
+        job.relationships = writer.relationship_count
+        batch = await asyncio.to_thread(_next_batch, links, batch_size)
+
+    project.summary = f"Imported from {job.filename} ({writer.task_count} tasks)"
+    await session.commit()
+    return project.id
+
+
+class ImportJobs:
+    def __init__(self, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+                 spool_dir: Optional[str] = None, workers: Optional[int] = None):
+        self.session_factory = session_factory
+        self.spool_dir = spool_dir or settings.IMPORT_SPOOL_DIR
+        self.slots = asyncio.Semaphore(workers or settings.IMPORT_WORKERS)
+        self.jobs: Dict[str, ImportJob] = {}
+        self.imports = 0
+        self.failures = 0
+
+    async def submit(self, upload, filename: str, ext: str, project_title: Optional[str] = None,
+                     industry: Optional[str] = None) -> ImportJob:
+        """Spools `upload` (a binary file object) to disk and starts its import in the background."""
+        self.prune()
+        job = ImportJob(filename, ext, project_title, industry)
+        os.makedirs(self.spool_dir, exist_ok=True)
+        job.path = os.path.join(self.spool_dir, f"{job.id}.{ext}")
+        try:
+            await asyncio.to_thread(self._spool, upload, job.path)
+        except BaseException:
+            os.remove(job.path)
+            raise
+        self.jobs[job.id] = job
+        job.worker = asyncio.create_task(self.run(job))
+        return job
+
+    @staticmethod
+    def _spool(upload, path: str):
+        with open(path, "wb") as f:
+            shutil.copyfileobj(upload, f, SPOOL_CHUNK_SIZE)
+
+    async def run(self, job: ImportJob):
+        try:
+            async with self.slots:
+                job.started = time.time()
+                async with self.session_factory() as session:
+                    try:
+                        with open(job.path, "rb") as source:
+                            job.project_id = await import_file(session, source, job)
+                    except BaseException:
+                        await session.rollback()
+                        raise
+            job.stage = "completed"
+            self.imports += 1
+        except Exception as e:
+            job.stage = "failed"
+            job.error = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+            self.failures += 1
+            print(f"Warning: Import job {job.id} ({job.filename}) failed: {job.error}")
+        finally:
+            if job.stage != "completed" and job.error is None: # Cancelled (shutdown)
+                job.stage, job.error = "failed", "Import cancelled"
+            job.finished = time.time()
+            if job.started is None:
+                job.started = job.finished
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+            job.done.set()
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        job = self.jobs.get(job_id)
+        return job.status() if job is not None else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """Waits (up to timeout seconds) for the job to finish; returns status()."""
+        job = self.jobs.get(job_id)
+        if job is not None and not job.done.is_set():
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.status(job_id)
+
+    def prune(self):
+        """Forgets jobs that finished more than IMPORT_JOB_RETENTION_S ago."""
+        cutoff = time.time() - settings.IMPORT_JOB_RETENTION_S
+        for job_id in [j.id for j in self.jobs.values() if j.finished is not None and j.finished < cutoff]:
+            del self.jobs[job_id]
+
+    def stats(self) -> Dict:
+        return {
+            "imports": self.imports,
+            "failures": self.failures,
+            "active": sum(1 for j in self.jobs.values() if j.finished is None),
+        }
+
+    def shutdown(self):
+        for job in self.jobs.values():
+            if job.worker is not None and not job.worker.done():
+                job.worker.cancel()
+
+
+import_jobs = ImportJobs()
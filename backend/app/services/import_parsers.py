@@ -0,0 +1,376 @@
+"""
+Schedule file parsers for project import: CSV, JSON, XML (MS Project MSPDI, or
+generic XML) and Primavera XER (xer_parser). Each returns {"title", "tasks",
+"materials", ...} where every task is a plain dict (title, wbs_code, estimated_hours,
+planned dates, dependencies_raw / xml_uid + predecessor_links, hierarchy fields) ready
+for the import writer.
+"""
+import csv
+import json
+import io
+import itertools
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+from app.services.xer_parser import parse_xer_stream
+
+# Upload extensions accepted by the importer
+SUPPORTED_FORMATS = ("csv", "json", "xml", "mpp", "xer")
+
+
+def parse_upload(source, ext: str) -> dict:
+    """
+    Parses an uploaded file (binary file object) by extension. XML and XER are streamed
+    from `source`, so "tasks" is an iterator that reads it; CSV and JSON are decoded whole.
+    """
+    if ext in ("xml", "mpp"):
+        return parse_xml_stream(source)
+    if ext == "xer":
+        return parse_xer_stream(source)
+    content = _decode(source.read())
+    if content is None:
+        raise ValueError("Unable to decode file. Please use UTF-8 encoding.")
+    if ext == "csv":
+        return parse_csv(content)
+    if ext == "json":
+        return parse_json(content)
+    raise ValueError(f"Unsupported file format: .{ext}")
+
+
+def parse_csv(content: str) -> dict:
+    reader = csv.DictReader(io.StringIO(content))
+    tasks = []
+    materials = []
+    project_title = "Imported CSV Project"
+
+    for row in reader:
+        norm = {k.strip().lower().replace(" ", "_"): v.strip() for k, v in row.items() if k}
+
+        if norm.get("category") or norm.get("unit_price"):
+            materials.append({
+                "name": norm.get("name") or norm.get("title", "Unknown Material"),
+                "category": norm.get("category", "General"),
+                "quantity": _safe_float(norm.get("quantity", "0")),
+                "unit": norm.get("unit", "pcs"),
+                "unit_price": _safe_float(norm.get("unit_price", "0")),
+                "total_price": _safe_float(norm.get("total_price", "0"))
+                    or _safe_float(norm.get("quantity", "0")) * _safe_float(norm.get("unit_price", "0")),
+            })
+            continue
+
+        title = (
+            norm.get("title") or norm.get("task_name") or norm.get("activity_name")
+            or norm.get("name") or norm.get("task") or "Untitled Task"
+        )
+
+        if not tasks and (norm.get("project") or norm.get("project_title")):
+            project_title = norm.get("project") or norm.get("project_title") or project_title
+
+        est = _safe_float(norm.get("estimated_hours") or norm.get("duration") or norm.get("hours") or "0")
+        dep_str = norm.get("dependencies") or norm.get("predecessors") or ""
+        deps = [d.strip() for d in dep_str.split(",") if d.strip()] if dep_str else []
+
+        tasks.append({
+            "wbs_code": norm.get("wbs") or norm.get("wbs_code") or None,
+            "title": title,
+            "description": norm.get("description") or norm.get("scope") or "",
+            "estimated_hours": est,
+            "priority": _norm_priority(norm.get("priority")),
+            "status": _norm_status(norm.get("status")),
+            "task_type": "milestone" if (norm.get("type") or "").lower() in ("milestone", "ms") else "task",
+            "planned_start": _parse_date(norm.get("start") or norm.get("planned_start")),
+            "planned_end": _parse_date(norm.get("end") or norm.get("planned_end") or norm.get("finish")),
+            "responsible_party": norm.get("responsible") or norm.get("responsible_party") or norm.get("owner") or None,
+            "dependencies_raw": deps,
+            "is_summary": False,
+            "outline_level": 1,
+        })
+
+    return {"title": project_title, "tasks": tasks, "materials": materials}
+
+
+def parse_json(content: str) -> dict:
+    data = json.loads(content)
+    if isinstance(data, list):
+        return {"title": "Imported JSON Project", "tasks": data, "materials": []}
+    return {
+        "title": data.get("title") or data.get("project_title") or "Imported JSON Project",
+        "tasks": data.get("tasks", []),
+        "materials": data.get("materials", []),
+        "description": data.get("description") or data.get("summary") or "",
+        "industry": data.get("industry") or "",
+    }
+
+
+def parse_xml(content: str) -> dict:
+    """Parse XML content. Supports MS Project XML format and generic XML."""
+    parsed = parse_xml_stream(io.StringIO(content))
+    parsed["tasks"] = list(parsed["tasks"])
+    return parsed
+
+
+def parse_xml_stream(source) -> dict:
+    """
+    Streaming variant of parse_xml for a file object (an upload's spooled file).
+    Task dicts are produced lazily while the document is read with iterparse, so memory
+    stays flat on large MSPDI exports; "tasks" is an iterator. The project title is
+    resolved up to the first task, which is where MS Project writes it.
+    """
+    stream = _XmlTaskStream(source)
+    tasks = iter(stream)
+    first = next(tasks, None)
+    return {
+        "title": stream.title or "Imported XML Project",
+        "tasks": itertools.chain([first], tasks) if first is not None else [],
+        "materials": [],
+    }
+
+
+class _XmlTaskStream:
+    """
+    Yields task dicts from an XML stream. Task elements are recognised like the old
+    findall() chain (Task, task, row, or any tag containing 'task' with children); the
+    first one found fixes the tag for the rest of the document. Each task element is
+    dropped from the tree once converted, as is everything outside tasks once the task
+    tag is known, so only the element being read is held in memory.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.title: Optional[str] = None
+        self.count = 0
+
+    def __iter__(self):
+        try:
+            yield from self._iter(self.source)
+        except (ET.ParseError, ValueError) as e:
+            # Expat only decodes single-byte and UTF encodings: retry legacy (e.g. GBK)
+            # files from the decoded text, as the non-streaming importer did
+            if self.count or not hasattr(self.source, "seek"):
+                raise ValueError(f"Invalid XML: {e}")
+            self.source.seek(0)
+            content = _decode(self.source.read())
+            if content is None:
+                raise ValueError(f"Invalid XML: {e}")
+            try:
+                yield from self._iter(io.StringIO(content))
+            except ET.ParseError as e:
+                raise ValueError(f"Invalid XML: {e}")
+
+    def _iter(self, source):
+        ns = ""
+        names: Dict[str, str] = {}
+        task_tag = None
+        open_tags: Dict[str, int] = {} # Open elements per tag: the task tag may be found inside an open task
+        stack = []
+
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if not stack and elem.tag.startswith("{"):
+                    ns = elem.tag.split("}")[0] + "}"
+                stack.append(elem)
+                open_tags[elem.tag] = open_tags.get(elem.tag, 0) + 1
+                continue
+
+            stack.pop()
+            open_tags[elem.tag] -= 1
+            if not stack:
+                break
+            parent = stack[-1]
+            local = elem.tag.split("}")[-1]
+
+            if task_tag is None and len(elem) and (local == "row" or "task" in local.lower()):
+                task_tag = elem.tag
+            if elem.tag == task_tag:
+                task = _xml_task(elem, ns)
+                parent.remove(elem)
+                elem.clear()
+                if task is not None:
+                    self.count += 1
+                    yield task
+            elif len(stack) == 1:
+                if local in ("Name", "Title") and elem.text and elem.text.strip() and local not in names:
+                    names[local] = elem.text.strip()
+                    self.title = names.get("Name") or names.get("Title")
+                parent.remove(elem)
+            elif task_tag is not None and not open_tags[task_tag]:
+                parent.remove(elem)
+
+
+def _xml_task(te, ns: str) -> Optional[dict]:
+    """Converts one MS Project (or generic) task element; None if it has no name."""
+    name = _xml_text(te, f"{ns}Name", ["Name", "name", "Title", "title", "Task", "task", "Activity", "activity"]) or ""
+    if not name.strip():
+        return None
+
+    uid = _xml_text(te, f"{ns}UID", ["UID", "uid", "ID", "id"]) or ""
+
+    duration_str = _xml_text(te, f"{ns}Duration", ["Duration", "duration", "hours", "EstimatedHours"]) or "0"
+    est = _parse_duration(duration_str)
+
+    start_raw = _xml_text(te, f"{ns}Start", ["Start", "start", "PlannedStart", "Start_Date"])
+    end_raw = _xml_text(te, f"{ns}Finish", ["Finish", "finish", "End", "end", "PlannedFinish", "Finish_Date"])
+
+    milestone_flag = _xml_text(te, f"{ns}Milestone", ["Milestone", "milestone"]) or "0"
+
+    # Hierarchy extraction
+    summary_flag = _xml_text(te, f"{ns}Summary", ["Summary", "summary", "is_summary"]) or "0"
+    outline_level = _xml_text(te, f"{ns}OutlineLevel", ["OutlineLevel", "level"]) or "1"
+    try:
+        outline_level = int(float(outline_level))
+    except:
+        outline_level = 1
+
+    # Extract PredecessorLink elements
+    preds_data = []
+    for pl in te.findall(f"{ns}PredecessorLink") or te.findall("PredecessorLink") or []:
+        pred_uid = _xml_text(pl, f"{ns}PredecessorUID") or _xml_text(pl, "PredecessorUID") or ""
+        if pred_uid:
+            t_val = _xml_text(pl, f"{ns}Type") or _xml_text(pl, "Type") or "1"
+            l_val = _xml_text(pl, f"{ns}LinkLag") or _xml_text(pl, "LinkLag") or "0"
+
+            # 0=FF, 1=FS, 2=SF, 3=SS
+            p_type = "FS"
+            if t_val == "0": p_type = "FF"
+            elif t_val == "1": p_type = "FS"
+            elif t_val == "2": p_type = "SF"
+            elif t_val == "3": p_type = "SS"
+
+            # Lag is often in tenths of minutes
+            lag_hours = 0.0
+            try:
+                lag_hours = float(l_val) / 600.0
+            except:
+                pass
+
+            preds_data.append({
+                "uid": pred_uid,
+                "type": p_type,
+                "lag": lag_hours
+            })
+
+    return {
+        "wbs_code": _xml_text(te, f"{ns}WBS") or _xml_text(te, "WBS") or None,
+        "title": name.strip(),
+        "description": (
+            _xml_text(te, f"{ns}Notes") or _xml_text(te, "Notes")
+            or _xml_text(te, "Description") or _xml_text(te, "description") or ""
+        ),
+        "estimated_hours": est,
+        "priority": _norm_priority(_xml_text(te, f"{ns}Priority") or _xml_text(te, "Priority")),
+        "status": "not_started",
+        "task_type": "milestone" if milestone_flag == "1" else "task",
+        "planned_start": _parse_date(start_raw),
+        "planned_end": _parse_date(end_raw),
+        "dependencies_raw": [],  # For name-based resolution (legacy)
+        "xml_uid": uid,          # For UID-based resolution (preferred)
+        "predecessor_links": preds_data, # List of {uid, type, lag}
+        "is_summary": summary_flag == "1",
+        "outline_level": outline_level,
+    }
+
+
+# ---------- Helpers ----------
+
+def _decode(raw: bytes) -> Optional[str]:
+    """Decodes an uploaded file, trying common encodings in turn. None if all fail."""
+    for encoding in ("utf-8-sig", "utf-8", "gbk", "gb2312", "latin-1"):
+        try:
+            return raw.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return None
+
+
+def _safe_float(val: str) -> float:
+    try:
+        return float(val.replace(",", ""))
+    except (ValueError, AttributeError):
+        return 0.0
+
+
+def _norm_priority(val: Optional[str]) -> str:
+    if not val:
+        return "Medium"
+    v = val.lower().strip()
+    mapping = {
+        "low": "Low", "med": "Medium", "medium": "Medium", "high": "High",
+        "critical": "Critical", "crit": "Critical", "hi": "High", "lo": "Low",
+        "0": "Low", "100": "Low", "200": "Low", "300": "Medium", "500": "Medium",
+        "600": "High", "700": "High", "800": "Critical", "900": "Critical", "1000": "Critical",
+    }
+    return mapping.get(v, "Medium")
+
+
+def _norm_status(val: Optional[str]) -> str:
+    if not val:
+        return "not_started"
+    v = val.lower().strip()
+    mapping = {
+        "not started": "not_started", "not_started": "not_started", "todo": "not_started",
+        "in progress": "in_progress", "in_progress": "in_progress", "active": "in_progress",
+        "completed": "completed", "done": "completed", "complete": "completed",
+        "stalled": "stalled", "cancelled": "cancelled", "void": "cancelled",
+    }
+    return mapping.get(v, "not_started")
+
+
+def _parse_date(val: Optional[str]) -> Optional[datetime]:
+    """Parse a date string into a datetime object. Returns None on failure."""
+    if not val:
+        return None
+    val = val.strip()
+    # Strip timezone offset like +08:00
+    cleaned = re.sub(r'[+-]\d{2}:\d{2}$', '', val)
+    
+    for v in (val, cleaned):
+        for fmt in (
+            "%Y-%m-%dT%H:%M:%S",
+            "%Y-%m-%dT%H:%M:%SZ",
+            "%Y-%m-%dT%H:%M:%S.%f",
+            "%Y-%m-%dT%H:%M:%S.%fZ",
+            "%Y-%m-%d",
+            "%m/%d/%Y",
+            "%d/%m/%Y",
+            "%Y/%m/%d",
+            "%d-%b-%Y",
+            "%d-%b-%y",
+        ):
+            try:
+                return datetime.strptime(v, fmt)
+            except ValueError:
+                continue
+    return None
+
+
+def _parse_duration(val: str) -> float:
+    """Parse ISO 8601 duration or simple hour values."""
+    if not val:
+        return 0.0
+    if val.startswith("PT"):
+        hours = 0.0
+        h = re.search(r"(\d+)H", val)
+        m = re.search(r"(\d+)M", val)
+        if h:
+            hours += float(h.group(1))
+        if m:
+            hours += float(m.group(1)) / 60
+        return hours
+    return _safe_float(val)
+
+
+def _xml_text(el, tag: str, alternatives: Optional[List[str]] = None) -> Optional[str]:
+    """Find a tag or its alternatives and return text, stripped of whitespace."""
+    tags = [tag] + (alternatives or [])
+    for t in tags:
+        child = el.find(t)
+        if child is not None and child.text:
+            return child.text.strip()
+    # Case-insensitive fallback for direct children
+    tag_lower = tag.lower()
+    for child in el:
+        if child.tag.split('}')[-1].lower() == tag_lower:
+            return child.text.strip() if child.text else None
+    return None
@@ -0,0 +1,190 @@
+"""
+Bulk write path for imported schedules.
+
+Tasks are inserted in batches of IMPORT_BATCH_SIZE rows, instead of an ORM add + flush
+round trip per task just to learn its id: each batch reserves its ids in one query
+(reserve_ids) and is written with a single executemany INSERT. Only the id maps and
+the unresolved links are kept between batches, so the parsed task dicts can be
+streamed through. Dependencies are resolved once every task has an id
+(links may point forward) and written as executemany INSERTs; files that list links
+in a table of their own (XER) hand them to add_links() by source id. Imported calendars
+are created first so tasks can reference them. Nothing is committed here: the caller
+commits the whole import once.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Table, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.calendar import WorkCalendar, CalendarException
+from app.models.project import Task, TaskRelationship
+
+# Rows per INSERT statement
+IMPORT_BATCH_SIZE = 1000
+
+# Task column -> (parsed task key, default). Every row carries every column so each
+# batch is a single statement.
+TASK_COLUMNS: Dict[str, Tuple[str, Any]] = {
+    "wbs_code": ("wbs_code", None),
+    "path": ("path", None),
+    "title": ("title", "Untitled"),
+    "description": ("description", ""),
+    "original_duration": ("estimated_hours", 0),
+    "priority": ("priority", "Medium"),
+    "status": ("status", "not_started"),
+    "task_type": ("task_type", "task"),
+    "planned_start": ("planned_start", None),
+    "planned_end": ("planned_end", None),
+    "responsible_party": ("responsible_party", None),
+    "is_summary": ("is_summary", False),
+    "outline_level": ("outline_level", 1),
+    "remaining_duration": ("remaining_duration", 0.0),
+    "actual_start": ("actual_start", None),
+    "actual_end": ("actual_end", None),
+    "percent_complete": ("percent_complete", 0.0),
+    "constraint_type": ("constraint_type", None),
+    "constraint_date": ("constraint_date", None),
+}
+
+
+async def reserve_ids(session: AsyncSession, table: Table, count: int) -> List[int]:
+    """
+    Allocates `count` primary keys of `table` in one query. On PostgreSQL they are drawn
+    from the id sequence; elsewhere they follow the current maximum, which is stable once
+    the transaction holds the database write lock (SQLite: after its first write, e.g.
+    the imported project's row).
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        rows = await session.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+            {"table": table.name, "count": count},
+        )
+        return list(rows.scalars())
+    start = (await session.execute(select(func.coalesce(func.max(table.c.id), 0)))).scalar_one() + 1
+    return list(range(start, start + count))
+
+
+class ImportWriter:
+    def __init__(self, session: AsyncSession, project_id: int, batch_size: int = IMPORT_BATCH_SIZE):
+        self.session = session
+        self.project_id = project_id
+        self.batch_size = batch_size
+        self.pending: List[Dict] = [] # Task rows not yet inserted
+        self.pending_links: List[Tuple[List[Dict], List[str], Optional[str]]] = [] # Per pending row
+        self.by_title: Dict[str, int] = {}
+        self.by_uid: Dict[str, int] = {} # XML / XER source ids
+        self.calendar_ids: Dict[str, int] = {} # Source calendar id -> calendars.id
+        self.links: List[Tuple[int, List[Dict], List[str]]] = [] # (task id, predecessor_links, dependencies_raw)
+        self.task_count = 0
+        self.relationship_count = 0
+
+    def task_row(self, t_data: Dict) -> Dict:
+        row = {column: t_data.get(key, default) for column, (key, default) in TASK_COLUMNS.items()}
+        row["project_id"] = self.project_id
+        row["calendar_id"] = self.calendar_ids.get(t_data.get("calendar_ref"))
+        return row
+
+    async def add_calendars(self, calendars: Iterable[Dict]):
+        """
+        Creates imported calendars ({ref, name, work_week, hours_per_day, exceptions});
+        tasks added afterwards resolve their calendar_ref against them.
+        """
+        created = []
+        for cal in calendars:
+            calendar = WorkCalendar(
+                name=cal["name"], work_week=cal["work_week"], hours_per_day=cal.get("hours_per_day", 8.0),
+                exceptions=[CalendarException(**exc) for exc in cal.get("exceptions", [])],
+            )
+            self.session.add(calendar)
+            created.append((cal["ref"], calendar))
+        if created:
+            await self.session.flush()
+        for ref, calendar in created:
+            self.calendar_ids[ref] = calendar.id
+
+    async def add(self, t_data: Dict):
+        """Queues one parsed task dict; inserts a batch once batch_size are queued."""
+        self.pending.append(self.task_row(t_data))
+        self.pending_links.append((
+            t_data.get("predecessor_links") or [], t_data.get("dependencies_raw") or [], t_data.get("xml_uid"),
+        ))
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Inserts the queued tasks and records their ids."""
+        if not self.pending:
+            return
+        ids = await reserve_ids(self.session, Task.__table__, len(self.pending))
+        for t_id, row, (pred_links, deps_raw, uid) in zip(ids, self.pending, self.pending_links):
+            row["id"] = t_id
+            self.by_title[row["title"]] = t_id
+            if uid:
+                self.by_uid[uid] = t_id
+            if pred_links or deps_raw:
+                self.links.append((t_id, pred_links, deps_raw))
+        await self.session.execute(insert(Task), self.pending)
+        self.task_count += len(self.pending)
+        self.pending = []
+        self.pending_links = []
+
+    def relationship_rows(self) -> Iterable[Dict]:
+        """
+        Resolves the recorded links: predecessor_links by source id when the file had
+        ids, otherwise dependencies_raw by task title (FS, no lag).
+        """
+        for successor_id, pred_links, deps_raw in self.links:
+            if pred_links and self.by_uid:
+                refs = [(self.by_uid.get(link["uid"]), link["type"], link["lag"]) for link in pred_links]
+            elif deps_raw:
+                refs = [(self.by_title.get(dep), "FS", 0) for dep in deps_raw]
+            else:
+                continue
+            for predecessor_id, rel_type, lag in refs:
+                if predecessor_id is not None:
+                    yield {
+                        "project_id": self.project_id, "predecessor_id": predecessor_id,
+                        "successor_id": successor_id, "type": rel_type, "lag": lag,
+                    }
+
+    async def write_relationships(self, rows: Iterable[Dict]):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                await self.session.execute(insert(TaskRelationship), batch)
+                self.relationship_count += len(batch)
+                batch = []
+        if batch:
+            await self.session.execute(insert(TaskRelationship), batch)
+            self.relationship_count += len(batch)
+
+    async def finish(self) -> int:
+        """Inserts the remaining tasks, then all relationships. Returns the task count."""
+        await self.flush()
+        await self.write_relationships(self.relationship_rows())
+        self.links = []
+        return self.task_count
+
+    async def add_links(self, links: Iterable[Tuple[str, str, str, float]]):
+        """
+        Writes (successor uid, predecessor uid, type, lag) links between tasks already
+        added; links to unknown tasks are skipped. Call after finish().
+        """
+        await self.write_relationships(
+            {
+                "project_id": self.project_id, "predecessor_id": self.by_uid[predecessor],
+                "successor_id": self.by_uid[successor], "type": rel_type, "lag": lag,
+            }
+            for successor, predecessor, rel_type, lag in links
+            if successor in self.by_uid and predecessor in self.by_uid
+        )
+
+
+async def write_tasks(session: AsyncSession, project_id: int, tasks: Iterable[Dict],
+                      batch_size: int = IMPORT_BATCH_SIZE) -> ImportWriter:
+    """Bulk-inserts parsed task dicts (and their links) into `project_id`; does not commit."""
+    writer = ImportWriter(session, project_id, batch_size)
+    for t_data in tasks:
+        await writer.add(t_data)
+    await writer.finish()
+    return writer
@@ -0,0 +1,237 @@
+"""
+Monte Carlo schedule risk analysis.
+
+Durations of all tasks are sampled at once as (iterations x tasks) matrices: a three-point
+(triangular) distribution per task, optionally inflated by risk events from the risk
+register. Each batch of iterations runs the vectorized CPM (CompiledNetwork forward and
+backward passes on 2-D arrays); batches are independent and can be spread over a process
+pool. Batch results are mergeable sums, so nothing per-iteration except the finish dates
+leaves a worker.
+
+Like the vectorized backend, the simulation runs in working minutes of the project calendar,
+so projects whose tasks or lags use other calendars are refused.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from app.services.scheduling_engine import SchedulingEngine
+from app.services.cpm_vectorized import (
+    compile_network, constraint_bounds, keys_to_datetimes, shift_keys, _minutes,
+)
+
+# Iterations per forward/backward pass inside a worker (bounds memory at ~10 MB per array)
+CHUNK_ITERATIONS = 256
+# Risk impact is on a 1-5 scale; each point adds this fraction of the affected durations
+RISK_IMPACT_STEP = 0.1
+PERCENTILES = (50, 80, 90)
+
+
+def sample_triangular(rng: np.random.Generator, low: np.ndarray, mode: np.ndarray,
+                      high: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """Inverse-CDF triangular sampling; degenerate ranges (low == high) return the mode."""
+    u = rng.random(size)
+    span = high - low
+    safe = np.where(span > 0, span, 1.0)
+    cut = (mode - low) / safe
+    left = low + np.sqrt(u * safe * (mode - low))
+    right = high - np.sqrt((1.0 - u) * safe * (high - mode))
+    return np.where(span > 0, np.where(u < cut, left, right), mode)
+
+
+def risk_event(risk) -> Optional[Tuple[Optional[int], float, float]]:
+    """(task id or None for project-wide, probability, duration increase) of a Risk row."""
+    status = (risk.status or '').lower()
+    if status == 'closed':
+        return None
+    probability = risk.probability or 0.0
+    if probability > 1:
+        probability /= 5.0 # 1-5 scale
+    if status == 'occurred':
+        probability = 1.0
+    probability = min(max(probability, 0.0), 1.0)
+    increase = (risk.impact or 0.0) * RISK_IMPACT_STEP
+    if probability <= 0 or increase <= 0:
+        return None
+    return risk.task_id, probability, increase
+
+
+def simulate_batch(payload: Dict) -> Dict:
+    """Runs one batch of iterations. Module-level so process pool workers can import it."""
+    network = payload["network"]
+    low, mode, high = payload["low"], payload["mode"], payload["high"]
+    es_floor, lf_ceiling = payload["es_floor"], payload["lf_ceiling"]
+    rng = np.random.default_rng(payload["seed"])
+    n = network.n
+
+    finishes = []
+    critical = np.zeros(n, dtype=np.int64)
+    sum_x = np.zeros(n)
+    sum_xx = np.zeros(n)
+    sum_xy = np.zeros(n)
+    sum_y = sum_yy = 0.0
+
+    remaining = payload["iterations"]
+    while remaining > 0:
+        k = min(CHUNK_ITERATIONS, remaining)
+        remaining -= k
+        sampled = sample_triangular(rng, low, mode, high, (k, n))
+        for index, probability, increase in payload["task_risks"]:
+            hit = rng.random(k) < probability
+            sampled[hit, index] *= 1.0 + increase
+        for probability, increase in payload["project_risks"]:
+            hit = rng.random(k) < probability
+            sampled[hit] *= 1.0 + increase
+        durations = np.rint(sampled).astype(np.int64)
+
+        es, _ = network.forward(durations, np.broadcast_to(es_floor, (k, n)))
+        ef_keys = shift_keys(es * 2 + 1, durations)
+        finish = ef_keys.max(axis=1) if n else np.zeros(k, dtype=np.int64)
+        _, ls = network.backward(durations, es, lf_ceiling, finish)
+        critical += ((ls >> 1) - es <= 0).sum(axis=0)
+
+        x = durations.astype(np.float64)
+        y = (finish >> 1).astype(np.float64)
+        sum_x += x.sum(axis=0)
+        sum_xx += (x * x).sum(axis=0)
+        sum_xy += (x * y[:, None]).sum(axis=0)
+        sum_y += float(y.sum())
+        sum_yy += float((y * y).sum())
+        finishes.append(finish)
+
+    return {
+        "iterations": payload["iterations"],
+        "finishes": np.concatenate(finishes) if finishes else np.zeros(0, dtype=np.int64),
+        "critical": critical,
+        "sum_x": sum_x, "sum_xx": sum_xx, "sum_xy": sum_xy,
+        "sum_y": sum_y, "sum_yy": sum_yy,
+    }
+
+
+class MonteCarloSimulation:
+    """
+    Schedule risk analysis over the engine's loaded network.
+
+    Three-point ranges default to (optimistic_factor, 1, pessimistic_factor) x original
+    duration; task_ranges overrides them per task with (low, most likely, high) hours.
+    Risks linked to a task inflate that task's duration when they occur in an iteration,
+    project-level risks inflate every duration.
+    """
+    def __init__(self, engine: SchedulingEngine, iterations: int = 1000,
+                 optimistic_factor: float = 0.9, pessimistic_factor: float = 1.3,
+                 task_ranges: Optional[Dict[int, Sequence[float]]] = None,
+                 risks: Sequence = (), seed: Optional[int] = None):
+        self.engine = engine
+        self.iterations = iterations
+        self.optimistic_factor = optimistic_factor
+        self.pessimistic_factor = pessimistic_factor
+        self.task_ranges = task_ranges or {}
+        self.risks = risks
+        self.seed = seed
+        self.network = None
+
+    def prepare(self, project_start_date: datetime):
+        """Compiles the network and the per-task distribution parameters."""
+        if not self.engine.uses_single_calendar():
+            raise ValueError("Monte Carlo simulation needs every task and lag on the project calendar")
+        calendar = self.engine.calendar
+        self.tz = project_start_date.tzinfo
+        project_start = calendar.to_offset(calendar.next_working_moment(project_start_date))
+
+        network = compile_network(self.engine.tasks, self.engine.relationships)
+        network.relationships = [] # ORM rows stay in this process
+        self.network = network
+        self.tasks = [self.engine.tasks[int(t_id)] for t_id in network.task_ids]
+        index = {t.id: i for i, t in enumerate(self.tasks)}
+
+        base = np.array([_minutes(t.original_duration) for t in self.tasks], dtype=np.float64)
+        self.base_durations = base.astype(np.int64)
+        self.low = base * self.optimistic_factor
+        self.mode = base.copy()
+        self.high = base * self.pessimistic_factor
+        for t_id, (low, likely, high) in self.task_ranges.items():
+            if t_id in index:
+                i = index[t_id]
+                self.low[i], self.mode[i], self.high[i] = sorted((low * 60, likely * 60, high * 60))
+        self.es_floor, self.lf_ceiling = constraint_bounds(calendar, self.tasks, project_start)
+
+        self.task_risks, self.project_risks = [], []
+        for risk in self.risks:
+            event = risk_event(risk)
+            if event is None:
+                continue
+            task_id, probability, increase = event
+            if task_id is None:
+                self.project_risks.append((probability, increase))
+            elif task_id in index:
+                self.task_risks.append((index[task_id], probability, increase))
+
+    def batches(self, count: int) -> List[Dict]:
+        """Splits the iterations into `count` independently seeded payloads."""
+        count = max(1, min(count, self.iterations))
+        sizes = [self.iterations // count + (i < self.iterations % count) for i in range(count)]
+        seeds = np.random.SeedSequence(self.seed).spawn(count)
+        return [
+            {
+                "network": self.network,
+                "iterations": size,
+                "seed": seed,
+                "low": self.low, "mode": self.mode, "high": self.high,
+                "es_floor": self.es_floor, "lf_ceiling": self.lf_ceiling,
+                "task_risks": self.task_risks, "project_risks": self.project_risks,
+            }
+            for size, seed in zip(sizes, seeds)
+        ]
+
+    def summarize(self, results: List[Dict]) -> Dict:
+        calendar = self.engine.calendar
+        n_iter = sum(r["iterations"] for r in results)
+        finishes = np.concatenate([r["finishes"] for r in results])
+        critical = sum(r["critical"] for r in results)
+        sum_x = sum(r["sum_x"] for r in results)
+        sum_xx = sum(r["sum_xx"] for r in results)
+        sum_xy = sum(r["sum_xy"] for r in results)
+        sum_y = sum(r["sum_y"] for r in results)
+        sum_yy = sum(r["sum_yy"] for r in results)
+
+        # Pearson correlation of each task duration with the project finish
+        cov = n_iter * sum_xy - sum_x * sum_y
+        var = (n_iter * sum_xx - sum_x ** 2) * (n_iter * sum_yy - sum_y ** 2)
+        sensitivity = np.divide(cov, np.sqrt(np.maximum(var, 0)), out=np.zeros_like(cov), where=var > 0)
+
+        es, _ = self.network.forward(self.base_durations, self.es_floor)
+        deterministic = shift_keys(es * 2 + 1, self.base_durations).max() if self.network.n else 0
+        keys = np.array(
+            [deterministic] + [np.percentile(finishes, q, method='higher') for q in PERCENTILES],
+            dtype=np.int64,
+        )
+        dates = keys_to_datetimes(calendar, keys, self.tz)
+
+        return {
+            "iterations": n_iter,
+            "deterministic_finish": dates[0],
+            "deterministic_probability": float((finishes <= deterministic).mean()) if n_iter else None,
+            "finish_percentiles": {f"P{q}": d for q, d in zip(PERCENTILES, dates[1:])},
+            "tasks": sorted(
+                (
+                    {
+                        "task_id": t.id,
+                        "title": t.title,
+                        "criticality_index": float(critical[i]) / n_iter,
+                        "sensitivity": float(sensitivity[i]),
+                    }
+                    for i, t in enumerate(self.tasks)
+                ),
+                key=lambda t: (-t["sensitivity"], -t["criticality_index"], t["task_id"]),
+            ),
+        }
+
+    def run(self, project_start_date: datetime, pool=None, workers: int = 1) -> Dict:
+        """Synchronous run; batches go to `pool` (an Executor) when given."""
+        self.prepare(project_start_date)
+        payloads = self.batches(workers)
+        if pool is None:
+            results = [simulate_batch(p) for p in payloads]
+        else:
+            results = list(pool.map(simulate_batch, payloads))
+        return self.summarize(results)
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from app.models.project import Project, Task, TaskRelationship
+from app.core.compute_pool import run_in_pool
+from app.services.schedule_snapshot import ProjectSnapshot, CPM_FIELDS, load_snapshots, schedule_snapshot
+from app.services.wbs_rollup import rollup_project
+from app.services.schedule_lock import schedule_locks
+
+# Projects in these states are rescheduled by a portfolio run
+ACTIVE_STATUSES = ("planning", "active")
+# Rows per bulk UPDATE statement
+WRITE_BATCH_SIZE = 2000
+
+class PortfolioScheduler:
+    """
+    Batch rescheduling of many projects (e.g. a monthly data-date rollover).
+    Graphs are loaded for all projects in a few column-projected queries, each project
+    is scheduled in a worker process and results are written back with bulk UPDATEs.
+    """
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def active_project_ids(self) -> List[int]:
+        result = await self.session.execute(
+            select(Project.id).where(Project.status.in_(ACTIVE_STATUSES)).order_by(Project.id)
+        )
+        return list(result.scalars().all())
+
+    async def load_snapshots(self, project_ids: Iterable[int]) -> Dict[int, ProjectSnapshot]:
+        return await load_snapshots(self.session, project_ids)
+
+    async def schedule(self, snapshots: Dict[int, ProjectSnapshot], data_date: datetime, pool=None) -> List[Dict]:
+        """Schedules every snapshot, one project per pool task (in-process when pool is None)."""
+        if pool is None:
+            return [schedule_snapshot(s, data_date) for s in snapshots.values()]
+        futures = [run_in_pool(schedule_snapshot, s, data_date, pool=pool) for s in snapshots.values()]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for i, (snapshot, result) in enumerate(zip(snapshots.values(), results)):
+            if isinstance(result, BaseException): # Worker crashed / could not unpickle
+                results[i] = {
+                    "project_id": snapshot.project_id, "tasks": [], "relationships": [],
+                    "error": f"{type(result).__name__}: {result}", "seconds": 0.0,
+                }
+        return results
+
+    async def write_results(self, results: List[Dict], data_date: Optional[datetime] = None):
+        """
+        Bulk UPDATE by primary key of CPM fields and driving flags of successful runs,
+        then rolls each of those projects up to its WBS summaries and records data_date.
+        """
+        task_rows = []
+        rel_rows = []
+        for result in results:
+            if result["error"]:
+                continue
+            task_rows.extend(dict(zip(('id',) + CPM_FIELDS, row)) for row in result["tasks"])
+            rel_rows.extend({"id": rel_id, "is_driving": driving} for rel_id, driving in result["relationships"])
+        for start in range(0, len(task_rows), WRITE_BATCH_SIZE):
+            await self.session.execute(update(Task), task_rows[start:start + WRITE_BATCH_SIZE])
+        for start in range(0, len(rel_rows), WRITE_BATCH_SIZE):
+            await self.session.execute(update(TaskRelationship), rel_rows[start:start + WRITE_BATCH_SIZE])
+        scheduled = [result["project_id"] for result in results if not result["error"]]
+        for project_id in scheduled:
+            await rollup_project(self.session, project_id)
+        if data_date is not None and scheduled:
+            await self.session.execute(update(Project).where(Project.id.in_(scheduled)).values(data_date=data_date))
+
+    async def reschedule(self, data_date: datetime, project_ids: Optional[Iterable[int]] = None, pool=None) -> Dict:
+        """Loads, schedules and writes back the given (default: all active) projects."""
+        started = time.perf_counter()
+        if project_ids is None:
+            project_ids = await self.active_project_ids()
+        project_ids = list(project_ids)
+        # No other CPM run may touch these projects between our load and commit
+        async with schedule_locks.hold(self.session, project_ids):
+            snapshots = await self.load_snapshots(project_ids)
+            loaded = time.perf_counter()
+
+            results = await self.schedule(snapshots, data_date, pool)
+            computed = time.perf_counter()
+
+            await self.write_results(results, data_date)
+            await self.session.commit()
+        finished = time.perf_counter()
+
+        return {
+            "data_date": data_date,
+            "succeeded": sum(1 for r in results if not r["error"]),
+            "failed": sum(1 for r in results if r["error"]),
+            "timings": {
+                "load_seconds": loaded - started,
+                "schedule_seconds": computed - loaded,
+                "write_seconds": finished - computed,
+                "total_seconds": finished - started,
+            },
+            "projects": [
+                {
+                    "project_id": r["project_id"],
+                    "status": "failed" if r["error"] else "ok",
+                    "tasks": len(snapshots[r["project_id"]].tasks),
+                    "seconds": r["seconds"],
+                    "error": r["error"],
+                    **({"cycles": r["cycles"]} if r.get("cycles") else {}),
+                }
+                for r in results
+            ],
+        }
@@ -0,0 +1,325 @@
+"""
+Priority-based resource leveling (serial schedule generation scheme).
+
+Runs after SchedulingEngine.calculate_dates (or calculate_progress_dates). Activities
+become eligible once all their predecessors are placed; the eligible set is a heap ordered
+by (priority, total float, id) and each popped activity is placed at the earliest time that
+satisfies its (leveled) predecessors and fits every resource it uses under that resource's
+capacity. Progress is respected: completed activities stay at their actual dates and book
+their load as is; in-progress ones keep their actual start and level their remaining work
+from the data date.
+
+Time is measured in working minutes of the project calendar, so every task and lag must
+run on it; resource usage is kept as a histogram of fixed working-time buckets (one hour
+by default), an activity occupying every bucket it touches. level_engine() runs large
+networks in the process pool, like schedule_executor.calculate() does for CPM.
+"""
+import heapq
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.compute_pool import run_in_pool
+from app.models.project import Task
+from app.services.scheduling_engine import SchedulingEngine, SAVE_BATCH_SIZE
+from app.services.schedule_executor import OFFLOAD_MIN_TASKS
+from app.services.schedule_snapshot import ProjectSnapshot
+
+# Task id -> (priority, resource_ids), for task records that do not carry them
+Assignments = Dict[int, Tuple[Optional[str], Optional[List]]]
+
+PRIORITY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+_DEFAULT_RANK = 2
+
+
+def _minutes(hours) -> int:
+    return int((hours or 0.0) * 60)
+
+
+def resource_demands(task) -> Dict[int, float]:
+    """Units per resource for a task. resource_ids holds ids or {"id": .., "units": ..} entries."""
+    return parse_demands(task.resource_ids)
+
+
+def parse_demands(resource_ids: Optional[List]) -> Dict[int, float]:
+    demands: Dict[int, float] = {}
+    for entry in resource_ids or []:
+        units = 1.0
+        if isinstance(entry, dict):
+            units = float(entry.get('units', 1.0))
+            entry = entry.get('id')
+        try:
+            resource_id = int(entry)
+        except (TypeError, ValueError):
+            continue
+        demands[resource_id] = demands.get(resource_id, 0.0) + units
+    return demands
+
+
+class ResourceProfile:
+    """Usage histogram of one resource in fixed working-time buckets."""
+    def __init__(self, capacity: float, size: int = 1024):
+        self.capacity = capacity
+        self.usage = np.zeros(size)
+
+    def _ensure(self, size: int):
+        if size > self.usage.size:
+            grown = np.zeros(max(size, self.usage.size * 2))
+            grown[:self.usage.size] = self.usage
+            self.usage = grown
+
+    def last_conflict(self, first: int, last: int, units: float) -> Optional[int]:
+        """Last bucket in [first, last) that cannot take `units` more, or None if all fit."""
+        self._ensure(last)
+        over = np.flatnonzero(self.usage[first:last] + units > self.capacity + 1e-9)
+        return first + int(over[-1]) if over.size else None
+
+    def book(self, first: int, last: int, units: float):
+        self._ensure(last)
+        self.usage[first:last] += units
+
+    def peak(self) -> float:
+        return float(self.usage.max()) if self.usage.size else 0.0
+
+
+class ResourceLeveler:
+    """
+    Levels the engine's tasks against per-resource capacities.
+    Resources without a capacity (and no default_capacity) are unconstrained.
+    Results are written to planned_start / planned_end; CPM early/late dates are kept.
+    assignments: priority and resource_ids per task when the engine holds plain nodes.
+    data_date / progress_mode: as given to calculate_progress_dates; required once any
+    task has actuals.
+    """
+    def __init__(self, engine: SchedulingEngine, capacities: Dict[int, float],
+                 default_capacity: Optional[float] = None, bucket_minutes: int = 60,
+                 assignments: Optional[Assignments] = None, data_date: Optional[datetime] = None,
+                 progress_mode: Optional[str] = None):
+        self.engine = engine
+        self.calendar = engine.calendar
+        self.capacities = {int(k): float(v) for k, v in capacities.items()}
+        self.default_capacity = default_capacity
+        self.bucket_minutes = bucket_minutes
+        self.assignments = assignments
+        self.data_date = data_date
+        self.progress_mode = progress_mode or "retained_logic"
+        self.profiles: Dict[int, ResourceProfile] = {}
+
+    def capacity(self, resource_id: int) -> Optional[float]:
+        return self.capacities.get(resource_id, self.default_capacity)
+
+    def assignment(self, task) -> Tuple[Optional[str], Optional[List]]:
+        if self.assignments is not None:
+            return self.assignments.get(task.id, (None, None))
+        return task.priority, task.resource_ids
+
+    def priority_key(self, task):
+        rank = PRIORITY_RANK.get((self.assignment(task)[0] or '').lower(), _DEFAULT_RANK)
+        return (rank, task.total_float or 0.0, task.id)
+
+    def level(self) -> Dict:
+        tasks = self.engine.tasks
+        if not tasks:
+            return {"tasks": {}, "project_finish": None, "delayed_tasks": 0, "overallocated": [], "peak_usage": {}}
+        if any(t.early_start is None for t in tasks.values()):
+            raise ValueError("Schedule has not been calculated")
+        if not self.engine.uses_single_calendar():
+            raise ValueError("Resource leveling needs every task and lag on the project calendar")
+        progress = self.engine.has_progress()
+        if progress and self.data_date is None:
+            raise ValueError("Leveling a project with actuals needs its data date")
+
+        calendar = self.calendar
+        tz = next(iter(tasks.values())).early_start.tzinfo
+        es_floor = {t_id: calendar.to_offset(t.early_start) for t_id, t in tasks.items()}
+        demands = {t_id: parse_demands(self.assignment(t)[1]) for t_id, t in tasks.items()}
+        origin = min(es_floor.values())
+        step = self.bucket_minutes
+
+        # Work still to place per task (minutes); done / started tasks are pinned below
+        durations = {t_id: _minutes(t.original_duration) for t_id, t in tasks.items()}
+        done: Dict[int, Tuple[int, int]] = {} # Completed: actual (start, finish)
+        started: Dict[int, int] = {} # In progress: actual start
+        if progress:
+            data_date = calendar.next_working_moment(self.data_date)
+            data = calendar.to_offset(data_date)
+            for t_id, t in tasks.items():
+                if t.actual_end is not None:
+                    done[t_id] = (calendar.to_offset(t.actual_start or t.actual_end), calendar.to_offset(t.actual_end))
+                    durations[t_id] = 0
+                elif t.actual_start is not None:
+                    started[t_id] = calendar.to_offset(t.actual_start)
+                    durations[t_id] = _minutes(self.engine.remaining_hours(t, data_date))
+                    es_floor[t_id] = max(data, started[t_id])
+
+        remaining = {t_id: 0 for t_id in tasks}
+        for rel in self.engine.relationships:
+            if rel.predecessor_id in tasks and rel.successor_id in tasks:
+                remaining[rel.successor_id] += 1
+        heap = [(self.priority_key(t), t_id) for t_id, t in tasks.items() if remaining[t_id] == 0]
+        heapq.heapify(heap)
+
+        begin: Dict[int, int] = {} # Leveled (or actual) start
+        start: Dict[int, int] = {} # Start of the work placed by the leveler
+        overallocated = set()
+        while heap:
+            _, t_id = heapq.heappop(heap)
+            if t_id in done:
+                # Nothing left to place: successors follow the actual finish
+                begin[t_id], start[t_id] = done[t_id]
+                self._book(begin[t_id], start[t_id], demands[t_id], origin, step)
+            else:
+                duration = durations[t_id]
+                earliest = es_floor[t_id]
+                logic = t_id not in started or self.progress_mode == "retained_logic"
+                for rel in self.engine.preds.get(t_id, []) if logic else []:
+                    p_id = rel.predecessor_id
+                    if p_id not in start:
+                        continue
+                    lag = _minutes(rel.lag)
+                    if rel.type == 'FS':
+                        bound = start[p_id] + durations[p_id] + lag
+                    elif rel.type == 'SS':
+                        bound = begin[p_id] + lag
+                    elif rel.type == 'FF':
+                        bound = start[p_id] + durations[p_id] + lag - duration
+                    elif rel.type == 'SF':
+                        bound = begin[p_id] + lag - duration
+                    else:
+                        continue
+                    earliest = max(earliest, bound)
+
+                if t_id in started:
+                    self._book(started[t_id], es_floor[t_id], demands[t_id], origin, step) # Work done so far
+                start[t_id] = self._place(t_id, earliest, duration, demands[t_id], origin, step, overallocated)
+                begin[t_id] = started.get(t_id, start[t_id])
+            for rel in self.engine.succs.get(t_id, []):
+                s_id = rel.successor_id
+                if s_id in remaining:
+                    remaining[s_id] -= 1
+                    if remaining[s_id] == 0:
+                        heapq.heappush(heap, (self.priority_key(tasks[s_id]), s_id))
+
+        results = {}
+        delayed = 0
+        for t_id, task in tasks.items():
+            finish = start[t_id] + durations[t_id]
+            if t_id in done:
+                task.planned_start, task.planned_end = task.actual_start or task.actual_end, task.actual_end
+                delay = 0.0
+            else:
+                if t_id in started:
+                    task.planned_start = task.actual_start
+                else:
+                    task.planned_start = calendar.from_offset(start[t_id], tz, at_start=True)
+                task.planned_end = calendar.from_offset(finish, tz, at_start=finish == begin[t_id])
+                delay = (finish - calendar.to_offset(task.early_finish)) / 60.0
+            delayed += delay > 0
+            results[t_id] = {"start": task.planned_start, "finish": task.planned_end, "delay_hours": delay}
+
+        finish_offset = max(start[t_id] + durations[t_id] for t_id in tasks)
+        return {
+            "tasks": results,
+            "project_finish": calendar.from_offset(finish_offset, tz, at_start=False),
+            "delayed_tasks": delayed,
+            "overallocated": sorted(overallocated),
+            "peak_usage": {r: p.peak() for r, p in sorted(self.profiles.items())},
+        }
+
+    def _place(self, t_id: int, earliest: int, duration: int, demands: Dict[int, float],
+               origin: int, step: int, overallocated: set) -> int:
+        """Earliest start >= `earliest` at which every demanded resource has room, then books it."""
+        constrained = []
+        for resource_id, units in demands.items():
+            capacity = self.capacity(resource_id)
+            if capacity is None:
+                continue
+            if resource_id not in self.profiles:
+                self.profiles[resource_id] = ResourceProfile(capacity)
+            if units > capacity:
+                # Can never fit; place it by logic alone and report it
+                overallocated.add(t_id)
+                continue
+            constrained.append((self.profiles[resource_id], units))
+
+        if duration <= 0 or not constrained:
+            return earliest
+
+        t = earliest
+        while True:
+            first, last = self._buckets(t, duration, origin, step)
+            conflict = None
+            for profile, units in constrained:
+                c = profile.last_conflict(first, last, units)
+                if c is not None and (conflict is None or c > conflict):
+                    conflict = c
+            if conflict is None:
+                break
+            # Restart right after the last blocking bucket
+            t = origin + (conflict + 1) * step
+
+        for profile, units in constrained:
+            profile.book(first, last, units)
+        return t
+
+    def _book(self, first: int, last: int, demands: Dict[int, float], origin: int, step: int):
+        """Books fixed (actual) work on the constrained resources, whatever their load."""
+        if last <= first:
+            return
+        first, last = self._buckets(first, last - first, origin, step)
+        for resource_id, units in demands.items():
+            capacity = self.capacity(resource_id)
+            if capacity is None:
+                continue
+            if resource_id not in self.profiles:
+                self.profiles[resource_id] = ResourceProfile(capacity)
+            self.profiles[resource_id].book(first, last, units)
+
+    @staticmethod
+    def _buckets(start: int, duration: int, origin: int, step: int):
+        first = (start - origin) // step
+        last = math.ceil((start + duration - origin) / step)
+        return first, last
+
+
+def level_snapshot(snapshot: ProjectSnapshot, assignments: Assignments, capacities: Dict[int, float],
+                   default_capacity: Optional[float], bucket_minutes: int, data_date: Optional[datetime] = None,
+                   progress_mode: Optional[str] = None) -> Dict:
+    """Process pool entry point: levels a snapshot whose CPM dates are already computed."""
+    leveler = ResourceLeveler(snapshot.engine(), capacities, default_capacity, bucket_minutes, assignments,
+                              data_date, progress_mode)
+    return leveler.level()
+
+
+async def level_engine(engine: SchedulingEngine, assignments: Assignments, capacities: Dict[int, float],
+                       default_capacity: Optional[float] = None, bucket_minutes: int = 60,
+                       data_date: Optional[datetime] = None, progress_mode: Optional[str] = None, pool=None) -> Dict:
+    """
+    ResourceLeveler.level() without blocking the event loop. `engine` holds plain node
+    records (load_engine) with CPM dates; networks of OFFLOAD_MIN_TASKS tasks or more are
+    leveled in `pool` (default: the shared pool) and the planned dates copied back.
+    """
+    if len(engine.tasks) < OFFLOAD_MIN_TASKS:
+        return ResourceLeveler(engine, capacities, default_capacity, bucket_minutes, assignments,
+                               data_date, progress_mode).level()
+    result = await run_in_pool(
+        level_snapshot, ProjectSnapshot.from_engine(engine), assignments, capacities, default_capacity,
+        bucket_minutes, data_date, progress_mode, pool=pool,
+    )
+    for t_id, values in result["tasks"].items():
+        task = engine.tasks[t_id]
+        task.planned_start, task.planned_end = values["start"], values["finish"]
+    return result
+
+
+async def save_leveled_dates(session: AsyncSession, engine: SchedulingEngine):
+    """Writes planned_start / planned_end of the engine's tasks as bulk UPDATEs by primary key."""
+    rows = [
+        {"id": t_id, "planned_start": t.planned_start, "planned_end": t.planned_end}
+        for t_id, t in engine.tasks.items()
+    ]
+    for start in range(0, len(rows), SAVE_BATCH_SIZE):
+        await session.execute(update(Task), rows[start:start + SAVE_BATCH_SIZE])
@@ -0,0 +1,131 @@
+"""
+Content-addressed cache of CPM results.
+
+The key is a SHA-256 digest of everything calculate_dates reads: task durations,
+constraints and calendars, relationships (type, lag, lag calendar), the calendars' work
+patterns and the normalized data date. Any input change produces a new key, so entries
+never need explicit invalidation; stale ones simply age out of the LRU.
+
+Entries hold the CPM fields per task and the driving flag per relationship, in the
+canonical (sorted) order used for hashing, so a hit can be written back onto freshly
+loaded ORM rows or snapshot nodes. Counters are per process.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.schedule_snapshot import CPM_FIELDS
+
+
+def canonical_relationships(engine) -> List:
+    """The engine's in-network relationships in a load-order independent order."""
+    return sorted(
+        (r for r in engine.relationships if r.predecessor_id in engine.tasks and r.successor_id in engine.tasks),
+        key=lambda r: (r.predecessor_id, r.successor_id, r.id if r.id is not None else -1, r.type or '', r.lag or 0.0),
+    )
+
+
+def schedule_inputs(engine, project_start_date: datetime) -> Tuple[str, List[int], List]:
+    """(key, task ids, relationships) of the engine's network; ids / relationships in canonical order."""
+    digest = hashlib.sha256()
+    start = engine.calendar.next_working_moment(project_start_date)
+    digest.update(repr((start.isoformat(), engine.calendar.fingerprint())).encode())
+
+    task_ids = sorted(engine.tasks)
+    for t_id in task_ids:
+        task = engine.tasks[t_id]
+        constraint_date = task.constraint_date.isoformat() if task.constraint_date else None
+        digest.update(repr((
+            t_id, task.original_duration, task.constraint_type, constraint_date,
+            engine.task_calendar(task).fingerprint(),
+        )).encode())
+
+    rels = canonical_relationships(engine)
+    for rel in rels:
+        digest.update(repr((
+            'rel', rel.id, rel.predecessor_id, rel.successor_id, rel.type, rel.lag,
+            engine.lag_calendar(rel).fingerprint(),
+        )).encode())
+    return digest.hexdigest(), task_ids, rels
+
+
+class ScheduleCache:
+    """Thread-safe LRU of CPM results bounded by an estimate of their memory footprint."""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Tuple[Tuple, Tuple, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Tuple, Tuple]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: str, task_rows: Tuple, driving: Tuple):
+        size = sys.getsizeof(task_rows) + sys.getsizeof(driving) + sys.getsizeof(key)
+        for row in task_rows:
+            size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[2]
+            self.entries[key] = (task_rows, driving, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+            }
+
+    def load(self, engine, project_start_date: datetime) -> Optional[str]:
+        """
+        Applies cached results to the engine's tasks / relationships. Returns None on a hit,
+        otherwise the key to store() under once the results are computed.
+        """
+        key, task_ids, rels = schedule_inputs(engine, project_start_date)
+        cached = self.get(key)
+        if cached is None:
+            return key
+        task_rows, driving = cached
+        for t_id, row in zip(task_ids, task_rows):
+            task = engine.tasks[t_id]
+            for field, value in zip(CPM_FIELDS, row):
+                setattr(task, field, value)
+        for rel, is_driving in zip(rels, driving):
+            rel.is_driving = is_driving
+        return None
+
+    def store(self, key: str, engine):
+        task_rows = tuple(
+            tuple(getattr(engine.tasks[t_id], f) for f in CPM_FIELDS) for t_id in sorted(engine.tasks)
+        )
+        driving = tuple(bool(r.is_driving) for r in canonical_relationships(engine))
+        self.put(key, task_rows, driving)
+
+
+schedule_cache = ScheduleCache(settings.SCHEDULE_CACHE_MB * 1024 * 1024)
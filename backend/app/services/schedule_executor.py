@@ -0,0 +1,69 @@
+"""
+Runs CPM off the event loop.
+
+A schedule computation is synchronous and CPU-bound; run inside a request handler it
+stalls every other request served by the worker. Networks of OFFLOAD_MIN_TASKS tasks or
+more are shipped as a plain-data snapshot to the shared process pool and the results are
+applied back onto the caller's engine, which then saves them as usual. Smaller networks
+are computed inline, where the pickling round trip would cost more than the run itself.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from app.core.compute_pool import run_in_pool
+from app.services.scheduling_engine import SchedulingEngine, ScheduleCycleError, CPM_FIELDS, PROGRESS_MODES
+from app.services.schedule_snapshot import ProjectSnapshot, compute_schedule, schedule_snapshot
+
+# Networks at or above this size are scheduled in the process pool
+OFFLOAD_MIN_TASKS = 2000
+
+
+def apply_result(engine: SchedulingEngine, result: Dict) -> Set[int]:
+    """Copies a schedule_snapshot() result onto the engine's nodes; raises its error."""
+    if result["error"]:
+        if "cycles" in result:
+            raise ScheduleCycleError(result["error"], result["cycles"])
+        raise RuntimeError(result["error"])
+    for row in result["tasks"]:
+        task = engine.tasks.get(row[0])
+        if task is not None:
+            for field, value in zip(CPM_FIELDS, row[1:]):
+                setattr(task, field, value)
+    driving = dict(result["relationships"])
+    for rel in engine.relationships:
+        if rel.id in driving:
+            rel.is_driving = driving[rel.id]
+    return set(result["updated"])
+
+
+async def calculate(engine: SchedulingEngine, data_date: datetime, progress_mode: Optional[str] = None,
+                    changed_ids: Optional[Iterable[int]] = None, cache=None, pool=None) -> Set[int]:
+    """
+    compute_schedule() without blocking the event loop. `engine` must hold plain node
+    records (load_engine); large networks run in `pool` (default: the shared pool).
+    cache: a ScheduleCache consulted for full, progress-free runs.
+    Returns the ids of tasks whose results may have changed.
+    """
+    if progress_mode is not None and progress_mode not in PROGRESS_MODES:
+        raise ValueError(f"Unknown progress mode '{progress_mode}' (expected one of {', '.join(PROGRESS_MODES)})")
+    if not engine.tasks:
+        return set()
+
+    key = None
+    if cache is not None and changed_ids is None and progress_mode is None and not engine.has_progress():
+        key = cache.load(engine, data_date)
+        if key is None: # Hit: results already applied
+            return set(engine.tasks)
+
+    if changed_ids is not None:
+        changed_ids = set(changed_ids)
+    if len(engine.tasks) < OFFLOAD_MIN_TASKS:
+        updated = compute_schedule(engine, data_date, progress_mode=progress_mode, changed_ids=changed_ids)
+    else:
+        snapshot = ProjectSnapshot.from_engine(engine)
+        result = await run_in_pool(schedule_snapshot, snapshot, data_date, "auto", progress_mode, changed_ids, pool=pool)
+        updated = apply_result(engine, result)
+
+    if key is not None:
+        cache.store(key, engine)
+    return updated
@@ -0,0 +1,98 @@
+"""
+Per-project scheduling mutex and single-flight runs.
+
+A CPM run loads, recomputes and rewrites every task of a project, so two runs on the same
+project must not overlap (the later commit would silently win). hold() serializes them
+with an asyncio.Lock per project inside this process and, on PostgreSQL, a
+transaction-scoped advisory lock across API processes (released by the run's commit or
+rollback). On SQLite there is nothing to share between processes: the in-process lock is
+the whole mutex, and SQLite's own write lock serializes commits.
+
+single_flight() lets callers asking for an identical run while one is in progress wait
+for it and share its result instead of starting their own.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# First key of the two-key pg_advisory_xact_lock(int, int) form ("CPM"); the project id is the second
+ADVISORY_LOCK_NAMESPACE = 0x43504D
+
+
+async def advisory_lock(session: AsyncSession, project_ids: Iterable[int]):
+    """Takes transaction-scoped Postgres advisory locks (ascending ids); no-op on other databases."""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    for project_id in sorted(set(project_ids)):
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :project_id)"),
+            {"namespace": ADVISORY_LOCK_NAMESPACE, "project_id": project_id},
+        )
+
+
+class ScheduleLocks:
+    def __init__(self):
+        self.locks: Dict[int, asyncio.Lock] = {}
+        self.inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def locked(self, project_id: int) -> bool:
+        lock = self.locks.get(project_id)
+        return lock is not None and lock.locked()
+
+    @asynccontextmanager
+    async def hold(self, session: AsyncSession, project_ids: Iterable[int]):
+        """
+        Exclusive scheduling access to `project_ids` for the body, which should end with
+        session.commit() (the advisory locks live until the transaction ends). Locks are
+        taken in ascending id order so multi-project holders cannot deadlock.
+        """
+        ids = sorted(set(project_ids))
+        acquired = []
+        try:
+            for project_id in ids:
+                lock = self.locks.setdefault(project_id, asyncio.Lock())
+                await lock.acquire()
+                acquired.append(lock)
+            await advisory_lock(session, ids)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    async def single_flight(self, key: Hashable, run: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Awaits `run()` unless a call with the same key is already running, in which case
+        its result (or exception) is shared. If that call is cancelled, a waiter runs instead.
+        """
+        while True:
+            shared = self.inflight.get(key)
+            if shared is None:
+                break
+            try:
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise # This caller was cancelled
+                # The running call was cancelled (e.g. its client went away): take over
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result = await run()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception() # Retrieved here; waiters re-raise it
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.inflight[key]
+
+
+schedule_locks = ScheduleLocks()
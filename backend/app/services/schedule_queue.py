@@ -0,0 +1,203 @@
+"""
+Debounced per-project reschedule queue.
+
+Task edits request a reschedule instead of running CPM inside the request. Requests for a
+project that arrive within SCHEDULE_DEBOUNCE_MS of each other coalesce into one run (never
+held back more than SCHEDULE_MAX_DELAY_MS), their changed task ids are merged, and at most
+one run per project is in flight. Every request bumps the project's schedule revision;
+clients poll status() (or long-poll wait()) until completed_revision reaches theirs.
+State lives in the API process: pending requests are lost on restart, the next edit or an
+explicit POST /schedule catches up.
+"""
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.project import Task
+from app.services.scheduling_engine import SAVE_BATCH_SIZE
+from app.services.schedule_executor import calculate
+from app.services.schedule_snapshot import load_engine, load_data_date
+from app.services.schedule_lock import schedule_locks
+from app.services.wbs_rollup import rollup_project
+
+Runner = Callable[[int, Optional[Set[int]]], Awaitable[None]]
+
+
+async def reschedule_project(session: AsyncSession, project_id: int, changed_ids: Optional[Iterable[int]] = None) -> Set[int]:
+    """
+    Incremental CPM after task edits (a full run when changed_ids is None), anchored on the
+    earliest planned start and computed off the event loop for large networks. Projects
+    with actuals are rescheduled progress-aware from the data date of their last schedule
+    run instead. Calculated dates are copied to planned_start / planned_end (the Gantt
+    draws those) and WBS summaries are rolled up. Returns the moved task ids.
+    """
+    engine = await load_engine(session, project_id)
+    if engine is None or not engine.tasks:
+        return set()
+
+    if engine.has_progress():
+        # Without a recorded data date, the latest reported progress is the earliest possible one
+        project_start = await load_data_date(session, project_id) or max(
+            d for t in engine.tasks.values() for d in (t.actual_start, t.actual_end) if d is not None
+        )
+    else:
+        # Anchor on the earliest existing task so edits don't reset everything to "now"
+        result = await session.execute(select(func.min(Task.planned_start)).where(Task.project_id == project_id))
+        project_start = result.scalar() or datetime.now()
+
+    # Only the downstream / upstream cone of the edits is recomputed
+    updated_ids = await calculate(engine, project_start, changed_ids=changed_ids)
+    if changed_ids is not None:
+        updated_ids |= {t_id for t_id in changed_ids if t_id in engine.tasks}
+
+    await engine.save_dates()
+    rows = [
+        {"id": t_id, "planned_start": engine.tasks[t_id].early_start, "planned_end": engine.tasks[t_id].early_finish}
+        for t_id in sorted(updated_ids)
+        if engine.tasks[t_id].early_start and engine.tasks[t_id].early_finish
+    ]
+    for start in range(0, len(rows), SAVE_BATCH_SIZE):
+        await session.execute(update(Task), rows[start:start + SAVE_BATCH_SIZE])
+    await rollup_project(session, project_id, updated_ids)
+    await session.commit()
+    return updated_ids
+
+
+async def run_reschedule(project_id: int, changed_ids: Optional[Set[int]]):
+    """Default queue runner: reschedule_project in its own session, under the project's scheduling lock."""
+    async with AsyncSessionLocal() as session:
+        async with schedule_locks.hold(session, [project_id]):
+            await reschedule_project(session, project_id, changed_ids)
+
+
+class ProjectQueueState:
+    __slots__ = ('revision', 'taken_revision', 'completed_revision', 'changed_ids', 'first_request',
+                 'last_request', 'worker', 'running', 'error', 'done')
+
+    def __init__(self):
+        self.revision = 0 # Latest requested
+        self.taken_revision = 0 # Latest handed to a run; later ones form the pending batch
+        self.completed_revision = 0 # Latest covered by a finished run (successful or not)
+        self.changed_ids: Optional[Set[int]] = set() # None = full run
+        self.first_request = 0.0 # Loop time of the oldest pending request
+        self.last_request = 0.0
+        self.worker: Optional[asyncio.Task] = None
+        self.running = False
+        self.error: Optional[str] = None
+        self.done = asyncio.Event() # Set after every run; waiters re-check their revision
+
+
+class ScheduleQueue:
+    def __init__(self, runner: Runner = run_reschedule, debounce: Optional[float] = None,
+                 max_delay: Optional[float] = None):
+        self.runner = runner
+        self.debounce = settings.SCHEDULE_DEBOUNCE_MS / 1000.0 if debounce is None else debounce
+        self.max_delay = settings.SCHEDULE_MAX_DELAY_MS / 1000.0 if max_delay is None else max_delay
+        self.projects: Dict[int, ProjectQueueState] = {}
+        self.requests = 0
+        self.runs = 0
+        self.failures = 0
+
+    def request(self, project_id: int, changed_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Queues a reschedule of `project_id` from `changed_ids` (None: full run) and returns
+        the revision that will include it. Never blocks.
+        """
+        state = self.projects.get(project_id)
+        if state is None:
+            state = self.projects[project_id] = ProjectQueueState()
+        now = asyncio.get_running_loop().time()
+        if state.revision == state.taken_revision: # First request of a new batch
+            state.first_request = now
+        if changed_ids is None or state.changed_ids is None:
+            state.changed_ids = None
+        else:
+            state.changed_ids.update(changed_ids)
+        state.last_request = now
+        state.revision += 1
+        self.requests += 1
+        if state.worker is None or state.worker.done():
+            state.worker = asyncio.create_task(self.drain(project_id, state))
+        return state.revision
+
+    async def drain(self, project_id: int, state: ProjectQueueState):
+        """Runs the project's pending requests, one coalesced run at a time."""
+        loop = asyncio.get_running_loop()
+        while state.revision > state.completed_revision:
+            # Trailing debounce, bounded by max_delay from the first pending request
+            while True:
+                wake = min(state.last_request + self.debounce, state.first_request + self.max_delay)
+                if loop.time() >= wake:
+                    break
+                await asyncio.sleep(wake - loop.time())
+
+            revision = state.taken_revision = state.revision
+            changed_ids = state.changed_ids
+            state.changed_ids = set() # Requests arriving during the run start the next batch
+            state.running = True
+            try:
+                await self.runner(project_id, changed_ids)
+                state.error = None
+            except Exception as e:
+                self.failures += 1
+                state.error = f"{type(e).__name__}: {e}"
+                print(f"Warning: Reschedule of project {project_id} failed: {state.error}")
+            finally:
+                state.running = False
+            self.runs += 1
+            state.completed_revision = revision
+            state.done.set()
+            state.done = asyncio.Event()
+
+    def status(self, project_id: int) -> Dict:
+        state = self.projects.get(project_id)
+        if state is None:
+            return {"project_id": project_id, "revision": 0, "completed_revision": 0, "state": "idle", "error": None}
+        if state.running:
+            current = "running"
+        elif state.revision > state.completed_revision:
+            current = "pending"
+        else:
+            current = "idle"
+        return {
+            "project_id": project_id,
+            "revision": state.revision,
+            "completed_revision": state.completed_revision,
+            "state": current,
+            "error": state.error,
+        }
+
+    async def wait(self, project_id: int, revision: int, timeout: float) -> Dict:
+        """Waits (up to timeout seconds) until `revision` is completed; returns status()."""
+        state = self.projects.get(project_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while state is not None and state.completed_revision < min(revision, state.revision):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(state.done.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return self.status(project_id)
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "runs": self.runs,
+            "failures": self.failures,
+            "pending": sum(1 for s in self.projects.values() if s.revision > s.completed_revision),
+        }
+
+    def shutdown(self):
+        for state in self.projects.values():
+            if state.worker is not None and not state.worker.done():
+                state.worker.cancel()
+
+
+schedule_queue = ScheduleQueue()
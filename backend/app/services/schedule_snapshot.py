@@ -0,0 +1,251 @@
+"""
+Plain-data schedule snapshots.
+
+A snapshot carries only what CPM reads (durations, constraints, links, compiled calendars)
+in __slots__ records, so it pickles cheaply and can be scheduled in a worker process
+without ORM state or a database session. schedule_snapshot() is the worker entry point.
+"""
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from app.models.project import Project, Task, TaskRelationship
+from app.services.calendar_service import CalendarService
+from app.services.scheduling_engine import (
+    SchedulingEngine, ScheduleCycleError, CPM_FIELDS, PROGRESS_FIELDS, trace_driving_path,
+)
+from app.services.work_calendar import ProjectCalendar
+
+
+class TaskNode:
+    __slots__ = ('id', 'original_duration', 'constraint_type', 'constraint_date', 'calendar_id') + \
+        PROGRESS_FIELDS + CPM_FIELDS + ('planned_start', 'planned_end') # Planned: set by resource leveling
+
+    def __init__(self, id: int, original_duration: Optional[float] = None, constraint_type: Optional[str] = None,
+                 constraint_date: Optional[datetime] = None, calendar_id: Optional[int] = None,
+                 actual_start: Optional[datetime] = None, actual_end: Optional[datetime] = None,
+                 remaining_duration: Optional[float] = None):
+        self.id = id
+        self.original_duration = original_duration
+        self.constraint_type = constraint_type
+        self.constraint_date = constraint_date
+        self.calendar_id = calendar_id
+        self.actual_start = actual_start
+        self.actual_end = actual_end
+        self.remaining_duration = remaining_duration
+        for field in CPM_FIELDS:
+            setattr(self, field, None)
+        self.planned_start = None
+        self.planned_end = None
+
+    def copy(self) -> 'TaskNode':
+        clone = TaskNode.__new__(TaskNode)
+        for field in TaskNode.__slots__:
+            setattr(clone, field, getattr(self, field))
+        return clone
+
+
+class RelNode:
+    __slots__ = ('id', 'predecessor_id', 'successor_id', 'type', 'lag', 'calendar_id', 'is_driving')
+
+    def __init__(self, id: Optional[int], predecessor_id: int, successor_id: int, type: str = 'FS',
+                 lag: Optional[float] = 0.0, calendar_id: Optional[int] = None):
+        self.id = id
+        self.predecessor_id = predecessor_id
+        self.successor_id = successor_id
+        self.type = type
+        self.lag = lag
+        self.calendar_id = calendar_id
+        self.is_driving = False
+
+    def copy(self) -> 'RelNode':
+        clone = RelNode.__new__(RelNode)
+        for field in RelNode.__slots__:
+            setattr(clone, field, getattr(self, field))
+        return clone
+
+
+class ProjectSnapshot:
+    __slots__ = ('project_id', 'calendar_id', 'tasks', 'relationships', 'calendars')
+
+    def __init__(self, project_id: int, calendar_id: Optional[int] = None):
+        self.project_id = project_id
+        self.calendar_id = calendar_id
+        self.tasks: List[TaskNode] = []
+        self.relationships: List[RelNode] = []
+        self.calendars: Dict[int, ProjectCalendar] = {}
+
+    def engine(self) -> SchedulingEngine:
+        """A session-less engine over the snapshot's nodes."""
+        engine = SchedulingEngine(None, self.project_id)
+        engine.build_graph(self.tasks, self.relationships)
+        engine.calendars = self.calendars
+        if self.calendar_id in self.calendars:
+            engine.calendar = self.calendars[self.calendar_id]
+        return engine
+
+    @classmethod
+    def from_engine(cls, engine: SchedulingEngine) -> 'ProjectSnapshot':
+        """Snapshot sharing the nodes of an engine built from plain records (load_engine)."""
+        calendar_id = next((c for c, calendar in engine.calendars.items() if calendar is engine.calendar), None)
+        snapshot = cls(engine.project_id, calendar_id)
+        snapshot.tasks = list(engine.tasks.values())
+        snapshot.relationships = list(engine.relationships)
+        snapshot.calendars = engine.calendars
+        return snapshot
+
+
+async def load_snapshots(session: AsyncSession, project_ids: Iterable[int],
+                         with_results: bool = False) -> Dict[int, ProjectSnapshot]:
+    """
+    Loads snapshots of several projects with column-projected queries (no ORM entities).
+    with_results also reads the stored CPM fields and driving flags.
+    """
+    project_ids = list(project_ids)
+    if not project_ids:
+        return {}
+    # Core execution: rows come back as plain tuples without ORM result processing
+    connection = await session.connection()
+    result = await connection.execute(
+        select(Project.id, Project.calendar_id).where(Project.id.in_(project_ids))
+    )
+    snapshots = {pid: ProjectSnapshot(pid, calendar_id) for pid, calendar_id in result.all()}
+
+    task_columns = [
+        Task.project_id, Task.id, Task.original_duration, Task.constraint_type,
+        Task.constraint_date, Task.calendar_id,
+    ] + [getattr(Task, f) for f in PROGRESS_FIELDS]
+    if with_results:
+        task_columns += [getattr(Task, f) for f in CPM_FIELDS]
+    result = await connection.execute(select(*task_columns).where(Task.project_id.in_(project_ids)))
+    for row in result.all():
+        node = TaskNode(*row[1:9])
+        if with_results:
+            for field, value in zip(CPM_FIELDS, row[9:]):
+                setattr(node, field, value)
+        snapshots[row[0]].tasks.append(node)
+
+    rel_columns = [
+        TaskRelationship.project_id, TaskRelationship.id, TaskRelationship.predecessor_id,
+        TaskRelationship.successor_id, TaskRelationship.type, TaskRelationship.lag,
+        TaskRelationship.calendar_id,
+    ]
+    if with_results:
+        rel_columns.append(TaskRelationship.is_driving)
+    result = await connection.execute(select(*rel_columns).where(TaskRelationship.project_id.in_(project_ids)))
+    for row in result.all():
+        node = RelNode(*row[1:7])
+        if with_results:
+            node.is_driving = bool(row[7])
+        snapshots[row[0]].relationships.append(node)
+
+    calendar_ids = set()
+    for snapshot in snapshots.values():
+        calendar_ids.add(snapshot.calendar_id)
+        calendar_ids.update(t.calendar_id for t in snapshot.tasks)
+        calendar_ids.update(r.calendar_id for r in snapshot.relationships)
+    calendars = await CalendarService(session).get_compiled_calendars(calendar_ids)
+    for snapshot in snapshots.values():
+        used = {snapshot.calendar_id}
+        used.update(t.calendar_id for t in snapshot.tasks)
+        used.update(r.calendar_id for r in snapshot.relationships)
+        snapshot.calendars = {c: calendars[c] for c in used if c in calendars}
+    return snapshots
+
+
+async def load_engine(session: AsyncSession, project_id: int) -> Optional[SchedulingEngine]:
+    """
+    Lightweight alternative to SchedulingEngine.load_data(): the network is read as plain
+    node records (scheduling columns and stored results only, no identity map), and the
+    engine can still save_dates() through `session`. None if the project does not exist.
+    """
+    snapshots = await load_snapshots(session, [project_id], with_results=True)
+    if project_id not in snapshots:
+        return None
+    engine = snapshots[project_id].engine()
+    engine.session = session
+    engine.mark_persisted()
+    return engine
+
+
+async def load_data_date(session: AsyncSession, project_id: int) -> Optional[datetime]:
+    """Data date recorded by the project's last schedule run (None if never recorded)."""
+    result = await session.execute(select(Project.data_date).where(Project.id == project_id))
+    return result.scalar()
+
+
+async def load_driving_path(session: AsyncSession, project_id: int, task_id: int) -> List:
+    """
+    The driving path into `task_id` as stored by the last schedule run (see
+    trace_driving_path), read with one recursive query that follows only the task's own
+    chain: each step takes the driving relationship into the current predecessor (ties:
+    lowest relationship id). Rows carry id, predecessor_id, successor_id, type and lag.
+    """
+    def first_driving(rel):
+        tie = aliased(TaskRelationship)
+        return (
+            select(func.min(tie.id))
+            .where(tie.successor_id == rel.successor_id, tie.project_id == project_id, tie.is_driving.is_(True))
+            .scalar_subquery()
+        )
+
+    rel = aliased(TaskRelationship)
+    columns = lambda r: (r.id, r.predecessor_id, r.successor_id, r.type, r.lag)
+    chain = (
+        select(*columns(rel))
+        .where(rel.successor_id == task_id, rel.id == first_driving(rel))
+        .cte("driving_chain", recursive=True)
+    )
+    step = aliased(TaskRelationship)
+    # UNION (not UNION ALL) ends the walk if stale flags ever form a loop
+    chain = chain.union(
+        select(*columns(step))
+        .join(chain, step.successor_id == chain.c.predecessor_id)
+        .where(step.id == first_driving(step))
+    )
+    result = await session.execute(select(chain))
+    return trace_driving_path(task_id, {row.successor_id: row for row in result.all()})
+
+
+def compute_schedule(engine: SchedulingEngine, data_date: datetime, backend: str = "auto",
+                     progress_mode: Optional[str] = None, changed_ids: Optional[Iterable[int]] = None,
+                     cache=None) -> Set[int]:
+    """
+    One CPM run as the API performs it, in or out of process: incremental from
+    changed_ids when given, else a full run; progress-aware (from data_date) once any
+    task has actuals or progress_mode is set. cache: a ScheduleCache for full,
+    progress-free runs. Returns the ids of tasks whose results may have changed.
+    """
+    if changed_ids is not None:
+        return engine.reschedule(changed_ids, data_date, progress_mode)
+    if progress_mode or engine.has_progress():
+        engine.calculate_progress_dates(data_date, progress_mode or "retained_logic")
+    else:
+        engine.calculate_dates(data_date, backend=backend, cache=cache)
+    return set(engine.tasks)
+
+
+def schedule_snapshot(snapshot: ProjectSnapshot, data_date: datetime, backend: str = "auto",
+                      progress_mode: Optional[str] = None, changed_ids: Optional[Iterable[int]] = None) -> Dict:
+    """
+    Runs compute_schedule on a snapshot. Returns per-task CPM rows (id + CPM_FIELDS),
+    per-relationship driving flags, the ids of updated tasks and the compute time.
+    Failures are returned as "error" rather than raised, so custom exceptions never have
+    to cross a process boundary.
+    """
+    started = time.perf_counter()
+    result = {"project_id": snapshot.project_id, "tasks": [], "relationships": [], "updated": [], "error": None}
+    try:
+        updated = compute_schedule(snapshot.engine(), data_date, backend, progress_mode, changed_ids)
+        result["tasks"] = [(t.id,) + tuple(getattr(t, f) for f in CPM_FIELDS) for t in snapshot.tasks]
+        result["relationships"] = [(r.id, r.is_driving) for r in snapshot.relationships if r.id is not None]
+        result["updated"] = sorted(updated)
+    except ScheduleCycleError as e:
+        result["error"] = str(e)
+        result["cycles"] = e.cycles
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
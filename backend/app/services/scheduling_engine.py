@@ -1,220 +1,53 @@
-from datetime import datetime, timedelta, time
-from typing import List, Dict, Optional, Set
+import heapq
+from collections import deque
+from datetime import datetime
+from typing import Iterable, List, Dict, Optional, Set
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models.project import Task, TaskRelationship
+from sqlalchemy import inspect, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.project import Project, Task, TaskRelationship
+from app.services.calendar_service import CalendarService
+from app.services.work_calendar import ProjectCalendar
 
-class ProjectCalendar:
-    """
-    Handles working hours and days.
-    Default: Mon-Fri, 08:00-12:00, 13:00-17:00 (8 hours/day).
-    """
-    def __init__(self):
-        self.work_days = {0, 1, 2, 3, 4} # Mon-Fri
-        self.work_start = time(8, 0)
-        self.work_end = time(17, 0)
-        self.lunch_start = time(12, 0)
-        self.lunch_end = time(13, 0)
-        self.hours_per_day = 8.0
-
-    def is_working_time(self, dt: datetime) -> bool:
-        if dt.weekday() not in self.work_days:
-            return False
-        t = dt.time()
-        # Simple check: within start/end range?
-        # Note: Lunch break logic can be complex. For CPM simplicity, we often treat 8-17 as contiguous 8h block 
-        # or properly skip lunch. Let's do a robust check.
-        if not (self.work_start <= t < self.work_end):
-            return False
-        if self.lunch_start <= t < self.lunch_end:
-            return False
-        return True
-
-    def next_working_moment(self, dt: datetime) -> datetime:
-        """Moves dt forward to the next valid working minute if it's currently non-working."""
-        tz = dt.tzinfo
-        for _ in range(5000): # Larger safety range for long weekends
-            if self.is_working_time(dt):
-                return dt
-            
-            # Optimization: Jump to relevant boundaries
-            t = dt.time()
-            if t >= self.work_end or dt.weekday() not in self.work_days:
-                # Next day morning
-                dt = datetime.combine(dt.date() + timedelta(days=1), self.work_start, tzinfo=tz)
-            elif t < self.work_start:
-                # Today morning
-                dt = datetime.combine(dt.date(), self.work_start, tzinfo=tz)
-            elif self.lunch_start <= t < self.lunch_end:
-                # After lunch
-                dt = datetime.combine(dt.date(), self.lunch_end, tzinfo=tz)
-            else:
-                # Fallback step
-                dt += timedelta(minutes=1)
-        return dt
-
-    def prev_working_moment(self, dt: datetime) -> datetime:
-        """Moves dt backward to the prev valid working minute."""
-        tz = dt.tzinfo
-        for _ in range(5000):
-            if self.is_working_time(dt - timedelta(seconds=1)):
-                 return dt
-            
-            t = dt.time()
-            if t <= self.work_start or dt.weekday() not in self.work_days:
-                # Prev day afternoon
-                dt = datetime.combine(dt.date() - timedelta(days=1), self.work_end, tzinfo=tz)
-            elif t > self.work_end:
-                # Today afternoon
-                dt = datetime.combine(dt.date(), self.work_end, tzinfo=tz)
-            elif self.lunch_start < t <= self.lunch_end:
-                # Before lunch
-                dt = datetime.combine(dt.date(), self.lunch_start, tzinfo=tz)
-            else:
-                # Fallback step
-                dt -= timedelta(minutes=1)
-        return dt
-
-    def add_working_duration(self, start: datetime, hours: float) -> datetime:
-        """Adds working hours to a start date."""
-        if hours == 0:
-            return start
-        if hours < 0:
-            return self.subtract_working_duration(start, -hours)
-        
-        # Ensure we start from a working moment
-        current = self.next_working_moment(start)
-        remaining_minutes = int(hours * 60)
-        
-        while remaining_minutes > 0:
-            # How many minutes left in current day?
-            # Current time
-            t = current.time()
-            
-            # Identify next break or end of day
-            tz = current.tzinfo
-            if t < self.lunch_start:
-                next_break = datetime.combine(current.date(), self.lunch_start, tzinfo=tz)
-            else:
-                next_break = datetime.combine(current.date(), self.work_end, tzinfo=tz)
-            
-            minutes_available = (next_break - current).total_seconds() / 60
-            
-            if minutes_available <= 0:
-                # Should have been advanced by next_working_moment usually, but robust check
-                current = self.next_working_moment(current + timedelta(minutes=1))
-                continue
-
-            if remaining_minutes <= minutes_available:
-                current += timedelta(minutes=remaining_minutes)
-                remaining_minutes = 0
-            else:
-                current = next_break # Use up this block
-                remaining_minutes -= int(minutes_available)
-                current = self.next_working_moment(current) # Jump to next block
-                
-        return current
-
-    def subtract_working_duration(self, end: datetime, hours: float) -> datetime:
-        """Subtracts working hours from an end date."""
-        if hours == 0:
-            return end
-        if hours < 0:
-            return self.add_working_duration(end, -hours)
-
-        # Ensure we start from a working moment
-        current = self.prev_working_moment(end)
-        remaining_minutes = int(hours * 60)
-        
-        while remaining_minutes > 0:
-            t = current.time()
-            
-            # Define blocks: 08:00-12:00 and 13:00-17:00
-            # If current is in afternoon block (13:00 < t <= 17:00) -> prev limit is 13:00
-            # If current is in morning block (08:00 < t <= 12:00) -> prev limit is 08:00
-            # Note: t=13:00 is valid start of afternoon block. t=12:00 is end of morning.
-            
-            # If t > 13:00? No, 13:00 is inclusive start?
-            # 13:00 is working? Yes.
-            # If t == 13:00. Block is done (0 duration available backwards).
-            
-            tz = current.tzinfo
-            if t > self.lunch_end:
-                # Afternoon block
-                prev_limit = datetime.combine(current.date(), self.lunch_end, tzinfo=tz)
-            elif t <= self.lunch_end and t > self.work_start: 
-                # Morning block (handling constraint crossing)
-                # If t <= 12:00 (lunch_start)?
-                # If t is 13:00, we treat it as boundary.
-                if t == self.lunch_end:
-                     # At 13:00 boundary. 0 minutes available in this block going back.
-                     # Move to 12:00
-                     prev_limit = current # Dummy
-                else:
-                     prev_limit = datetime.combine(current.date(), self.work_start, tzinfo=tz)
-            else:
-                prev_limit = datetime.combine(current.date(), self.work_start, tzinfo=tz)
+try:
+    from app.services.cpm_vectorized import calculate_dates_vectorized
+except ImportError: # NumPy not installed
+    calculate_dates_vectorized = None
 
-            minutes_available = (current - prev_limit).total_seconds() / 60
-            
-            if minutes_available <= 0:
-               # Jump gap
-               current = self.prev_working_moment(current - timedelta(seconds=1))
-               continue
-               
-            if remaining_minutes <= minutes_available:
-                current -= timedelta(minutes=remaining_minutes)
-                remaining_minutes = 0
-            else:
-                current = prev_limit
-                remaining_minutes -= int(minutes_available)
-                current = self.prev_working_moment(current - timedelta(seconds=1)) # Jump gap
+# Networks at or above this size are scheduled by the NumPy backend when possible...
+VECTORIZED_MIN_TASKS = 2000
+# ...and wide enough: it works layer by layer, so deep, narrow networks (long chains)
+# are faster on the Python backend. Average tasks per topological layer.
+VECTORIZED_MIN_WIDTH = 4
+# Task columns written by a CPM run
+CPM_FIELDS = ('early_start', 'early_finish', 'late_start', 'late_finish', 'total_float', 'free_float')
+# Rows per bulk UPDATE statement in save_dates
+SAVE_BATCH_SIZE = 2000
+# Task columns read by progress-aware scheduling
+PROGRESS_FIELDS = ('actual_start', 'actual_end', 'remaining_duration')
+# How the remaining work of in-progress tasks treats unfinished predecessors (P6 options)
+PROGRESS_MODES = ('retained_logic', 'progress_override')
 
-        return current
-
-    def working_hours_between(self, start: datetime, end: datetime) -> float:
-        """Calculates working hours between two dates."""
-        if start >= end:
-            return 0.0
-        
-        # Ensure we start from a valid working moment
-        current = self.next_working_moment(start)
-        if current >= end:
-            return 0.0
-            
-        total_minutes = 0
-        
-        while current < end:
-            t = current.time()
-            tz = current.tzinfo
-            
-            # Current working block end
-            if t < self.lunch_start:
-                limit = datetime.combine(current.date(), self.lunch_start, tzinfo=tz)
-            elif t < self.work_end:
-                limit = datetime.combine(current.date(), self.work_end, tzinfo=tz)
-            else:
-                # Currently at or past work_end, move to next morning
-                current = self.next_working_moment(current)
-                continue
-            
-            # Constrain by absolute end
-            limit = min(limit, end)
-            
-            minutes = (limit - current).total_seconds() / 60
-            if minutes > 0:
-                total_minutes += int(minutes)
-                current = limit
-            
-            if current >= end:
-                break
-            
-            # Move to next block or day
-            # If current is at limit, we need to jump
-            current = self.next_working_moment(current + timedelta(seconds=1))
-            
-        return total_minutes / 60.0
+class ScheduleCycleError(ValueError):
+    """The network contains logic loops; `cycles` holds the find_cycles() diagnostic."""
+    def __init__(self, message: str, cycles: List[Dict]):
+        super().__init__(message)
+        self.cycles = cycles
 
+def trace_driving_path(task_id: int, driving_preds: Dict[int, TaskRelationship]) -> List[TaskRelationship]:
+    """
+    Walks driving relationships (successor id -> driving relationship) back from `task_id`
+    to the activity that starts the chain. Returns the relationships in path order.
+    """
+    path = []
+    seen = {task_id}
+    rel = driving_preds.get(task_id)
+    while rel is not None and rel.predecessor_id not in seen:
+        path.append(rel)
+        seen.add(rel.predecessor_id)
+        rel = driving_preds.get(rel.predecessor_id)
+    path.reverse()
+    return path
 
 class SchedulingEngine:
     def __init__(self, session: AsyncSession, project_id: int):
@@ -224,7 +57,15 @@ class SchedulingEngine:
         self.relationships: List[TaskRelationship] = []
         self.preds: Dict[int, List[TaskRelationship]] = {}
         self.succs: Dict[int, List[TaskRelationship]] = {}
-        self.calendar = ProjectCalendar()
+        self.calendar = ProjectCalendar() # Project default calendar
+        self.calendars: Dict[int, ProjectCalendar] = {} # Compiled calendars by WorkCalendar id
+        # CPM values as stored in the database (see mark_persisted); None = unknown, save everything
+        self.persisted: Optional[Dict[int, tuple]] = None
+        self.persisted_driving: Dict[int, bool] = {}
+        # Progress-aware runs only (calculate_progress_dates)
+        self.progress_mode: Optional[str] = None
+        self.remaining: Dict[int, float] = {} # Hours still to schedule per open task
+        self.resume: Dict[int, datetime] = {} # Start of the remaining work of in-progress tasks
 
     async def load_data(self):
         # Load tasks
@@ -232,15 +73,20 @@ class SchedulingEngine:
             select(Task).where(Task.project_id == self.project_id)
         )
         tasks_list = result.scalars().all()
-        self.tasks = {t.id: t for t in tasks_list}
         
         # Load relationships
         result = await self.session.execute(
             select(TaskRelationship).where(TaskRelationship.project_id == self.project_id)
         )
-        self.relationships = result.scalars().all()
-        
-        # Build graph
+        self.build_graph(tasks_list, result.scalars().all())
+        self.mark_persisted()
+
+        await self.load_calendars()
+
+    def build_graph(self, tasks, relationships):
+        """Indexes tasks by id and relationships by successor / predecessor."""
+        self.tasks = {t.id: t for t in tasks}
+        self.relationships = list(relationships)
         self.preds = {}
         self.succs = {}
         for rel in self.relationships:
@@ -252,142 +98,490 @@ class SchedulingEngine:
                 self.succs[rel.predecessor_id] = []
             self.succs[rel.predecessor_id].append(rel)
 
-    def calculate_dates(self, project_start_date: datetime):
+    async def load_calendars(self):
+        """Loads the project, task and lag calendars referenced by the loaded network."""
+        result = await self.session.execute(
+            select(Project.calendar_id).where(Project.id == self.project_id)
+        )
+        project_calendar_id = result.scalar()
+        calendar_ids = {project_calendar_id}
+        calendar_ids.update(getattr(t, 'calendar_id', None) for t in self.tasks.values())
+        calendar_ids.update(getattr(r, 'calendar_id', None) for r in self.relationships)
+
+        self.calendars = await CalendarService(self.session).get_compiled_calendars(calendar_ids)
+        if project_calendar_id in self.calendars:
+            self.calendar = self.calendars[project_calendar_id]
+
+    def task_calendar(self, task) -> ProjectCalendar:
+        """Calendar used for a task's duration; falls back to the project calendar."""
+        calendar_id = getattr(task, 'calendar_id', None)
+        if calendar_id is not None and calendar_id in self.calendars:
+            return self.calendars[calendar_id]
+        return self.calendar
+
+    def lag_calendar(self, rel) -> ProjectCalendar:
+        """Calendar used for a relationship lag; P6 default is the predecessor's calendar."""
+        calendar_id = getattr(rel, 'calendar_id', None)
+        if calendar_id is not None and calendar_id in self.calendars:
+            return self.calendars[calendar_id]
+        pred = self.tasks.get(rel.predecessor_id)
+        return self.task_calendar(pred) if pred is not None else self.calendar
+
+    def early_start_constraint(self, rel, pred, task) -> Optional[datetime]:
+        """Earliest start of `task` imposed by one predecessor relationship."""
+        lag_cal = self.lag_calendar(rel)
+        duration = self.task_duration(task)
+        lag = rel.lag or 0.0
+        if rel.type == 'FS':
+            # Succ.Start >= Pred.Finish + Lag
+            # Lag is in working hours of the lag calendar.
+            return lag_cal.add_working_duration(pred.early_finish, lag)
+        elif rel.type == 'SS':
+            # Succ.Start >= Pred.Start + Lag
+            return lag_cal.add_working_duration(pred.early_start, lag)
+        elif rel.type == 'FF':
+            # Succ.Finish >= Pred.Finish + Lag
+            # Succ.Start = (Pred.Finish + Lag) - Duration
+            finish_constraint = lag_cal.add_working_duration(pred.early_finish, lag)
+            return self.task_calendar(task).subtract_working_duration(finish_constraint, duration)
+        elif rel.type == 'SF':
+            # Succ.Finish >= Pred.Start + Lag
+            # Succ.Start = (Pred.Start + Lag) - Duration
+            finish_constraint = lag_cal.add_working_duration(pred.early_start, lag)
+            return self.task_calendar(task).subtract_working_duration(finish_constraint, duration)
+        return None
+
+    def late_finish_constraint(self, rel, task, succ) -> Optional[datetime]:
+        """Latest finish of `task` imposed by one successor relationship."""
+        lag_cal = self.lag_calendar(rel)
+        calendar = self.task_calendar(task)
+        duration = self.task_duration(task)
+        lag = rel.lag or 0.0
+        if rel.type == 'FS':
+            # Pred.Finish <= Succ.Start - Lag
+            # LF = Succ.Start - Lag
+            return lag_cal.subtract_working_duration(succ.late_start, lag)
+        elif rel.type == 'SS':
+            # Pred.Start <= Succ.Start - Lag
+            # Pred.Finish = Limit(Pred.Start) + D = (Succ.Start - Lag) + D
+            start_limit = lag_cal.subtract_working_duration(succ.late_start, lag)
+            return calendar.add_working_duration(start_limit, duration)
+        elif rel.type == 'FF':
+            # Pred.Finish <= Succ.Finish - Lag
+            return lag_cal.subtract_working_duration(succ.late_finish, lag)
+        elif rel.type == 'SF':
+            # Pred.Start <= Succ.Finish - Lag
+            # Pred.Finish = (Succ.Finish - Lag) + D
+            start_limit = lag_cal.subtract_working_duration(succ.late_finish, lag)
+            return calendar.add_working_duration(start_limit, duration)
+        return None
+
+    def uses_single_calendar(self) -> bool:
+        """Every duration and lag runs on the project calendar (one working-minute space)."""
+        return all(self.task_calendar(t) is self.calendar for t in self.tasks.values()) and \
+            all(self.lag_calendar(r) is self.calendar for r in self.relationships)
+
+    def supports_vectorized(self) -> bool:
+        """The NumPy backend works in a single working-minute space, i.e. one calendar."""
+        return calculate_dates_vectorized is not None and self.uses_single_calendar()
+
+    def calculate_dates(self, project_start_date: datetime, backend: str = "auto", cache=None):
         """
         Performs the Critical Path Method (CPM) calculation.
         Supports FS, SS, FF, SF relationships and Lags.
+        Durations use each task's calendar, lags the relationship (or predecessor) calendar.
+
+        backend: "python" (per-task datetime passes), "numpy" (vectorized, single calendar)
+        or "auto" (numpy for networks of VECTORIZED_MIN_TASKS tasks or more averaging
+        VECTORIZED_MIN_WIDTH tasks per topological layer).
+        cache: a ScheduleCache; identical inputs are served from it without recomputing.
         """
         if not self.tasks:
             return
+        self.progress_mode = None
+        self.remaining = {}
+        self.resume = {}
+
+        if cache is not None:
+            key = cache.load(self, project_start_date)
+            if key is not None:
+                self.calculate_dates(project_start_date, backend)
+                cache.store(key, self)
+            return
+
+        sorted_ids = None
+        if backend == "auto" and len(self.tasks) >= VECTORIZED_MIN_TASKS and self.supports_vectorized():
+            sorted_ids = self.topological_sort()
+            if len(sorted_ids) >= VECTORIZED_MIN_WIDTH * self.layer_count(sorted_ids):
+                backend = "numpy"
+        if backend == "numpy":
+            if self.supports_vectorized():
+                try:
+                    calculate_dates_vectorized(self, project_start_date)
+                except ValueError:
+                    if self.find_cycles():
+                        raise self.cycle_error()
+                    raise
+                return
+            raise ValueError("Vectorized scheduling requires NumPy and a single calendar")
 
         # Ensure project start is a working time
         project_start_date = self.calendar.next_working_moment(project_start_date)
 
-        sorted_ids = self.topological_sort()
+        if sorted_ids is None:
+            sorted_ids = self.topological_sort()
         
         # 1. Forward Pass: Calculate Early Start (ES) and Early Finish (EF)
         for t_id in sorted_ids:
-            task = self.tasks[t_id]
-            
-            # Default Start: Project Start
-            effective_es = project_start_date
-            
-            if t_id in self.preds:
-                # Max of all predecessors constraints
-                for rel in self.preds[t_id]:
-                    if rel.predecessor_id not in self.tasks:
-                        continue
-                    pred = self.tasks[rel.predecessor_id]
-                    
-                    # Logic for different relationship types
-                    if rel.type == 'FS':
-                        # Succ.Start >= Pred.Finish + Lag
-                        # Convert Lag (hours) to working time? Usually Lag is calendar days or working days.
-                        # Assuming Lag is working hours for consistency.
-                        base = self.calendar.add_working_duration(pred.early_finish, rel.lag)
-                        constraint_date = base # ES
-                    elif rel.type == 'SS':
-                        # Succ.Start >= Pred.Start + Lag
-                        base = self.calendar.add_working_duration(pred.early_start, rel.lag)
-                        constraint_date = base # ES
-                    elif rel.type == 'FF':
-                        # Succ.Finish >= Pred.Finish + Lag
-                        # Succ.Start = (Pred.Finish + Lag) - Duration
-                        finish_constraint = self.calendar.add_working_duration(pred.early_finish, rel.lag)
-                        constraint_date = self.calendar.subtract_working_duration(finish_constraint, task.original_duration)
-                    elif rel.type == 'SF':
-                        # Succ.Finish >= Pred.Start + Lag
-                        # Succ.Start = (Pred.Start + Lag) - Duration
-                        finish_constraint = self.calendar.add_working_duration(pred.early_start, rel.lag)
-                        constraint_date = self.calendar.subtract_working_duration(finish_constraint, task.original_duration)
-                    else:
-                        constraint_date = project_start_date
-                    
-                    if constraint_date > effective_es:
-                        effective_es = constraint_date
-            
-            # Application of "Start No Earlier Than" constraint
-            if task.constraint_type == 'start_no_earlier_than' and task.constraint_date:
-                cd = self.calendar.next_working_moment(task.constraint_date)
-                if cd > effective_es:
-                    effective_es = cd
-            
-            # Normalize ES to be a valid working moment (e.g. if 17:00, move to next day 08:00)
-            task.early_start = self.calendar.next_working_moment(effective_es)
-            duration = task.original_duration if task.original_duration is not None else 0.0
-            task.early_finish = self.calendar.add_working_duration(task.early_start, duration)
+            self.compute_early_dates(self.tasks[t_id], project_start_date)
         
         # Determine Project Finish Date
-        finish_dates = [t.early_finish for t in self.tasks.values() if t.early_finish is not None]
-        project_finish_date = max(finish_dates, default=project_start_date)
+        project_finish_date = self.project_finish(project_start_date)
         
         # 2. Backward Pass: Calculate Late Finish (LF) and Late Start (LS)
         for t_id in reversed(sorted_ids):
+            self.compute_late_dates(self.tasks[t_id], project_finish_date)
+
+    def task_duration(self, task) -> float:
+        """Hours scheduled for a task: its remaining duration in a progress-aware run, else the original."""
+        if task.id in self.remaining:
+            return self.remaining[task.id]
+        return task.original_duration if task.original_duration is not None else 0.0
+
+    def is_complete(self, task) -> bool:
+        """Finished task frozen by a progress-aware run."""
+        return self.progress_mode is not None and getattr(task, 'actual_end', None) is not None
+
+    def has_progress(self) -> bool:
+        return any(
+            getattr(t, 'actual_start', None) is not None or getattr(t, 'actual_end', None) is not None
+            for t in self.tasks.values()
+        )
+
+    def remaining_hours(self, task, data_date: datetime) -> float:
+        """
+        Remaining work of an open task: remaining_duration when set (0 is the column
+        default, i.e. not estimated), else the original duration less the working time
+        elapsed since its actual start.
+        """
+        if getattr(task, 'remaining_duration', None):
+            return task.remaining_duration
+        duration = task.original_duration if task.original_duration is not None else 0.0
+        if getattr(task, 'actual_start', None) is None:
+            return duration
+        elapsed = self.task_calendar(task).working_hours_between(task.actual_start, data_date)
+        return max(0.0, duration - max(0.0, elapsed))
+
+    def calculate_progress_dates(self, data_date: datetime, mode: str = "retained_logic"):
+        """
+        Progress-aware CPM from a data date.
+
+        Completed tasks (actual_end) keep their actual dates, have late dates equal to them
+        and no float, and are left out of both passes. In-progress tasks (actual_start)
+        keep their actual start and schedule their remaining work from the data date:
+        under "retained_logic" it still waits for unfinished predecessors, under
+        "progress_override" it ignores them. Work not yet started cannot begin before the
+        data date. Always runs on the Python backend.
+        """
+        if mode not in PROGRESS_MODES:
+            raise ValueError(f"Unknown progress mode '{mode}' (expected one of {', '.join(PROGRESS_MODES)})")
+        if not self.tasks:
+            return
+        self.progress_mode = mode
+        data_date = self.calendar.next_working_moment(data_date)
+
+        open_ids = []
+        for t_id, task in self.tasks.items():
+            if getattr(task, 'actual_end', None) is None:
+                open_ids.append(t_id)
+                continue
+            task.early_start = task.late_start = task.actual_start or task.actual_end
+            task.early_finish = task.late_finish = task.actual_end
+            task.total_float = task.free_float = None
+            for rel in self.preds.get(t_id, []):
+                rel.is_driving = False
+        self.remaining = {t_id: self.remaining_hours(self.tasks[t_id], data_date) for t_id in open_ids}
+        self.resume = {}
+
+        sorted_ids = self.topological_sort(open_ids)
+        for t_id in sorted_ids:
+            task = self.tasks[t_id]
+            if getattr(task, 'actual_start', None) is None:
+                self.compute_early_dates(task, data_date)
+            else:
+                self.compute_remaining_dates(task, data_date)
+
+        project_finish_date = self.project_finish(data_date)
+        for t_id in reversed(sorted_ids):
+            self.compute_late_dates(self.tasks[t_id], project_finish_date)
+
+    def compute_remaining_dates(self, task, data_date: datetime):
+        """Early dates of an in-progress task: actual start, remaining work from the data date."""
+        calendar = self.task_calendar(task)
+        resume = max(data_date, task.actual_start)
+        constraints = []
+        if self.progress_mode == 'retained_logic':
+            for rel in self.preds.get(task.id, []):
+                pred = self.tasks.get(rel.predecessor_id)
+                if pred is None:
+                    continue
+                constraint_date = self.early_start_constraint(rel, pred, task)
+                constraints.append((rel, constraint_date))
+                if constraint_date is not None and constraint_date > resume:
+                    resume = constraint_date
+        else:
+            for rel in self.preds.get(task.id, []):
+                rel.is_driving = False
+
+        resume = calendar.next_working_moment(resume)
+        self.resume[task.id] = resume
+        task.early_start = task.actual_start
+        task.early_finish = calendar.add_working_duration(resume, self.task_duration(task))
+        for rel, constraint_date in constraints:
+            rel.is_driving = constraint_date is not None and calendar.next_working_moment(constraint_date) == resume
+
+    def compute_early_dates(self, task, project_start_date: datetime):
+        """Sets ES / EF of one task from its predecessors' early dates."""
+        calendar = self.task_calendar(task)
+        
+        # Default Start: Project Start
+        effective_es = project_start_date
+        constraints = []
+        
+        if task.id in self.preds:
+            # Max of all predecessors constraints
+            for rel in self.preds[task.id]:
+                if rel.predecessor_id not in self.tasks:
+                    continue
+                pred = self.tasks[rel.predecessor_id]
+                constraint_date = self.early_start_constraint(rel, pred, task)
+                constraints.append((rel, constraint_date))
+                if constraint_date is not None and constraint_date > effective_es:
+                    effective_es = constraint_date
+        
+        # Application of "Start No Earlier Than" constraint
+        if task.constraint_type == 'start_no_earlier_than' and task.constraint_date:
+            cd = calendar.next_working_moment(task.constraint_date)
+            if cd > effective_es:
+                effective_es = cd
+        
+        # Normalize ES to be a valid working moment (e.g. if 17:00, move to next day 08:00)
+        task.early_start = calendar.next_working_moment(effective_es)
+        task.early_finish = calendar.add_working_duration(task.early_start, self.task_duration(task))
+
+        # Driving relationships: those whose constraint lands on the early start
+        for rel, constraint_date in constraints:
+            rel.is_driving = constraint_date is not None and \
+                calendar.next_working_moment(constraint_date) == task.early_start
+
+    def compute_late_dates(self, task, project_finish_date: datetime):
+        """Sets LF / LS / TF of one task from its successors' late dates."""
+        calendar = self.task_calendar(task)
+        effective_lf = project_finish_date
+        
+        if task.id in self.succs:
+            # Min of all successor constraints
+            for rel in self.succs[task.id]:
+                if rel.successor_id not in self.tasks:
+                    continue
+                succ = self.tasks[rel.successor_id]
+                if self.is_complete(succ): # Finished work no longer constrains its predecessors
+                    continue
+                constraint_date = self.late_finish_constraint(rel, task, succ)
+                if constraint_date is not None and constraint_date < effective_lf:
+                    effective_lf = constraint_date
+        
+        # Application of "Finish No Later Than" constraint
+        if task.constraint_type == 'finish_no_later_than' and task.constraint_date:
+            cd = calendar.prev_working_moment(task.constraint_date) # Should align to working time end
+            if cd < effective_lf:
+                effective_lf = cd
+        
+        # Clamp LF to not be before ES? (Negative Float allowed if missed deadlines, but logic usually holds)
+        
+        task.late_finish = effective_lf
+        # Calculate LS
+        raw_ls = calendar.subtract_working_duration(task.late_finish, self.task_duration(task))
+        # Normalize LS to valid start time (if landing on Fri 17:00, it effectively means Mon 08:00 start)
+        task.late_start = calendar.next_working_moment(raw_ls)
+        
+        # 3. Float Calculation (working hours delta)
+        # TF = Working hours between ES and LS (the remaining work's start for tasks in progress).
+        task.total_float = calendar.working_hours_between(self.resume.get(task.id, task.early_start), task.late_start)
+        self.compute_free_float(task, project_finish_date)
+
+    def compute_free_float(self, task, project_finish_date: datetime):
+        """
+        FF = working hours the task can slip without delaying any successor's early start
+        (per relationship: the gap between the date it imposes and the successor's ES)
+        or the project finish.
+        """
+        free_float = self.task_calendar(task).working_hours_between(task.early_finish, project_finish_date)
+        for rel in self.succs.get(task.id, []):
+            if rel.successor_id not in self.tasks or self.is_complete(self.tasks[rel.successor_id]):
+                continue
+            gap = self.relationship_gap(rel, task, self.tasks[rel.successor_id])
+            if gap is not None and gap < free_float:
+                free_float = gap
+        task.free_float = free_float
+
+    def relationship_gap(self, rel, pred, succ) -> Optional[float]:
+        """Working hours between the start a relationship imposes and the successor's early start."""
+        constraint_date = self.early_start_constraint(rel, pred, succ)
+        if constraint_date is None:
+            return None
+        return self.task_calendar(succ).working_hours_between(constraint_date, self.resume.get(succ.id, succ.early_start))
+
+    def project_finish(self, project_start_date: datetime) -> datetime:
+        finish_dates = [t.early_finish for t in self.tasks.values() if t.early_finish is not None]
+        return max(finish_dates, default=project_start_date)
+
+    def critical_chain(self) -> List[int]:
+        """
+        Ordered critical path of a scheduled network: from the critical activity that finishes
+        last, back along driving links between critical activities. Iterative, O(n + m).
+        """
+        critical = {
+            t_id for t_id, t in self.tasks.items()
+            if t.total_float is not None and t.total_float <= 0 and t.early_finish is not None
+        }
+        if not critical:
+            return []
+        last = max(critical, key=lambda t_id: (self.tasks[t_id].early_finish, -t_id))
+        driving_preds = {}
+        for rel in sorted(self.relationships, key=lambda r: r.id if r.id is not None else -1):
+            if rel.is_driving and rel.predecessor_id in critical and rel.successor_id in critical:
+                driving_preds.setdefault(rel.successor_id, rel) # Ties: lowest relationship id
+        path = trace_driving_path(last, driving_preds)
+        return [path[0].predecessor_id if path else last] + [rel.successor_id for rel in path]
+
+    def reschedule(self, changed_ids: Iterable[int], project_start_date: datetime,
+                   progress_mode: Optional[str] = None) -> Set[int]:
+        """
+        Incremental CPM after editing `changed_ids` (tasks whose duration, constraint or
+        calendar changed, plus both ends of every added / removed / edited relationship).
+        Requires dates from a previous full run; otherwise falls back to calculate_dates.
+        Projects with actuals (or a progress_mode) get a full calculate_progress_dates run
+        from `project_start_date` as the data date instead.
+
+        Early dates are recomputed over the downstream cone of the changed tasks in
+        topological order, late dates over the upstream cone of tasks whose late dates
+        (or the project finish they depend on) moved. Propagation stops wherever the
+        recomputed values equal the stored ones.
+        Returns the ids of tasks whose dates or float changed.
+        """
+        if not self.tasks:
+            return set()
+        if progress_mode is not None or self.has_progress():
+            # Actuals pin dates and cut links; the cones below assume neither
+            before = {t_id: tuple(getattr(t, f) for f in CPM_FIELDS) for t_id, t in self.tasks.items()}
+            self.calculate_progress_dates(project_start_date, progress_mode or "retained_logic")
+            return {t_id for t_id, t in self.tasks.items() if tuple(getattr(t, f) for f in CPM_FIELDS) != before[t_id]}
+        self.progress_mode = None
+        self.remaining = {}
+        self.resume = {}
+
+        project_start_date = self.calendar.next_working_moment(project_start_date)
+        scheduled = all(
+            t.early_start is not None and t.early_finish is not None and
+            t.late_start is not None and t.late_finish is not None
+            for t in self.tasks.values()
+        )
+        # A moved anchor shifts every open start; nothing to gain from the incremental path
+        if not scheduled or min(t.early_start for t in self.tasks.values()) != project_start_date:
+            self.calculate_dates(project_start_date, backend="python")
+            return set(self.tasks)
+
+        seeds = {t_id for t_id in changed_ids if t_id in self.tasks}
+        position = {t_id: i for i, t_id in enumerate(self.topological_sort())}
+        before = {t_id: tuple(getattr(self.tasks[t_id], f) for f in CPM_FIELDS) for t_id in seeds}
+        old_finish = self.project_finish(project_start_date)
+
+        # 1. Forward: downstream cone, in topological order
+        heap = [(position[t_id], t_id) for t_id in seeds]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        early_moved = set()
+        while heap:
+            _, t_id = heapq.heappop(heap)
             task = self.tasks[t_id]
-            effective_lf = project_finish_date
-            
-            if t_id in self.succs:
-                # Min of all successor constraints
-                for rel in self.succs[t_id]:
-                    if rel.successor_id not in self.tasks:
-                        continue
-                    succ = self.tasks[rel.successor_id]
-                    
-                    duration = task.original_duration if task.original_duration is not None else 0.0
-                    if rel.type == 'FS':
-                        # Pred.Finish <= Succ.Start - Lag
-                        # LF = Succ.Start - Lag
-                        constraint_date = self.calendar.subtract_working_duration(succ.late_start, rel.lag)
-                    elif rel.type == 'SS':
-                        # Pred.Start <= Succ.Start - Lag
-                        # Pred.Finish = Limit(Pred.Start) + D = (Succ.Start - Lag) + D
-                        start_limit = self.calendar.subtract_working_duration(succ.late_start, rel.lag)
-                        constraint_date = self.calendar.add_working_duration(start_limit, duration)
-                    elif rel.type == 'FF':
-                        # Pred.Finish <= Succ.Finish - Lag
-                        constraint_date = self.calendar.subtract_working_duration(succ.late_finish, rel.lag)
-                    elif rel.type == 'SF':
-                        # Pred.Start <= Succ.Finish - Lag
-                        # Pred.Finish = (Succ.Finish - Lag) + D
-                        start_limit = self.calendar.subtract_working_duration(succ.late_finish, rel.lag)
-                        constraint_date = self.calendar.add_working_duration(start_limit, duration)
-                    else:
-                        constraint_date = project_finish_date
-                    
-                    if constraint_date < effective_lf:
-                        effective_lf = constraint_date
-            
-            # Application of "Finish No Later Than" constraint
-            if task.constraint_type == 'finish_no_later_than' and task.constraint_date:
-                cd = self.calendar.prev_working_moment(task.constraint_date) # Should align to working time end
-                if cd < effective_lf:
-                    effective_lf = cd
-            
-            # Clamp LF to not be before ES? (Negative Float allowed if missed deadlines, but logic usually holds)
-            
-            task.late_finish = effective_lf
-            # Calculate LS
-            duration = task.original_duration if task.original_duration is not None else 0.0
-            raw_ls = self.calendar.subtract_working_duration(task.late_finish, duration)
-            # Normalize LS to valid start time (if landing on Fri 17:00, it effectively means Mon 08:00 start)
-            task.late_start = self.calendar.next_working_moment(raw_ls)
-            
-            # 3. Float Calculation (working hours delta)
-            # TF = Working hours between ES and LS.
-            task.total_float = self.calendar.working_hours_between(task.early_start, task.late_start)
+            old = (task.early_start, task.early_finish)
+            before.setdefault(t_id, tuple(getattr(task, f) for f in CPM_FIELDS))
+            self.compute_early_dates(task, project_start_date)
+            if (task.early_start, task.early_finish) == old:
+                continue
+            early_moved.add(t_id)
+            for rel in self.succs.get(t_id, []):
+                if rel.successor_id in self.tasks and rel.successor_id not in queued:
+                    queued.add(rel.successor_id)
+                    heapq.heappush(heap, (position[rel.successor_id], rel.successor_id))
 
-    def topological_sort(self) -> List[int]:
-        # Kahn's algorithm
-        in_degree = {t_id: 0 for t_id in self.tasks}
+        # 2. Backward: changed tasks, plus tasks bound by a moved project finish
+        new_finish = self.project_finish(project_start_date)
+        late_seeds = set(seeds)
+        if new_finish != old_finish:
+            late_seeds.update(
+                t_id for t_id, t in self.tasks.items()
+                if t.late_finish == old_finish or t.late_finish > new_finish
+            )
+        heap = [(-position[t_id], t_id) for t_id in late_seeds]
+        heapq.heapify(heap)
+        queued = set(late_seeds)
+        late_done = set()
+        while heap:
+            _, t_id = heapq.heappop(heap)
+            task = self.tasks[t_id]
+            old = (task.late_start, task.late_finish)
+            before.setdefault(t_id, tuple(getattr(task, f) for f in CPM_FIELDS))
+            self.compute_late_dates(task, new_finish)
+            late_done.add(t_id)
+            if (task.late_start, task.late_finish) == old:
+                continue
+            for rel in self.preds.get(t_id, []):
+                if rel.predecessor_id in self.tasks and rel.predecessor_id not in queued:
+                    queued.add(rel.predecessor_id)
+                    heapq.heappush(heap, (-position[rel.predecessor_id], rel.predecessor_id))
+
+        # 3. Float of tasks whose early dates moved but late dates were not revisited.
+        # Free float also depends on the successors' early starts and the project finish.
+        for t_id in early_moved - late_done:
+            task = self.tasks[t_id]
+            task.total_float = self.task_calendar(task).working_hours_between(task.early_start, task.late_start)
+        refresh = set(early_moved)
+        for t_id in early_moved:
+            refresh.update(rel.predecessor_id for rel in self.preds.get(t_id, []))
+        if new_finish != old_finish:
+            # Tasks whose free float was bounded by the project finish
+            bound = min(old_finish, new_finish)
+            refresh.update(
+                t_id for t_id, t in self.tasks.items()
+                if t.free_float is None or
+                t.free_float >= self.task_calendar(t).working_hours_between(t.early_finish, bound)
+            )
+        for t_id in refresh - late_done:
+            if t_id not in self.tasks:
+                continue
+            task = self.tasks[t_id]
+            before.setdefault(t_id, tuple(getattr(task, f) for f in CPM_FIELDS))
+            self.compute_free_float(task, new_finish)
+
+        return {
+            t_id for t_id, old in before.items()
+            if tuple(getattr(self.tasks[t_id], f) for f in CPM_FIELDS) != old
+        }
+
+    def topological_sort(self, task_ids: Optional[Iterable[int]] = None) -> List[int]:
+        """Kahn's algorithm over all tasks, or the subnetwork of `task_ids` (links into it from outside are ignored)."""
+        in_degree = {t_id: 0 for t_id in (self.tasks if task_ids is None else task_ids)}
         for rel in self.relationships:
-            if rel.successor_id in in_degree:
+            if rel.successor_id in in_degree and rel.predecessor_id in in_degree:
                 in_degree[rel.successor_id] += 1
         
-        queue = [t_id for t_id in self.tasks if in_degree[t_id] == 0]
+        queue = deque(t_id for t_id in in_degree if in_degree[t_id] == 0)
         sorted_list = []
         
         while queue:
-            u = queue.pop(0)
+            u = queue.popleft()
             sorted_list.append(u)
             
             if u in self.succs:
@@ -398,18 +592,164 @@ class SchedulingEngine:
                         if in_degree[v] == 0:
                             queue.append(v)
         
-        if len(sorted_list) != len(self.tasks):
-             # Handle Cycle: Break loop or Raise Error?
-             # For robustness, we might just process what we have or identify cycle.
-             # Returning partial list often bad.
-             # Identify tasks involved in cycle?
-             # Simple fallback: Return standard list but warn.
-             # Raising error stops everything. 
-             raise ValueError("Cycle detected in project schedule")
+        if len(sorted_list) != len(in_degree):
+            raise self.cycle_error()
             
         return sorted_list
 
-    async def save_dates(self):
+    def layer_count(self, sorted_ids: List[int]) -> int:
+        """Number of topological layers (longest chain of linked tasks) given a topological order."""
+        depth: Dict[int, int] = {}
+        deepest = 0
+        for t_id in sorted_ids:
+            level = depth.get(t_id, 0)
+            deepest = max(deepest, level)
+            for rel in self.succs.get(t_id, ()):
+                if depth.get(rel.successor_id, 0) <= level:
+                    depth[rel.successor_id] = level + 1
+        return deepest + 1 if sorted_ids else 0
+
+    def find_cycles(self) -> List[Dict]:
+        """
+        Strongly connected components of the network (iterative Tarjan, O(V + E)).
+        Every component with more than one task, or a task linked to itself, is a loop.
+        Returns one entry per loop with its task ids, all relationships inside it and the
+        relationships that close it (links back to a task visited earlier in DFS order;
+        removing them breaks the loop).
+        """
+        index: Dict[int, int] = {}
+        lowlink: Dict[int, int] = {}
+        on_stack: Set[int] = set()
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for root in self.tasks:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.succs.get(root, [])))]
+            while work:
+                node, edges = work[-1]
+                descended = False
+                for rel in edges:
+                    succ = rel.successor_id
+                    if succ not in self.tasks:
+                        continue
+                    if succ not in index:
+                        index[succ] = lowlink[succ] = counter
+                        counter += 1
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(self.succs.get(succ, []))))
+                        descended = True
+                        break
+                    if succ in on_stack:
+                        lowlink[node] = min(lowlink[node], index[succ])
+                if descended:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        cycles = []
+        for component in components:
+            members = set(component)
+            rels = [
+                rel for t_id in component for rel in self.succs.get(t_id, [])
+                if rel.successor_id in members
+            ]
+            if not rels:
+                continue
+            cycles.append({
+                "task_ids": sorted(members),
+                "relationships": [self.describe_relationship(rel) for rel in rels],
+                # Tarjan numbers tasks in DFS order; a link back to an earlier-visited
+                # member of the same component closes the loop
+                "closing_relationships": [
+                    self.describe_relationship(rel) for rel in rels
+                    if index[rel.successor_id] <= index[rel.predecessor_id]
+                ],
+            })
+        cycles.sort(key=lambda c: c["task_ids"][0])
+        return cycles
+
+    @staticmethod
+    def describe_relationship(rel) -> Dict:
+        return {
+            "id": getattr(rel, 'id', None),
+            "predecessor_id": rel.predecessor_id,
+            "successor_id": rel.successor_id,
+            "type": rel.type,
+            "lag": rel.lag,
+        }
+
+    def cycle_error(self) -> "ScheduleCycleError":
+        cycles = self.find_cycles()
+        summary = "; ".join(
+            ", ".join(str(t_id) for t_id in cycle["task_ids"]) for cycle in cycles[:5]
+        )
+        if len(cycles) > 5:
+            summary += f"; ... ({len(cycles)} loops)"
+        return ScheduleCycleError(f"Cycle detected in project schedule (tasks {summary})", cycles)
+
+    def mark_persisted(self):
+        """Records the current CPM values as the stored state save_dates() diffs against."""
+        self.persisted = {t_id: tuple(getattr(t, f) for f in CPM_FIELDS) for t_id, t in self.tasks.items()}
+        self.persisted_driving = {r.id: bool(r.is_driving) for r in self.relationships if r.id is not None}
+
+    def dirty_rows(self):
+        """(task rows, relationship rows) whose CPM values differ from the stored state."""
+        persisted = self.persisted or {}
+        task_rows = []
+        for t_id, task in self.tasks.items():
+            values = tuple(getattr(task, f) for f in CPM_FIELDS)
+            if self.persisted is None or persisted.get(t_id) != values:
+                task_rows.append(dict(zip(('id',) + CPM_FIELDS, (t_id,) + values)))
+        rel_rows = [
+            {"id": r.id, "is_driving": bool(r.is_driving)}
+            for r in self.relationships
+            if r.id is not None and (self.persisted is None or self.persisted_driving.get(r.id) != bool(r.is_driving))
+        ]
+        return task_rows, rel_rows
+
+    async def save_dates(self) -> int:
+        """
+        Writes the CPM fields and driving flags that changed since load_data(), as bulk
+        UPDATEs by primary key (one executemany per SAVE_BATCH_SIZE rows).
+        Returns the number of task rows written.
+        """
+        task_rows, rel_rows = self.dirty_rows()
+
+        # Written below in bulk; keep the unit of work (autoflush / commit) from
+        # emitting its own per-row UPDATEs for the same attributes
         for task in self.tasks.values():
-            self.session.add(task)
+            if inspect(task, raiseerr=False) is None:
+                break # Plain node records (load_engine) are not tracked by the session
+            for field in CPM_FIELDS:
+                set_committed_value(task, field, getattr(task, field))
+        for rel in self.relationships:
+            if inspect(rel, raiseerr=False) is None:
+                break
+            set_committed_value(rel, 'is_driving', rel.is_driving)
+
+        for start in range(0, len(task_rows), SAVE_BATCH_SIZE):
+            await self.session.execute(update(Task), task_rows[start:start + SAVE_BATCH_SIZE])
+        for start in range(0, len(rel_rows), SAVE_BATCH_SIZE):
+            await self.session.execute(update(TaskRelationship), rel_rows[start:start + SAVE_BATCH_SIZE])
+        self.mark_persisted()
+        return len(task_rows)
 
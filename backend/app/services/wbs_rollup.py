@@ -0,0 +1,197 @@
+"""
+WBS summary roll-up.
+
+Summary tasks take their dates, float, costs and progress from their children after CPM:
+min of starts, max of finishes, min of total float, sums of the EVM columns and percent
+complete weighted by original duration (a summary weighs the sum of its leaves' durations,
+not its own stored duration). The tree is processed bottom-up (deepest level
+first), so every node is aggregated once from its direct children, already final.
+An incremental roll-up only revisits the changed summaries and the ancestor chains of the
+changed tasks, and stops climbing where a summary's values did not change.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+
+from app.models.project import Task
+
+MIN_FIELDS = ('early_start', 'late_start', 'planned_start', 'actual_start', 'total_float')
+MAX_FIELDS = ('early_finish', 'late_finish', 'planned_end')
+SUM_FIELDS = ('planned_value', 'earned_value', 'actual_cost', 'budget_at_completion', 'estimate_at_completion')
+ROLLUP_FIELDS = MIN_FIELDS + MAX_FIELDS + SUM_FIELDS + ('actual_end', 'percent_complete')
+# Rows per bulk UPDATE statement
+WRITE_BATCH_SIZE = 2000
+
+
+class WbsNode:
+    __slots__ = ('id', 'wbs_code', 'path', 'outline_level', 'original_duration',
+                 'parent_id', 'children', 'depth', 'weight') + ROLLUP_FIELDS
+
+    def __init__(self, id: int, wbs_code: Optional[str] = None, path: Optional[str] = None,
+                 outline_level: Optional[int] = 1, original_duration: Optional[float] = 0.0, **values):
+        self.id = id
+        self.wbs_code = wbs_code
+        self.path = path
+        self.outline_level = outline_level or 1
+        self.original_duration = original_duration or 0.0
+        self.parent_id: Optional[int] = None
+        self.children: List[int] = []
+        self.depth = 0
+        self.weight = self.original_duration # Leaf durations summed, for summaries
+        for field in ROLLUP_FIELDS:
+            setattr(self, field, values.get(field))
+
+
+def _parent_key(key: Optional[str]) -> Optional[str]:
+    if not key or '.' not in key:
+        return None
+    return key.rsplit('.', 1)[0]
+
+
+class WbsRollup:
+    """
+    Builds the WBS tree of a project's tasks and rolls values up to its summaries.
+
+    The parent of a task is the task whose materialized path (or else WBS code) is its
+    own minus the last segment; tasks without either fall back to outline order: the
+    closest preceding task (by id, i.e. import order) one outline level up.
+    """
+    def __init__(self, nodes: Iterable[WbsNode]):
+        self.nodes: Dict[int, WbsNode] = {n.id: n for n in nodes}
+        self.build_tree()
+
+    def build_tree(self):
+        by_path = {n.path: n.id for n in self.nodes.values() if n.path}
+        by_wbs = {n.wbs_code: n.id for n in self.nodes.values() if n.wbs_code}
+        outline: List[int] = [] # outline[level - 1] = last task seen at that level
+
+        for t_id in sorted(self.nodes):
+            node = self.nodes[t_id]
+            parent = by_path.get(_parent_key(node.path))
+            if parent is None:
+                parent = by_wbs.get(_parent_key(node.wbs_code))
+            level = max(1, node.outline_level)
+            if parent is None and level > 1 and len(outline) >= level - 1:
+                parent = outline[level - 2]
+            del outline[level - 1:]
+            outline.extend([t_id] * (level - len(outline)))
+            if parent is not None and parent != t_id:
+                node.parent_id = parent
+                self.nodes[parent].children.append(t_id)
+
+        # Depths top-down (iterative; parents can have larger ids than their children)
+        for node in self.nodes.values():
+            node.depth = 0
+        roots = [n.id for n in self.nodes.values() if n.parent_id is None]
+        stack = list(roots)
+        seen = set(roots)
+        while stack:
+            node = self.nodes[stack.pop()]
+            for child in node.children:
+                if child in seen: # Malformed codes forming a loop: cut it
+                    continue
+                seen.add(child)
+                self.nodes[child].depth = node.depth + 1
+                stack.append(child)
+
+        # Percent complete weights bottom-up, so an incremental roll-up weighs untouched
+        # sibling summaries exactly as a full one does
+        for node in sorted(self.nodes.values(), key=lambda n: -n.depth):
+            if node.children:
+                node.weight = sum(self.nodes[c].weight for c in node.children)
+
+    def summaries(self) -> List[int]:
+        return [t_id for t_id, n in self.nodes.items() if n.children]
+
+    def aggregate(self, node: WbsNode) -> bool:
+        """Recomputes one summary from its direct children; True if any value changed."""
+        children = [self.nodes[c] for c in node.children]
+        before = tuple(getattr(node, f) for f in ROLLUP_FIELDS)
+
+        # A summary keeps its own value where none of its children have one
+        for fields, pick in ((MIN_FIELDS, min), (MAX_FIELDS, max)):
+            for field in fields:
+                values = [getattr(c, field) for c in children if getattr(c, field) is not None]
+                if values:
+                    setattr(node, field, pick(values))
+        for field in SUM_FIELDS:
+            setattr(node, field, sum(getattr(c, field) or 0.0 for c in children))
+        finishes = [c.actual_end for c in children]
+        node.actual_end = max(finishes) if finishes and all(f is not None for f in finishes) else None
+
+        weights = [c.weight for c in children]
+        total = sum(weights)
+        if total > 0:
+            node.percent_complete = sum(w * (c.percent_complete or 0.0) for w, c in zip(weights, children)) / total
+        else:
+            node.percent_complete = sum(c.percent_complete or 0.0 for c in children) / len(children)
+
+        return tuple(getattr(node, f) for f in ROLLUP_FIELDS) != before
+
+    def rollup(self, changed_ids: Optional[Iterable[int]] = None) -> Set[int]:
+        """
+        Rolls up every summary (changed_ids None) or only the ancestors of changed_ids,
+        starting with the changed ids that are summaries themselves (CPM schedules them
+        too; their own results must be replaced by the roll-up).
+        Returns the ids of summaries whose values changed.
+        """
+        if changed_ids is None:
+            pending = set(self.summaries())
+        else:
+            pending = set()
+            for t_id in changed_ids:
+                node = self.nodes.get(t_id)
+                if node is None:
+                    continue
+                if node.children:
+                    pending.add(t_id)
+                if node.parent_id is not None:
+                    pending.add(node.parent_id)
+        updated = set()
+        # Deepest first; a summary is final before its parent reads it
+        while pending:
+            depth = max(self.nodes[t_id].depth for t_id in pending)
+            level = [t_id for t_id in pending if self.nodes[t_id].depth == depth]
+            pending.difference_update(level)
+            for t_id in level:
+                node = self.nodes[t_id]
+                if self.aggregate(node):
+                    updated.add(t_id)
+                    if changed_ids is not None and node.parent_id is not None:
+                        pending.add(node.parent_id)
+        return updated
+
+    def rows(self, ids: Iterable[int]) -> List[Dict]:
+        return [
+            dict(id=t_id, **{f: getattr(self.nodes[t_id], f) for f in ROLLUP_FIELDS})
+            for t_id in ids
+        ]
+
+
+async def load_wbs(session: AsyncSession, project_id: int) -> WbsRollup:
+    """Column-projected load of the WBS fields of a project's tasks."""
+    columns = [Task.id, Task.wbs_code, Task.path, Task.outline_level, Task.original_duration]
+    columns += [getattr(Task, f) for f in ROLLUP_FIELDS]
+    result = await session.execute(select(*columns).where(Task.project_id == project_id))
+    nodes = []
+    for row in result.all():
+        values = row._mapping
+        nodes.append(WbsNode(
+            row.id, row.wbs_code, row.path, row.outline_level, row.original_duration,
+            **{f: values[f] for f in ROLLUP_FIELDS},
+        ))
+    return WbsRollup(nodes)
+
+
+async def rollup_project(session: AsyncSession, project_id: int,
+                         changed_ids: Optional[Iterable[int]] = None) -> Set[int]:
+    """
+    Rolls up a project's WBS (all summaries, or the ancestor chains of changed_ids) and
+    writes the summaries that changed with bulk UPDATEs. Returns their ids.
+    """
+    tree = await load_wbs(session, project_id)
+    updated = tree.rollup(changed_ids)
+    rows = tree.rows(sorted(updated))
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        await session.execute(update(Task), rows[start:start + WRITE_BATCH_SIZE])
+    return updated
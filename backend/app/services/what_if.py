@@ -0,0 +1,192 @@
+"""
+What-if scenario scheduling.
+
+A scenario is a list of hypothetical edits (durations, constraints, links) applied to a
+copy-on-write view of the project snapshot: only the edited tasks and links are copied,
+every other node is shared. The unedited snapshot is scheduled once as the reference and
+its results are kept, then the view is rescheduled incrementally from the edited tasks
+(over the shared nodes, whose CPM fields are scratch) and the two are diffed. Both runs go
+through schedule_executor.calculate, so large networks are scheduled in the process pool.
+Nothing is written back: the database is only read to build the snapshot.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.calendar_service import CalendarService
+from app.services.schedule_snapshot import ProjectSnapshot, RelNode, load_snapshots
+from app.services.schedule_cache import schedule_cache
+from app.services.schedule_executor import calculate
+from app.services.work_calendar import ProjectCalendar
+
+# Task fields a scenario may override
+TASK_EDIT_FIELDS = ('original_duration', 'constraint_type', 'constraint_date', 'calendar_id')
+LINK_ACTIONS = ('add', 'remove', 'update')
+
+
+def signed_hours(calendar, start: datetime, end: datetime) -> float:
+    """Working hours from start to end on the calendar; negative when end is earlier."""
+    if start is None or end is None:
+        return 0.0
+    return (calendar.to_offset(end) - calendar.to_offset(start)) / 60.0
+
+
+class WhatIfScenario:
+    """
+    Applies edits to a copy-on-write view of `snapshot` and reports what moved.
+
+    task_edits: [{"task_id", <any of TASK_EDIT_FIELDS>}] - only the given keys are changed.
+    link_edits: [{"action": "add"|"remove"|"update", "predecessor_id", "successor_id",
+    "type", "lag"}] - remove / update match the existing link by its two ends.
+    calendars: compiled calendars the edits switch tasks to, beyond the snapshot's own.
+    """
+    def __init__(self, snapshot: ProjectSnapshot, task_edits: Iterable[Dict] = (),
+                 link_edits: Iterable[Dict] = (), calendars: Optional[Dict[int, ProjectCalendar]] = None):
+        self.base = snapshot
+        self.task_edits = list(task_edits)
+        self.link_edits = list(link_edits)
+        self.calendars = calendars or {}
+
+    def edited_calendar_ids(self) -> Set[int]:
+        """Calendars the task edits switch to."""
+        return {e["calendar_id"] for e in self.task_edits if e.get("calendar_id") is not None}
+
+    def fork(self) -> ProjectSnapshot:
+        """The snapshot's node lists, sharing every node; apply() copies the ones it edits."""
+        scenario = ProjectSnapshot(self.base.project_id, self.base.calendar_id)
+        scenario.tasks = list(self.base.tasks)
+        scenario.relationships = list(self.base.relationships)
+        scenario.calendars = {**self.base.calendars, **self.calendars}
+        return scenario
+
+    def apply(self, scenario: ProjectSnapshot) -> Set[int]:
+        """
+        Applies the edits to `scenario` (see fork), copying each task or link before its
+        first edit; returns the task ids to reschedule from.
+        """
+        position = {t.id: i for i, t in enumerate(scenario.tasks)}
+        copied: Set[int] = set() # Edited task ids
+        owned: Set[int] = set() # id() of the links this scenario copied or added
+        changed = set()
+
+        for edit in self.task_edits:
+            i = position.get(edit["task_id"])
+            if i is None:
+                raise ValueError(f"Task {edit['task_id']} is not in project {scenario.project_id}")
+            if edit.get("calendar_id") is not None and edit["calendar_id"] not in scenario.calendars:
+                # The engine would quietly fall back to the project calendar
+                raise ValueError(f"Calendar {edit['calendar_id']} not found")
+            task = scenario.tasks[i]
+            if task.id not in copied:
+                task = scenario.tasks[i] = task.copy()
+                copied.add(task.id)
+            for field in TASK_EDIT_FIELDS:
+                if field in edit:
+                    setattr(task, field, edit[field])
+            changed.add(task.id)
+
+        for edit in self.link_edits:
+            action = edit.get("action", "add")
+            pred_id, succ_id = edit["predecessor_id"], edit["successor_id"]
+            if action not in LINK_ACTIONS:
+                raise ValueError(f"Unknown link action '{action}'")
+            for t_id in (pred_id, succ_id):
+                if t_id not in position:
+                    raise ValueError(f"Task {t_id} is not in project {scenario.project_id}")
+            if pred_id == succ_id:
+                raise ValueError(f"Task {pred_id} cannot depend on itself")
+
+            existing = [
+                r for r in scenario.relationships
+                if r.predecessor_id == pred_id and r.successor_id == succ_id
+            ]
+            if action == "add":
+                if existing:
+                    raise ValueError(f"Link {pred_id} -> {succ_id} already exists")
+                rel = RelNode(None, pred_id, succ_id, edit.get("type") or "FS", edit.get("lag") or 0.0)
+                scenario.relationships.append(rel)
+                owned.add(id(rel))
+            elif not existing:
+                raise ValueError(f"Link {pred_id} -> {succ_id} does not exist")
+            elif action == "remove":
+                scenario.relationships = [r for r in scenario.relationships if r not in existing]
+            else:
+                for rel in existing:
+                    if id(rel) not in owned:
+                        i = scenario.relationships.index(rel)
+                        rel = scenario.relationships[i] = rel.copy()
+                        owned.add(id(rel))
+                    if edit.get("type"):
+                        rel.type = edit["type"]
+                    if "lag" in edit:
+                        rel.lag = edit["lag"] or 0.0
+            changed.update((pred_id, succ_id))
+        return changed
+
+    async def run(self, data_date: datetime, progress_mode: Optional[str] = None, pool=None) -> Dict:
+        """
+        Schedules the reference and the scenario from the same data date and diffs them,
+        progress-aware like a schedule run when the project has actuals or progress_mode
+        is set; large networks run in `pool` (default: the shared pool). Raises ValueError
+        for invalid edits and ScheduleCycleError when an added link closes a loop.
+        """
+        base_engine = self.base.engine()
+        await calculate(base_engine, data_date, progress_mode, cache=schedule_cache, pool=pool)
+        calendar = base_engine.calendar
+        # The scenario reschedules over the shared nodes: keep the reference results
+        reference = {t_id: (t.early_start, t.early_finish, t.total_float) for t_id, t in base_engine.tasks.items()}
+        base_finish = base_engine.project_finish(data_date)
+
+        scenario = self.fork()
+        changed = self.apply(scenario)
+        engine = scenario.engine()
+        await calculate(engine, data_date, progress_mode, changed_ids=changed, pool=pool)
+
+        moved: List[Dict] = []
+        for t_id, task in engine.tasks.items():
+            before = reference[t_id]
+            if (task.early_start, task.early_finish, task.total_float) == before:
+                continue
+            before_start, before_finish, before_float = before
+            moved.append({
+                "task_id": t_id,
+                "early_start": task.early_start,
+                "early_finish": task.early_finish,
+                "late_start": task.late_start,
+                "late_finish": task.late_finish,
+                "total_float": task.total_float,
+                "baseline_early_start": before_start,
+                "baseline_early_finish": before_finish,
+                "baseline_total_float": before_float,
+                "start_delta_hours": signed_hours(calendar, before_start, task.early_start),
+                "finish_delta_hours": signed_hours(calendar, before_finish, task.early_finish),
+            })
+        moved.sort(key=lambda t: (t["early_start"], t["task_id"]))
+
+        finish = engine.project_finish(data_date)
+        return {
+            "project_id": self.base.project_id,
+            "data_date": data_date,
+            "baseline_finish": base_finish,
+            "scenario_finish": finish,
+            "finish_delta_hours": signed_hours(calendar, base_finish, finish),
+            "critical_task_ids": sorted(
+                t_id for t_id, t in engine.tasks.items() if t.total_float is not None and t.total_float <= 0
+            ),
+            "changed_tasks": moved,
+        }
+
+
+async def run_what_if(session: AsyncSession, project_id: int, data_date: datetime,
+                      task_edits: Iterable[Dict] = (), link_edits: Iterable[Dict] = (),
+                      progress_mode: Optional[str] = None) -> Optional[Dict]:
+    """Loads the project's snapshot (read-only) and runs the scenario; None if the project is unknown."""
+    snapshots = await load_snapshots(session, [project_id])
+    if project_id not in snapshots:
+        return None
+    snapshot = snapshots[project_id]
+    scenario = WhatIfScenario(snapshot, task_edits, link_edits)
+    scenario.calendars = await CalendarService(session).get_compiled_calendars(
+        scenario.edited_calendar_ids() - set(snapshot.calendars)
+    )
+    return await scenario.run(data_date, progress_mode)
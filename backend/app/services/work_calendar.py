@@ -0,0 +1,335 @@
+import hashlib
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, date, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+# Days compiled in one go when a query falls outside the current horizon.
+# The chunk doubles with the compiled span, so a long horizon costs O(log n) rebuilds.
+_MIN_CHUNK_DAYS = 366
+# Safety net for calendars without any working time.
+_MAX_HORIZON_DAYS = 366 * 200
+
+
+# Compiled calendars kept per (calendar_id, version)
+_COMPILED_CACHE_SIZE = 64
+
+Blocks = List[Tuple[int, int]]
+
+
+def _minutes_of(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def _parse_clock(val: str) -> int:
+    """'HH:MM' -> minutes since midnight ('24:00' allowed as end of day)."""
+    hours, minutes = val.strip().split(":")
+    total = int(hours) * 60 + int(minutes)
+    if not 0 <= total <= MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time of day: {val}")
+    return total
+
+
+def parse_blocks(raw: Optional[List[Any]]) -> Blocks:
+    """[["08:00", "12:00"], ...] -> sorted [(480, 720), ...]. None/[] means non-working."""
+    blocks = []
+    for pair in raw or []:
+        start, end = _parse_clock(pair[0]), _parse_clock(pair[1])
+        if end <= start:
+            raise ValueError(f"Working block must end after it starts: {pair}")
+        blocks.append((start, end))
+    blocks.sort()
+    for (_, prev_end), (start, _) in zip(blocks, blocks[1:]):
+        if start < prev_end:
+            raise ValueError("Working blocks must not overlap")
+    return blocks
+
+
+def parse_work_week(raw: Dict[Any, Any]) -> Dict[int, Blocks]:
+    """{"0": [["08:00", "12:00"]], ...} -> {0: [(480, 720)], ...} (0 = Monday)."""
+    week = {}
+    for day, blocks in (raw or {}).items():
+        weekday = int(day)
+        if not 0 <= weekday <= 6:
+            raise ValueError(f"Invalid weekday: {day}")
+        week[weekday] = parse_blocks(blocks)
+    return week
+
+
+class ProjectCalendar:
+    """
+    Handles working hours and days.
+    Default: Mon-Fri, 08:00-12:00, 13:00-17:00 (8 hours/day).
+    work_week / exceptions override the default pattern (see WorkCalendar).
+
+    The work pattern (exceptions included) is compiled lazily into a sorted array of working intervals
+    (minutes since an internal epoch) with cumulative working-minute prefix sums.
+    A date maps to its "working offset" (working minutes elapsed since the epoch)
+    with a binary search, so add / subtract / between cost O(log n) regardless
+    of the duration involved.
+    """
+    def __init__(
+        self,
+        work_week: Optional[Dict[int, Blocks]] = None,
+        exceptions: Optional[Dict[date, Blocks]] = None,
+        hours_per_day: float = 8.0,
+    ):
+        if work_week is None:
+            standard_day = [(_minutes_of(time(8, 0)), _minutes_of(time(12, 0))),
+                            (_minutes_of(time(13, 0)), _minutes_of(time(17, 0)))]
+            work_week = {d: standard_day for d in range(5)} # Mon-Fri
+        self.work_week = work_week
+        self.work_days = {d for d, blocks in work_week.items() if blocks}
+        self.exceptions = exceptions or {}
+        self.hours_per_day = hours_per_day
+
+        # Compiled interval index (see _compile_days)
+        self._epoch: Optional[datetime] = None
+        self._first_day: Optional[date] = None
+        self._last_day: Optional[date] = None  # exclusive
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._cum: List[int] = []  # working offset at the start of each interval
+        self._fingerprint: Optional[str] = None
+
+    def fingerprint(self) -> str:
+        """Stable digest of the work pattern; equal for calendars that schedule identically."""
+        if self._fingerprint is None:
+            content = repr((
+                sorted((d, tuple(blocks)) for d, blocks in self.work_week.items()),
+                sorted((d.isoformat(), tuple(blocks)) for d, blocks in self.exceptions.items()),
+                self.hours_per_day,
+            ))
+            self._fingerprint = hashlib.sha256(content.encode()).hexdigest()
+        return self._fingerprint
+
+    # ---------- Compilation ----------
+
+    def day_blocks(self, day: date) -> List[Tuple[int, int]]:
+        """Working blocks of a day as (start_minute, end_minute) pairs."""
+        blocks = self.exceptions.get(day)
+        if blocks is not None:
+            return blocks
+        return self.work_week.get(day.weekday(), [])
+
+    def _compile_days(self, first: date, last: date) -> Tuple[List[int], List[int]]:
+        """Builds merged working intervals for days in [first, last)."""
+        starts: List[int] = []
+        ends: List[int] = []
+        day = first
+        base = (first - self._first_day).days * MINUTES_PER_DAY
+        while day < last:
+            for b_start, b_end in self.day_blocks(day):
+                if b_end <= b_start:
+                    continue
+                s, e = base + b_start, base + b_end
+                if ends and ends[-1] == s:
+                    # Contiguous with the previous block (e.g. 24h calendars)
+                    ends[-1] = e
+                else:
+                    starts.append(s)
+                    ends.append(e)
+            day += timedelta(days=1)
+            base += MINUTES_PER_DAY
+        return starts, ends
+
+    def _extend_forward(self, until: date):
+        span = (self._last_day - self._first_day).days
+        new_last = max(until, self._last_day + timedelta(days=max(_MIN_CHUNK_DAYS, span)))
+        if (new_last - self._first_day).days > _MAX_HORIZON_DAYS:
+            raise ValueError("Calendar has no working time within the supported horizon")
+        starts, ends = self._compile_days(self._last_day, new_last)
+        total = self._cum[-1] + (self._ends[-1] - self._starts[-1]) if self._starts else 0
+        if starts and self._ends and self._ends[-1] == starts[0]:
+            self._ends[-1] = ends[0]
+            starts, ends = starts[1:], ends[1:]
+        for s, e in zip(starts, ends):
+            self._starts.append(s)
+            self._ends.append(e)
+            self._cum.append(total)
+            total += e - s
+        self._last_day = new_last
+
+    def _extend_backward(self, until: date):
+        span = (self._last_day - self._first_day).days
+        new_first = min(until, self._first_day - timedelta(days=max(_MIN_CHUNK_DAYS, span)))
+        if (self._last_day - new_first).days > _MAX_HORIZON_DAYS:
+            raise ValueError("Calendar has no working time within the supported horizon")
+        old_first = self._first_day
+        self._first_day = new_first
+        self._epoch = datetime.combine(new_first, time(0, 0))
+        # Existing intervals move with the epoch; their offsets must stay stable.
+        shift = (old_first - new_first).days * MINUTES_PER_DAY
+        old_starts = [s + shift for s in self._starts]
+        old_ends = [e + shift for e in self._ends]
+        old_cum = list(self._cum)
+        starts, ends = self._compile_days(new_first, old_first)
+        if starts and old_starts and ends[-1] == old_starts[0]:
+            s = starts.pop()
+            ends.pop()
+            old_cum[0] -= old_starts[0] - s
+            old_starts[0] = s
+        total = sum(e - s for s, e in zip(starts, ends))
+        offset = (old_cum[0] if old_cum else 0) - total
+        new_cum = []
+        for s, e in zip(starts, ends):
+            new_cum.append(offset)
+            offset += e - s
+        self._starts = starts + old_starts
+        self._ends = ends + old_ends
+        self._cum = new_cum + old_cum
+
+    def _ensure_day(self, day: date):
+        if self._epoch is None:
+            self._first_day = day
+            self._last_day = day
+            self._epoch = datetime.combine(day, time(0, 0))
+            self._extend_forward(day + timedelta(days=1))
+        if day < self._first_day:
+            self._extend_backward(day)
+        if day >= self._last_day:
+            self._extend_forward(day + timedelta(days=1))
+
+    def _ensure_offset(self, offset: int):
+        """Makes sure intervals exist strictly before and after the given offset."""
+        if self._epoch is None:
+            self._ensure_day(date.today())
+        while not self._starts or self._cum[0] >= offset:
+            self._extend_backward(self._first_day - timedelta(days=1))
+        while self._cum[-1] + (self._ends[-1] - self._starts[-1]) <= offset:
+            self._extend_forward(self._last_day + timedelta(days=1))
+
+    # ---------- Offset conversion ----------
+
+    def _minutes(self, dt: datetime) -> int:
+        """Wall-clock minutes since the epoch (sub-minute precision is dropped)."""
+        naive = dt.replace(tzinfo=None)
+        self._ensure_day(naive.date())
+        while not self._starts or self._starts[0] > (naive - self._epoch).total_seconds() // 60:
+            # Need a working interval at or before dt to anchor the offset
+            self._extend_backward(self._first_day - timedelta(days=1))
+        delta = naive - self._epoch
+        return delta.days * MINUTES_PER_DAY + delta.seconds // 60
+
+    def _to_datetime(self, minutes: int, tz) -> datetime:
+        return (self._epoch + timedelta(minutes=minutes)).replace(tzinfo=tz)
+
+    def to_offset(self, dt: datetime) -> int:
+        """Working minutes elapsed between the calendar epoch and dt."""
+        m = self._minutes(dt)
+        i = bisect_right(self._starts, m) - 1
+        return self._cum[i] + min(m - self._starts[i], self._ends[i] - self._starts[i])
+
+    def offset_to_minutes(self, offset: int, at_start: bool = True) -> int:
+        """
+        Wall-clock minute (since epoch) of a working offset.
+        Offsets on a block boundary are ambiguous: at_start=True returns the start
+        of the next block (start semantics), False the end of the previous one.
+        """
+        self._ensure_offset(offset)
+        if at_start:
+            i = bisect_right(self._cum, offset) - 1
+        else:
+            i = bisect_left(self._cum, offset) - 1
+        return self._starts[i] + (offset - self._cum[i])
+
+    def interval_index(self, min_offset: int, max_offset: int) -> Tuple[datetime, List[int], List[int]]:
+        """
+        (epoch, interval starts, cumulative offsets) covering [min_offset, max_offset],
+        for callers converting many offsets at once (see cpm_vectorized).
+        """
+        self._ensure_offset(min_offset)
+        self._ensure_offset(max_offset)
+        return self._epoch, self._starts, self._cum
+
+    def from_offset(self, offset: int, tz=None, at_start: bool = True) -> datetime:
+        minutes = self.offset_to_minutes(offset, at_start)
+        return self._to_datetime(minutes, tz)
+
+    # ---------- Public API ----------
+
+    def is_working_time(self, dt: datetime) -> bool:
+        m = self._minutes(dt)
+        i = bisect_right(self._starts, m) - 1
+        return i >= 0 and m < self._ends[i]
+
+    def next_working_moment(self, dt: datetime) -> datetime:
+        """Moves dt forward to the next valid working minute if it's currently non-working."""
+        if self.is_working_time(dt):
+            return dt
+        return self.from_offset(self.to_offset(dt), dt.tzinfo, at_start=True)
+
+    def prev_working_moment(self, dt: datetime) -> datetime:
+        """Moves dt backward to the end of the previous working block if it's currently non-working."""
+        if self.is_working_time(dt - timedelta(seconds=1)):
+            return dt
+        return self.from_offset(self.to_offset(dt), dt.tzinfo, at_start=False)
+
+    def add_working_duration(self, start: datetime, hours: float) -> datetime:
+        """Adds working hours to a start date."""
+        minutes = int(hours * 60)
+        if minutes == 0:
+            return start
+        if minutes < 0:
+            return self.subtract_working_duration(start, -hours)
+        # A duration that exactly fills a block finishes at the block end
+        return self.from_offset(self.to_offset(start) + minutes, start.tzinfo, at_start=False)
+
+    def subtract_working_duration(self, end: datetime, hours: float) -> datetime:
+        """Subtracts working hours from an end date."""
+        minutes = int(hours * 60)
+        if minutes == 0:
+            return end
+        if minutes < 0:
+            return self.add_working_duration(end, -hours)
+        # Landing exactly on a block boundary yields the block start
+        return self.from_offset(self.to_offset(end) - minutes, end.tzinfo, at_start=True)
+
+    def working_hours_between(self, start: datetime, end: datetime) -> float:
+        """Calculates working hours between two dates."""
+        if start >= end:
+            return 0.0
+        return max(0, self.to_offset(end) - self.to_offset(start)) / 60.0
+
+
+_compiled: "OrderedDict[Tuple[int, int], ProjectCalendar]" = OrderedDict()
+
+
+def compile_calendar(calendar) -> ProjectCalendar:
+    """
+    Returns the compiled ProjectCalendar for a WorkCalendar row (with exceptions loaded).
+    Memoized per (id, version), so the interval index built by earlier scheduling
+    runs is reused until the calendar is edited.
+    """
+    key = (calendar.id, calendar.version)
+    cached = _compiled.get(key)
+    if cached is not None:
+        _compiled.move_to_end(key)
+        return cached
+
+    exceptions: Dict[date, Blocks] = {}
+    for exc in sorted(calendar.exceptions, key=lambda e: e.start_date):
+        blocks = parse_blocks(exc.work_hours)
+        day = exc.start_date
+        while day <= exc.end_date:
+            exceptions[day] = blocks
+            day += timedelta(days=1)
+    compiled = ProjectCalendar(
+        work_week=parse_work_week(calendar.work_week),
+        exceptions=exceptions,
+        hours_per_day=calendar.hours_per_day or 8.0,
+    )
+    _compiled[key] = compiled
+    if len(_compiled) > _COMPILED_CACHE_SIZE:
+        _compiled.popitem(last=False)
+    return compiled
+
+
+def get_cached_calendar(calendar_id: int, version: int) -> Optional[ProjectCalendar]:
+    """Compiled calendar for (id, version) if it is already memoized."""
+    cached = _compiled.get((calendar_id, version))
+    if cached is not None:
+        _compiled.move_to_end((calendar_id, version))
+    return cached
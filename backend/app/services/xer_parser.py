@@ -0,0 +1,311 @@
+"""
+Primavera P6 XER import.
+
+An XER file is a tab-delimited dump of P6 tables: "%T <table>" starts a table, "%F" lists
+its fields and every "%R" line is one row, in the order P6 writes them (PROJECT,
+CALENDAR, PROJWBS, TASK, TASKPRED, ...). XerReader reads it in a single pass:
+
+- PROJECT gives the project title and default calendar;
+- CALENDAR rows become calendars (work week and exceptions from clndr_data);
+- PROJWBS nodes become summary tasks, and each node's chain of ids the WBS path
+  ("w12.w40"; activities get "w12.w40.t1001"), which the WBS rollup builds its tree from;
+- TASK rows become task dicts and TASKPRED rows (successor, predecessor, type, lag)
+  links, both produced lazily so neither table is held in memory.
+
+Only the calendar and WBS tables, which are small, are kept while reading.
+"""
+import itertools
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.services.work_calendar import parse_blocks
+
+# P6 codes -> Task fields
+XER_LINK_TYPES = {"PR_FS": "FS", "PR_SS": "SS", "PR_FF": "FF", "PR_SF": "SF"}
+XER_STATUS = {"TK_NotStart": "not_started", "TK_Active": "in_progress", "TK_Complete": "completed"}
+XER_PRIORITY = {"PT_Top": "Critical", "PT_High": "High", "PT_Normal": "Medium", "PT_Low": "Low", "PT_Lowest": "Low"}
+XER_MILESTONES = ("TT_Mile", "TT_FinMile")
+# The engine knows start-no-earlier / finish-no-later: "on" and mandatory dates keep their binding side
+XER_CONSTRAINTS = {
+    "CS_MSOA": "start_no_earlier_than", "CS_MSO": "start_no_earlier_than", "CS_MANDSTART": "start_no_earlier_than",
+    "CS_MEOB": "finish_no_later_than", "CS_MEO": "finish_no_later_than", "CS_MANDFIN": "finish_no_later_than",
+}
+# Work week for calendars whose clndr_data has no DaysOfWeek (Mon-Fri, 08-12 / 13-17)
+STANDARD_WORK_WEEK = {str(d): [["08:00", "12:00"], ["13:00", "17:00"]] for d in range(5)}
+
+# "(0||name(attrs)" nodes of clndr_data, in document order
+_CLNDR_NODE = re.compile(r"\(0\|\|(\w+)\(([^()]*)\)")
+# clndr_data exception dates are day serials counted from this date
+_CLNDR_EPOCH = date(1899, 12, 30)
+# Marks the end of the TASK table in XerReader's event stream
+_END_OF_TASKS = ("end_of_tasks", None)
+
+
+def _float(val: Optional[str]) -> float:
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _date(val: Optional[str]) -> Optional[datetime]:
+    """XER dates are 'YYYY-MM-DD HH:MM'."""
+    if not val:
+        return None
+    try:
+        return datetime.strptime(val.strip(), "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+
+
+def _clndr_block(attrs: Dict[str, str]) -> Optional[List[str]]:
+    start, finish = attrs.get("s"), attrs.get("f")
+    if not start or not finish:
+        return None
+    if finish == "00:00" or finish < start: # Runs to midnight
+        finish = "24:00"
+    return [start, finish]
+
+
+def parse_clndr_data(data: str) -> Tuple[Optional[Dict[str, List]], List[Dict]]:
+    """
+    P6 clndr_data -> (work_week, exceptions) in WorkCalendar / CalendarException form.
+    work_week is None when the data has no DaysOfWeek section. Consecutive exception days
+    with the same hours are merged into one range.
+    """
+    section = None
+    week: Dict[str, List] = {}
+    found_week = False
+    day: Optional[List] = None
+    days: List[Tuple[date, List]] = []
+    for name, raw_attrs in _CLNDR_NODE.findall(data or ""):
+        parts = raw_attrs.split("|")
+        attrs = dict(zip(parts[::2], parts[1::2]))
+        if not name.isdigit():
+            section = name if name in ("DaysOfWeek", "Exceptions") else None
+            found_week = found_week or name == "DaysOfWeek"
+            day = None
+        elif section == "DaysOfWeek" and not raw_attrs and 1 <= int(name) <= 7:
+            day = week.setdefault(str((int(name) + 5) % 7), []) # P6: 1 = Sunday; here 0 = Monday
+        elif section == "Exceptions" and "d" in attrs:
+            try:
+                day = []
+                days.append((_CLNDR_EPOCH + timedelta(days=int(float(attrs["d"]))), day))
+            except ValueError:
+                day = None
+        elif day is not None:
+            block = _clndr_block(attrs)
+            if block:
+                day.append(block)
+
+    work_week = None
+    if found_week:
+        work_week = {}
+        for weekday, blocks in week.items():
+            try:
+                if parse_blocks(blocks):
+                    work_week[weekday] = blocks
+            except ValueError:
+                continue
+
+    exceptions: List[Dict] = []
+    for when, blocks in sorted(days, key=lambda d: d[0]):
+        try:
+            hours = blocks if parse_blocks(blocks) else None
+        except ValueError:
+            continue
+        last = exceptions[-1] if exceptions else None
+        if last and last["end_date"] + timedelta(days=1) == when and last["work_hours"] == hours:
+            last["end_date"] = when
+        elif not (last and last["end_date"] >= when):
+            exceptions.append({"name": "P6 exception", "start_date": when, "end_date": when, "work_hours": hours})
+    return work_week, exceptions
+
+
+class XerReader:
+    def __init__(self, source):
+        self.source = source
+        self.encoding: Optional[str] = None
+        self.title: Optional[str] = None
+        self.calendar_ref: Optional[str] = None # Default calendar of the (first) project
+        self.calendars: List[Dict] = []
+        self.wbs: Dict[str, Dict[str, str]] = {} # wbs_id -> PROJWBS row
+        self.wbs_nodes: Dict[str, Tuple[str, str, int]] = {} # wbs_id -> (path, code, depth)
+        self.early_links: List[Tuple] = [] # TASKPRED rows met before the end of TASK
+        self.tasks_done = False
+        self.events = self._read()
+
+    def tasks(self) -> Iterator[Dict]:
+        """WBS summary tasks, then activities; stops at the end of the TASK table."""
+        for kind, item in self.events:
+            if kind == "task":
+                yield item
+            elif kind == "link":
+                self.early_links.append(item)
+            else:
+                break
+        self.tasks_done = True
+
+    def relationships(self) -> Iterator[Tuple[str, str, str, float]]:
+        """(successor task_id, predecessor task_id, type, lag hours), read after tasks()."""
+        if not self.tasks_done: # Not consumed by the caller: skip to the links
+            for _ in self.tasks():
+                pass
+        yield from self.early_links
+        self.early_links = []
+        for kind, item in self.events:
+            if kind == "link":
+                yield item
+
+    def _decode(self, raw: bytes) -> str:
+        # P6 writes the client's code page; settle it on the first non-ASCII line
+        if self.encoding is None and raw.startswith(b"\xef\xbb\xbf"):
+            raw, self.encoding = raw[3:], "utf-8"
+        if self.encoding is None and not raw.isascii():
+            for encoding in ("utf-8", "gbk", "cp1252"):
+                try:
+                    raw.decode(encoding)
+                    self.encoding = encoding
+                    break
+                except UnicodeDecodeError:
+                    continue
+        return raw.decode(self.encoding or "utf-8", errors="replace")
+
+    def _read(self):
+        table = None
+        fields: List[str] = []
+        for raw in self.source:
+            line = self._decode(raw).rstrip("\r\n")
+            tag, _, rest = line.partition("\t")
+            if tag == "%R":
+                row = dict(zip(fields, rest.split("\t")))
+                if table == "TASK":
+                    yield "task", self._activity(row)
+                elif table == "TASKPRED":
+                    link = self._link(row)
+                    if link is not None:
+                        yield "link", link
+                elif table == "PROJWBS":
+                    self.wbs[row.get("wbs_id", "")] = row
+                elif table == "CALENDAR":
+                    self.calendars.append(self._calendar(row))
+                elif table == "PROJECT" and self.title is None:
+                    self.title = row.get("proj_short_name") or None
+                    self.calendar_ref = row.get("clndr_id") or None
+            elif tag == "%F":
+                fields = rest.split("\t")
+            elif tag in ("%T", "%E"):
+                yield from self._end_table(table)
+                table = rest.strip() if tag == "%T" else None
+                fields = []
+                if tag == "%E":
+                    break
+        yield from self._end_table(table)
+
+    def _end_table(self, table: Optional[str]):
+        if table == "PROJWBS":
+            yield from (("task", summary) for summary in self._wbs_summaries())
+        elif table == "TASK":
+            yield _END_OF_TASKS
+
+    def _wbs_summaries(self) -> Iterator[Dict]:
+        """Resolves WBS paths and yields one summary task per node, parents first."""
+        children: Dict[Optional[str], List[Dict]] = {}
+        named = False
+        for row in self.wbs.values():
+            if row.get("proj_node_flag") == "Y":
+                if not named: # The first project node carries the project's full name
+                    self.title = row.get("wbs_name") or self.title
+                    named = True
+                continue
+            parent = row.get("parent_wbs_id")
+            if parent not in self.wbs or self.wbs[parent].get("proj_node_flag") == "Y":
+                parent = None
+            children.setdefault(parent, []).append(row)
+
+        stack = [(row, "", "", 1) for row in reversed(self._ordered(children.get(None, [])))]
+        while stack:
+            row, parent_path, parent_code, depth = stack.pop()
+            wbs_id = row["wbs_id"]
+            if wbs_id in self.wbs_nodes: # Malformed parent links forming a loop
+                continue
+            short_name = row.get("wbs_short_name") or wbs_id
+            path = f"{parent_path}.w{wbs_id}" if parent_path else f"w{wbs_id}"
+            code = f"{parent_code}.{short_name}" if parent_code else short_name
+            self.wbs_nodes[wbs_id] = (path, code, depth)
+            yield {
+                "wbs_code": code, "path": path, "title": row.get("wbs_name") or short_name,
+                "is_summary": True, "outline_level": depth, "status": "not_started", "task_type": "task",
+            }
+            for child in reversed(self._ordered(children.get(wbs_id, []))):
+                stack.append((child, path, code, depth + 1))
+
+    @staticmethod
+    def _ordered(rows: List[Dict]) -> List[Dict]:
+        return sorted(rows, key=lambda r: (_float(r.get("seq_num")), r.get("wbs_short_name") or ""))
+
+    def _activity(self, row: Dict[str, str]) -> Dict:
+        task_id = row.get("task_id", "")
+        task_code = row.get("task_code") or task_id
+        wbs_path, wbs_code, depth = self.wbs_nodes.get(row.get("wbs_id"), ("", "", 0))
+        constraint_type = XER_CONSTRAINTS.get(row.get("cstr_type"))
+        return {
+            "wbs_code": f"{wbs_code}.{task_code}" if wbs_code else task_code,
+            "path": f"{wbs_path}.t{task_id}" if wbs_path else f"t{task_id}",
+            "title": row.get("task_name") or task_code,
+            "description": "",
+            "estimated_hours": _float(row.get("target_drtn_hr_cnt")),
+            "remaining_duration": _float(row.get("remain_drtn_hr_cnt")),
+            "priority": XER_PRIORITY.get(row.get("priority_type"), "Medium"),
+            "status": XER_STATUS.get(row.get("status_code"), "not_started"),
+            "task_type": "milestone" if row.get("task_type") in XER_MILESTONES else "task",
+            "planned_start": _date(row.get("target_start_date")) or _date(row.get("early_start_date")),
+            "planned_end": _date(row.get("target_end_date")) or _date(row.get("early_end_date")),
+            "actual_start": _date(row.get("act_start_date")),
+            "actual_end": _date(row.get("act_end_date")),
+            "percent_complete": _float(row.get("phys_complete_pct")),
+            "constraint_type": constraint_type,
+            "constraint_date": _date(row.get("cstr_date")) if constraint_type else None,
+            "calendar_ref": row.get("clndr_id") or None,
+            "xml_uid": task_id,
+            "is_summary": False,
+            "outline_level": depth + 1,
+        }
+
+    @staticmethod
+    def _link(row: Dict[str, str]) -> Optional[Tuple[str, str, str, float]]:
+        successor, predecessor = row.get("task_id"), row.get("pred_task_id")
+        if not successor or not predecessor:
+            return None
+        return successor, predecessor, XER_LINK_TYPES.get(row.get("pred_type"), "FS"), _float(row.get("lag_hr_cnt"))
+
+    @staticmethod
+    def _calendar(row: Dict[str, str]) -> Dict:
+        work_week, exceptions = parse_clndr_data(row.get("clndr_data", "").replace("\x7f", ""))
+        return {
+            "ref": row.get("clndr_id"),
+            "name": row.get("clndr_name") or f"P6 calendar {row.get('clndr_id')}",
+            "work_week": work_week if work_week is not None else STANDARD_WORK_WEEK,
+            "hours_per_day": _float(row.get("day_hr_cnt")) or 8.0,
+            "exceptions": exceptions,
+        }
+
+
+def parse_xer_stream(source) -> dict:
+    """
+    Parses an XER file object (binary) in one pass. "tasks" and "relationships" are
+    iterators over the stream and must be consumed in that order; "calendars" and
+    "title" are complete once the first task has been read, which is where P6 puts them.
+    """
+    reader = XerReader(source)
+    tasks = reader.tasks()
+    first = next(tasks, None)
+    return {
+        "title": reader.title or "Imported XER Project",
+        "calendar_ref": reader.calendar_ref,
+        "calendars": reader.calendars,
+        "tasks": itertools.chain([first], tasks) if first is not None else [],
+        "relationships": reader.relationships(),
+        "materials": [],
+    }
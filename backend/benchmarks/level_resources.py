@@ -0,0 +1,67 @@
+"""
+Resource leveling benchmark: levels a seeded random network against capacity-limited resources.
+
+    python benchmarks/level_resources.py --tasks 10000 --resources 50
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+from app.services.scheduling_engine import SchedulingEngine
+from app.services.resource_leveling import ResourceLeveler
+from app.models.project import Task, TaskRelationship
+
+
+def build_engine(n_tasks: int, n_resources: int, links_per_task: float, seed: int) -> SchedulingEngine:
+    rnd = random.Random(seed)
+    engine = SchedulingEngine(None, 1)
+    for i in range(1, n_tasks + 1):
+        engine.tasks[i] = Task(
+            id=i,
+            original_duration=rnd.choice([4, 8, 16, 24, 40, 80]),
+            priority=rnd.choice(['High', 'Medium', 'Medium', 'Low']),
+            resource_ids=rnd.sample(range(1, n_resources + 1), rnd.randint(1, 3)),
+        )
+    for _ in range(int(n_tasks * links_per_task)):
+        a = rnd.randint(1, n_tasks - 1)
+        b = rnd.randint(a + 1, min(n_tasks, a + 200)) # Mostly local links, like real WBS networks
+        rel = TaskRelationship(predecessor_id=a, successor_id=b, type='FS', lag=0)
+        engine.relationships.append(rel)
+        engine.preds.setdefault(b, []).append(rel)
+        engine.succs.setdefault(a, []).append(rel)
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--resources', type=int, default=50)
+    parser.add_argument('--capacity', type=float, default=3)
+    parser.add_argument('--links-per-task', type=float, default=1.5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    engine = build_engine(args.tasks, args.resources, args.links_per_task, args.seed)
+    started = time.perf_counter()
+    engine.calculate_dates(datetime(2024, 1, 1, 8, 0))
+    cpm_seconds = time.perf_counter() - started
+
+    cpm_finish = max(t.early_finish for t in engine.tasks.values())
+    leveler = ResourceLeveler(engine, {r: args.capacity for r in range(1, args.resources + 1)})
+    started = time.perf_counter()
+    result = leveler.level()
+    level_seconds = time.perf_counter() - started
+
+    print(f"tasks={args.tasks} resources={args.resources} relationships={len(engine.relationships)}")
+    print(f"cpm:      {cpm_seconds:.2f}s  finish {cpm_finish}")
+    print(f"leveling: {level_seconds:.2f}s  finish {result['project_finish']}  delayed {result['delayed_tasks']}")
+    print(f"peak usage <= capacity: {max(result['peak_usage'].values()) <= args.capacity}")
+
+
+if __name__ == '__main__':
+    main()
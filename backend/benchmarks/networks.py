@@ -0,0 +1,127 @@
+"""
+Seeded synthetic schedule networks for the benchmarks.
+
+Every generator returns (tasks, relationships) as lists of column dicts ready for a bulk
+INSERT (or for Task(**row) / TaskRelationship(**row)). Task ids are 1..n and every link
+points from a lower to a higher id, so the networks are acyclic by construction.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+Rows = Tuple[List[Dict], List[Dict]]
+
+DURATIONS = [0, 4, 8, 16, 24, 40, 80, 160]
+REL_TYPES = ['FS', 'FS', 'FS', 'FS', 'SS', 'SS', 'FF', 'SF'] # FS-heavy, like real schedules
+LAGS = [0, 0, 0, 0, 4, 8, 16, -4]
+# Engineering -> procurement -> construction -> commissioning, share of the activities
+EPC_PHASES = (0.25, 0.15, 0.45, 0.15)
+# Data date the benchmarks schedule from; constraint dates fall within 90 days of it
+DATA_DATE = datetime(2024, 1, 1, 8, 0)
+# Working hours a chain may span: ~50 years of 8h days, well inside the calendar's
+# 200-year horizon (a 200k-task chain at full durations would need ~1000 years)
+CHAIN_MAX_HOURS = 100000.0
+
+
+def _task(rnd: random.Random, project_id: int, t_id: int, constrain: float = 0.02) -> Dict:
+    row = {
+        "id": t_id, "project_id": project_id, "title": f"Activity {t_id}",
+        "original_duration": float(rnd.choice(DURATIONS)),
+    }
+    if rnd.random() < constrain:
+        row["constraint_type"] = 'start_no_earlier_than'
+        row["constraint_date"] = DATA_DATE + timedelta(hours=rnd.randrange(0, 24 * 90))
+    return row
+
+
+def _link(rnd: random.Random, project_id: int, pred: int, succ: int, mixed: bool = True) -> Dict:
+    if mixed:
+        rel_type, lag = rnd.choice(REL_TYPES), float(rnd.choice(LAGS))
+    else:
+        rel_type, lag = 'FS', 0.0
+    return {"project_id": project_id, "predecessor_id": pred, "successor_id": succ, "type": rel_type, "lag": lag}
+
+
+def layered(n: int, seed: int = 42, project_id: int = 1) -> Rows:
+    """
+    EPC-style network: ~sqrt(n) wide WBS layers with 1-3 links from the previous layer,
+    plus FS hand-offs from each phase into the next (e.g. IFC drawings releasing POs).
+    """
+    rnd = random.Random(seed)
+    tasks = [_task(rnd, project_id, i) for i in range(1, n + 1)]
+    rels = []
+    width = max(1, int(n ** 0.5))
+    layers = [list(range(start + 1, min(n, start + width) + 1)) for start in range(0, n, width)]
+    for prev, layer in zip(layers, layers[1:]):
+        for succ in layer:
+            for pred in rnd.sample(prev, min(len(prev), rnd.randint(1, 3))):
+                rels.append(_link(rnd, project_id, pred, succ))
+
+    bounds = [0]
+    for share in EPC_PHASES:
+        bounds.append(min(n, bounds[-1] + int(round(n * share))))
+    bounds[-1] = n
+    phases = [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+    for (a0, a1), (b0, b1) in zip(phases, phases[1:]):
+        for _ in range(max(1, (b1 - b0) // 20)):
+            rels.append(_link(rnd, project_id, rnd.randint(a0 + 1, a1), rnd.randint(b0 + 1, b1), mixed=False))
+    return tasks, rels
+
+
+def chain(n: int, seed: int = 42, project_id: int = 1) -> Rows:
+    """
+    Long serial chain: worst case for depth (one task per topological level). Durations
+    and lags are scaled down so the chain spans at most CHAIN_MAX_HOURS.
+    """
+    rnd = random.Random(seed)
+    tasks = [_task(rnd, project_id, i, constrain=0.0) for i in range(1, n + 1)]
+    rels = [_link(rnd, project_id, i, i + 1) for i in range(1, n)]
+
+    span = sum(t["original_duration"] for t in tasks) + sum(max(r["lag"], 0.0) for r in rels)
+    if span > CHAIN_MAX_HOURS:
+        scale = CHAIN_MAX_HOURS / span
+        for row in tasks:
+            row["original_duration"] = round(row["original_duration"] * scale, 2)
+        for row in rels:
+            row["lag"] = round(row["lag"] * scale, 2)
+    return tasks, rels
+
+
+def fan(n: int, seed: int = 42, project_id: int = 1, width: int = 500) -> Rows:
+    """Wide fan-out / fan-in: hubs that release, then collect, up to `width` parallel activities."""
+    rnd = random.Random(seed)
+    tasks = [_task(rnd, project_id, i) for i in range(1, n + 1)]
+    rels = []
+    hub = 1
+    while hub < n:
+        end = min(n, hub + width + 1) # Next hub
+        for t_id in range(hub + 1, end):
+            rels.append(_link(rnd, project_id, hub, t_id))
+            rels.append(_link(rnd, project_id, t_id, end))
+        hub = end
+    return tasks, rels
+
+
+def mixed(n: int, seed: int = 42, project_id: int = 1, links_per_task: float = 2.0) -> Rows:
+    """Random local links (window of 200 ids) with mixed FS/SS/FF/SF types and lags."""
+    rnd = random.Random(seed)
+    tasks = [_task(rnd, project_id, i) for i in range(1, n + 1)]
+    rels = []
+    seen = set()
+    for _ in range(int(n * links_per_task)):
+        a = rnd.randint(1, max(1, n - 1))
+        b = rnd.randint(a + 1, min(n, a + 200)) if a < n else n
+        if a == b or (a, b) in seen:
+            continue
+        seen.add((a, b))
+        rels.append(_link(rnd, project_id, a, b))
+    return tasks, rels
+
+
+GENERATORS: Dict[str, Callable[..., Rows]] = {
+    "layered": layered,
+    "chain": chain,
+    "fan": fan,
+    "mixed": mixed,
+}
+
@@ -0,0 +1,220 @@
+"""
+Scheduling engine benchmark: times each stage of a schedule run on synthetic networks.
+
+Each (network, size) case is inserted into an in-process SQLite database and then timed
+stage by stage: full-entity and column-projected loads, topological sort, the Python
+forward and backward passes, the NumPy backend, and persistence (first full write and
+an incremental reschedule). A ProjectCalendar micro-benchmark runs once per invocation.
+Results are written as JSON; --compare prints the ratio against an earlier result file.
+A case that fails records its error and the stages timed so far, and the run goes on.
+
+    python benchmarks/schedule_engine.py --sizes 1000,10000 --output bench.json
+    python benchmarks/schedule_engine.py --networks chain --sizes 200000 --compare bench.json
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import random
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.core.database import Base
+from app.models.project import Project, Task, TaskRelationship
+from app.services.scheduling_engine import SchedulingEngine
+from app.services.schedule_snapshot import load_engine
+from app.services.work_calendar import ProjectCalendar
+from benchmarks.networks import GENERATORS, DATA_DATE
+
+INSERT_BATCH_SIZE = 5000
+
+
+class Timer:
+    """Collects named stage durations (seconds)."""
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, name: str):
+        gc.collect() # Don't bill the previous stage's garbage to this one
+        started = time.perf_counter()
+        yield
+        self.stages[name] = round(time.perf_counter() - started, 6)
+
+
+async def seed_database(session_factory, tasks: List[Dict], rels: List[Dict]):
+    async with session_factory() as session:
+        await session.execute(insert(Project), [{"id": 1, "title": "Benchmark", "status": "active"}])
+        for start in range(0, len(tasks), INSERT_BATCH_SIZE):
+            await session.execute(insert(Task), tasks[start:start + INSERT_BATCH_SIZE])
+        for start in range(0, len(rels), INSERT_BATCH_SIZE):
+            await session.execute(insert(TaskRelationship), rels[start:start + INSERT_BATCH_SIZE])
+        await session.commit()
+
+
+async def run_case(network: str, n: int, seed: int) -> Dict:
+    tasks, rels = GENERATORS[network](n, seed=seed)
+    db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with db_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    timer = Timer()
+    case = {"network": network, "tasks": len(tasks), "relationships": len(rels), "seed": seed}
+    try:
+        with timer("seed_database"):
+            await seed_database(session_factory, tasks, rels)
+
+        async with session_factory() as session:
+            with timer("load_entities"):
+                await SchedulingEngine(session, 1).load_data()
+
+        async with session_factory() as session:
+            with timer("load_projected"):
+                engine = await load_engine(session, 1)
+
+            with timer("topological_sort"):
+                order = engine.topological_sort()
+            start = engine.calendar.next_working_moment(DATA_DATE)
+            with timer("forward_pass"):
+                for t_id in order:
+                    engine.compute_early_dates(engine.tasks[t_id], start)
+            with timer("backward_pass"):
+                finish = engine.project_finish(start)
+                for t_id in reversed(order):
+                    engine.compute_late_dates(engine.tasks[t_id], finish)
+
+            with timer("persist_full"):
+                case["rows_written_full"] = await engine.save_dates()
+                await session.commit()
+
+            if engine.supports_vectorized():
+                numpy_engine = await load_engine(session, 1)
+                with timer("numpy_calculate_dates"):
+                    numpy_engine.calculate_dates(DATA_DATE, backend="numpy")
+
+            # Incremental: lengthen one activity in the middle of the network
+            edited = order[len(order) // 2]
+            engine.tasks[edited].original_duration = (engine.tasks[edited].original_duration or 0) + 40
+            with timer("reschedule_incremental"):
+                engine.reschedule({edited}, DATA_DATE)
+            with timer("persist_incremental"):
+                case["rows_written_incremental"] = await engine.save_dates()
+                await session.commit()
+        case["project_finish"] = finish.isoformat()
+    except Exception as e:
+        case["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        await db_engine.dispose()
+    case["timings"] = timer.stages
+    return case
+
+
+def calendar_benchmark(operations: int, seed: int) -> Dict:
+    """add / subtract / between with random inputs on a calendar with 30 holidays over three years."""
+    rnd = random.Random(seed)
+    holidays = {date(2024, 1, 1) + timedelta(days=d): [] for d in rnd.sample(range(3 * 365), 30)}
+    calendar = ProjectCalendar(exceptions=holidays)
+    starts = [DATA_DATE + timedelta(minutes=rnd.randrange(0, 3 * 365 * 24 * 60)) for _ in range(operations)]
+    hours = [rnd.choice([1, 8, 40, 160, 800]) for _ in range(operations)]
+    timer = Timer()
+    with timer("compile"):
+        calendar.next_working_moment(DATA_DATE + timedelta(days=5 * 365))
+    with timer("add_working_duration"):
+        ends = [calendar.add_working_duration(s, h) for s, h in zip(starts, hours)]
+    with timer("subtract_working_duration"):
+        for e, h in zip(ends, hours):
+            calendar.subtract_working_duration(e, h)
+    with timer("working_hours_between"):
+        for s, e in zip(starts, ends):
+            calendar.working_hours_between(s, e)
+    return {"operations": operations, "timings": timer.stages}
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(__file__), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": numpy_version,
+        "platform": platform.platform(),
+    }
+
+
+def compare(current: Dict, baseline: Dict):
+    """Prints current / baseline time per stage for cases present in both files."""
+    previous = {(c["network"], c["tasks"]): c for c in baseline.get("cases", [])}
+    print(f"\ncompared with {baseline.get('environment', {}).get('commit')} (ratio < 1 is faster)")
+    for case in current["cases"]:
+        old = previous.get((case["network"], case["tasks"]))
+        if old is None:
+            continue
+        ratios = [
+            f"{stage} {seconds / old['timings'][stage]:.2f}x"
+            for stage, seconds in case["timings"].items()
+            if old["timings"].get(stage)
+        ]
+        print(f"  {case['network']:8} {case['tasks']:>7}: " + ", ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--networks', default=','.join(GENERATORS), help="comma separated: " + ', '.join(GENERATORS))
+    parser.add_argument('--sizes', default='1000,10000', help="comma separated task counts (1000 to 200000)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--calendar-ops', type=int, default=100000)
+    parser.add_argument('--output', default='schedule_benchmark.json')
+    parser.add_argument('--compare', help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    networks = [n.strip() for n in args.networks.split(',') if n.strip()]
+    unknown = set(networks) - set(GENERATORS)
+    if unknown:
+        parser.error(f"unknown networks: {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    results = {"environment": environment(), "cases": [], "calendar": calendar_benchmark(args.calendar_ops, args.seed)}
+    print(f"calendar ({args.calendar_ops} ops): {results['calendar']['timings']}")
+    for network in networks:
+        for n in sizes:
+            case = asyncio.run(run_case(network, n, args.seed))
+            results["cases"].append(case)
+            stages = ", ".join(f"{k} {v:.3f}s" for k, v in case["timings"].items())
+            if "error" in case:
+                stages += f" FAILED: {case['error']}"
+            print(f"{network:8} {case['tasks']:>7} tasks {case['relationships']:>7} links: {stages}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
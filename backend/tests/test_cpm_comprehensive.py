@@ -221,5 +221,30 @@ class TestCPMComprehensive(unittest.TestCase):
         self.assertTrue(t2.total_float > 0)
         self.assertAlmostEqual(t3.total_float, 0.0)
 
+    def test_free_float_and_driving(self):
+        # A (5d) -> C, B (2d) -> C, D (1d) -SS+8h-> C, E (1d) with no successors
+        t1 = self.create_task(1, 40)
+        t2 = self.create_task(2, 16)
+        t3 = self.create_task(3, 16)
+        t4 = self.create_task(4, 8)
+        t5 = self.create_task(5, 8)
+        r1 = TaskRelationship(predecessor_id=1, successor_id=3, type='FS', lag=0)
+        r2 = TaskRelationship(predecessor_id=2, successor_id=3, type='FS', lag=0)
+        r3 = TaskRelationship(predecessor_id=4, successor_id=3, type='SS', lag=8)
+
+        self.setup_graph([t1, t2, t3, t4, t5], [r1, r2, r3])
+        self.engine.calculate_dates(datetime(2024, 1, 1, 8, 0))
+
+        # Only A -> C drives C's early start (Mon Jan 8 08:00)
+        self.assertEqual([r.is_driving for r in (r1, r2, r3)], [True, False, False])
+        self.assertAlmostEqual(t1.free_float, 0.0)
+        # B finishes Tue 17:00: 3 working days before C starts
+        self.assertAlmostEqual(t2.free_float, 24.0)
+        # D imposes Tue 08:00 on C (SS + 8h): 4 working days
+        self.assertAlmostEqual(t4.free_float, 32.0)
+        # E has no successor: float to the project finish (Tue Jan 9 17:00)
+        self.assertAlmostEqual(t5.free_float, 48.0)
+        self.assertAlmostEqual(t5.free_float, t5.total_float)
+
 if __name__ == '__main__':
     unittest.main()
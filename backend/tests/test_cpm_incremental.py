@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.scheduling_engine import SchedulingEngine
+from app.models.project import Task, TaskRelationship
+
+CPM_FIELDS = ['early_start', 'early_finish', 'late_start', 'late_finish', 'total_float', 'free_float']
+START = datetime(2024, 1, 1, 8, 0)
+
+class TestIncrementalReschedule(unittest.TestCase):
+    def build_engine(self, tasks, rels):
+        engine = SchedulingEngine(None, 1)
+        engine.tasks = {t.id: t for t in tasks}
+        engine.relationships = list(rels)
+        for rel in rels:
+            engine.preds.setdefault(rel.successor_id, []).append(rel)
+            engine.succs.setdefault(rel.predecessor_id, []).append(rel)
+        return engine
+
+    def random_network(self, seed, n=120, m=240):
+        rnd = random.Random(seed)
+        tasks = [Task(id=1, original_duration=0)] # Unconstrained start milestone anchors the project
+        for i in range(2, n + 1):
+            constraint_type = constraint_date = None
+            if rnd.random() < 0.05:
+                constraint_type = rnd.choice(['start_no_earlier_than', 'finish_no_later_than'])
+                constraint_date = datetime(2024, 1, 1) + timedelta(hours=rnd.randrange(0, 24 * 90))
+            tasks.append(Task(id=i, original_duration=rnd.choice([0, 4, 8, 16, 40]),
+                              constraint_type=constraint_type, constraint_date=constraint_date))
+        rels = []
+        for _ in range(m):
+            a, b = sorted(rnd.sample(range(1, n + 1), 2))
+            rels.append(TaskRelationship(predecessor_id=a, successor_id=b,
+                                         type=rnd.choice(['FS', 'FS', 'SS', 'FF', 'SF']),
+                                         lag=rnd.choice([0, 0, 8, -8, 4])))
+        return tasks, rels
+
+    def edit(self, seed, tasks, rels):
+        """Applies a random Gantt edit; returns (relationships, changed task ids)."""
+        rnd = random.Random(seed * 7919)
+        task = rnd.choice(tasks[1:])
+        kind = rnd.choice(['duration', 'constraint', 'links'])
+        if kind == 'duration':
+            task.original_duration = rnd.choice([0, 8, 80, 400])
+            return rels, {task.id}
+        if kind == 'constraint':
+            task.constraint_type = 'start_no_earlier_than'
+            task.constraint_date = datetime(2024, 1, 1) + timedelta(hours=rnd.randrange(0, 24 * 120))
+            return rels, {task.id}
+        # Replace the task's predecessors, as update_task does
+        changed = {task.id} | {r.predecessor_id for r in rels if r.successor_id == task.id}
+        rels = [r for r in rels if r.successor_id != task.id]
+        for pred_id in rnd.sample(range(1, task.id), min(2, task.id - 1)):
+            rels.append(TaskRelationship(predecessor_id=pred_id, successor_id=task.id, type='FS', lag=rnd.choice([0, 16])))
+            changed.add(pred_id)
+        return rels, changed
+
+    def test_matches_full_recalculation(self):
+        for seed in range(25):
+            tasks, rels = self.random_network(seed)
+            engine = self.build_engine(tasks, rels)
+            engine.calculate_dates(START, backend="python")
+            before = {t.id: tuple(getattr(t, f) for f in CPM_FIELDS) for t in tasks}
+
+            rels, changed = self.edit(seed, tasks, rels)
+            engine = self.build_engine(tasks, rels)
+            updated = engine.reschedule(changed, START)
+            incremental = {t.id: tuple(getattr(t, f) for f in CPM_FIELDS) for t in tasks}
+
+            full_tasks, full_rels = self.random_network(seed)
+            full_rels, _ = self.edit(seed, full_tasks, full_rels)
+            self.build_engine(full_tasks, full_rels).calculate_dates(START, backend="python")
+            for t in full_tasks:
+                self.assertEqual(incremental[t.id], tuple(getattr(t, f) for f in CPM_FIELDS), f"seed {seed}, task {t.id}")
+            self.assertEqual(updated, {t_id for t_id in before if before[t_id] != incremental[t_id]})
+            self.assertEqual([r.is_driving for r in rels], [r.is_driving for r in full_rels], f"seed {seed}")
+
+    def test_unchanged_edit_touches_nothing_downstream(self):
+        tasks = [Task(id=i, original_duration=8) for i in range(1, 5)]
+        rels = [TaskRelationship(predecessor_id=i, successor_id=i + 1, type='FS', lag=0) for i in range(1, 4)]
+        engine = self.build_engine(tasks, rels)
+        engine.calculate_dates(START)
+        self.assertEqual(engine.reschedule({2}, START), set())
+
+        tasks[1].original_duration = 16
+        self.assertEqual(engine.reschedule({2}, START), {2, 3, 4}) # Task 1 stays put
+        self.assertEqual(tasks[3].early_finish, datetime(2024, 1, 5, 17, 0))
+
+    def test_unscheduled_network_falls_back_to_full_run(self):
+        tasks = [Task(id=1, original_duration=8), Task(id=2, original_duration=8)]
+        rels = [TaskRelationship(predecessor_id=1, successor_id=2, type='FS', lag=0)]
+        engine = self.build_engine(tasks, rels)
+        self.assertEqual(engine.reschedule({2}, START), {1, 2})
+        self.assertEqual(tasks[1].early_finish, datetime(2024, 1, 2, 17, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import scheduling_engine
+from app.services.scheduling_engine import SchedulingEngine
+from app.models.project import Task, TaskRelationship
+from tests import test_cpm_comprehensive
+
+CPM_FIELDS = ['early_start', 'early_finish', 'late_start', 'late_finish', 'total_float', 'free_float']
+
+class NumpyEngine(SchedulingEngine):
+    def calculate_dates(self, project_start_date, backend="numpy"):
+        return super().calculate_dates(project_start_date, backend=backend)
+
+class TestCPMComprehensiveVectorized(test_cpm_comprehensive.TestCPMComprehensive):
+    """Runs the comprehensive CPM cases against the NumPy backend."""
+    def setUp(self):
+        super().setUp()
+        self.engine = NumpyEngine(None, 1)
+
+class TestVectorizedMatchesPython(unittest.TestCase):
+    def build_engine(self, tasks, rels):
+        engine = SchedulingEngine(None, 1)
+        engine.tasks = {t.id: t for t in tasks}
+        engine.relationships = rels
+        for rel in rels:
+            engine.preds.setdefault(rel.successor_id, []).append(rel)
+            engine.succs.setdefault(rel.predecessor_id, []).append(rel)
+        return engine
+
+    def random_network(self, seed, n=150, m=300):
+        rnd = random.Random(seed)
+        tasks = []
+        for i in range(1, n + 1):
+            constraint_type = constraint_date = None
+            if rnd.random() < 0.05:
+                constraint_type = rnd.choice(['start_no_earlier_than', 'finish_no_later_than'])
+                constraint_date = datetime(2024, 1, 1) + timedelta(hours=rnd.randrange(0, 24 * 90))
+            tasks.append(Task(id=i, original_duration=rnd.choice([0, 4, 8, 16, 40, rnd.uniform(0, 80)]),
+                              constraint_type=constraint_type, constraint_date=constraint_date))
+        rels = []
+        for _ in range(m):
+            a, b = sorted(rnd.sample(range(1, n + 1), 2))
+            rels.append(TaskRelationship(predecessor_id=a, successor_id=b,
+                                         type=rnd.choice(['FS', 'FS', 'SS', 'FF', 'SF']),
+                                         lag=rnd.choice([0, 0, 8, -8, 4, rnd.uniform(-16, 16)])))
+        return tasks, rels
+
+    def test_random_networks_identical(self):
+        start = datetime(2024, 1, 1, 8, 0)
+        for seed in range(10):
+            tasks, rels = self.random_network(seed)
+            python_engine = self.build_engine(tasks, rels)
+            python_engine.calculate_dates(start, backend="python")
+            expected = {t.id: tuple(getattr(t, f) for f in CPM_FIELDS) for t in tasks}
+            expected_driving = [r.is_driving for r in rels]
+
+            numpy_engine = self.build_engine(tasks, rels)
+            numpy_engine.calculate_dates(start, backend="numpy")
+            for t in tasks:
+                self.assertEqual(tuple(getattr(t, f) for f in CPM_FIELDS), expected[t.id], f"seed {seed}, task {t.id}")
+            self.assertEqual([r.is_driving for r in rels], expected_driving, f"seed {seed}")
+
+    def test_cycle_detected(self):
+        tasks = [Task(id=1, original_duration=8), Task(id=2, original_duration=8)]
+        rels = [
+            TaskRelationship(predecessor_id=1, successor_id=2, type='FS', lag=0),
+            TaskRelationship(predecessor_id=2, successor_id=1, type='FS', lag=0),
+        ]
+        engine = self.build_engine(tasks, rels)
+        with self.assertRaises(ValueError):
+            engine.calculate_dates(datetime(2024, 1, 1, 8, 0), backend="numpy")
+    def test_auto_backend_needs_wide_layers(self):
+        def parallel_chains(k, n=40):
+            tasks = [Task(id=i, original_duration=8) for i in range(1, n + 1)]
+            rels = [TaskRelationship(predecessor_id=i, successor_id=i + k, type='FS', lag=0) for i in range(1, n - k + 1)]
+            return self.build_engine(tasks, rels)
+
+        vectorized = []
+        calculate_vectorized = scheduling_engine.calculate_dates_vectorized
+        def record(engine, start):
+            vectorized.append(len(engine.tasks))
+            return calculate_vectorized(engine, start)
+
+        start = datetime(2024, 1, 1, 8, 0)
+        with patch.object(scheduling_engine, "VECTORIZED_MIN_TASKS", 20), \
+                patch.object(scheduling_engine, "calculate_dates_vectorized", side_effect=record):
+            chain = parallel_chains(1)
+            self.assertEqual(chain.layer_count(chain.topological_sort()), 40)
+            chain.calculate_dates(start)
+            self.assertEqual(vectorized, []) # One task per layer: Python backend
+            self.assertIsNotNone(chain.tasks[40].early_finish)
+
+            wide = parallel_chains(scheduling_engine.VECTORIZED_MIN_WIDTH)
+            self.assertEqual(wide.layer_count(wide.topological_sort()), 40 // scheduling_engine.VECTORIZED_MIN_WIDTH)
+            wide.calculate_dates(start)
+            self.assertEqual(vectorized, [40])
+
+if __name__ == '__main__':
+    unittest.main()
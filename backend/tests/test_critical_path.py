@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.database import Base
+from app.models.project import Project, Task, TaskRelationship
+from app.services.schedule_snapshot import ProjectSnapshot, TaskNode, RelNode, load_driving_path
+
+START = datetime(2024, 1, 1, 8, 0)
+
+class TestCriticalChain(unittest.TestCase):
+    def test_chain_follows_driving_links(self):
+        # 1 -> 3 -> 4 is critical, 2 -> 3 has a day of float
+        snapshot = ProjectSnapshot(1)
+        snapshot.tasks = [TaskNode(1, 40), TaskNode(2, 16), TaskNode(3, 16), TaskNode(4, 8)]
+        snapshot.relationships = [RelNode(1, 1, 3), RelNode(2, 2, 3), RelNode(3, 3, 4)]
+        engine = snapshot.engine()
+        engine.calculate_dates(START)
+        self.assertEqual(engine.critical_chain(), [1, 3, 4])
+
+    def test_deep_network_is_iterative(self):
+        # Far beyond the recursion limit; both backends must cope
+        for backend, n in (("python", 5000), ("numpy", 10000)):
+            snapshot = ProjectSnapshot(1)
+            snapshot.tasks = [TaskNode(i, 1) for i in range(1, n + 1)]
+            snapshot.relationships = [RelNode(i, i, i + 1) for i in range(1, n)]
+            engine = snapshot.engine()
+            engine.calculate_dates(START, backend=backend)
+            chain = engine.critical_chain()
+            self.assertEqual(len(chain), n)
+            self.assertEqual((chain[0], chain[-1]), (1, n))
+
+class TestStoredDrivingPath(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+
+    async def test_walks_only_the_tasks_chain(self):
+        async with self.Session() as session:
+            session.add(Project(id=1, title="P"))
+            session.add_all([Task(id=i, project_id=1, title=f"T{i}") for i in range(1, 10)])
+            session.add_all([
+                TaskRelationship(id=1, project_id=1, predecessor_id=1, successor_id=2, is_driving=True),
+                TaskRelationship(id=2, project_id=1, predecessor_id=2, successor_id=3, type="SS", lag=8, is_driving=True),
+                TaskRelationship(id=3, project_id=1, predecessor_id=5, successor_id=3, is_driving=True), # Tie
+                TaskRelationship(id=4, project_id=1, predecessor_id=4, successor_id=3, is_driving=False),
+                TaskRelationship(id=5, project_id=1, predecessor_id=3, successor_id=6, is_driving=True),
+                # Another chain, and stale flags forming a loop
+                TaskRelationship(id=6, project_id=1, predecessor_id=7, successor_id=8, is_driving=True),
+                TaskRelationship(id=7, project_id=1, predecessor_id=8, successor_id=9, is_driving=True),
+                TaskRelationship(id=8, project_id=1, predecessor_id=9, successor_id=7, is_driving=True),
+            ])
+            await session.commit()
+
+            statements = []
+            event.listen(self.db_engine.sync_engine, "before_cursor_execute",
+                         lambda conn, cursor, statement, *args: statements.append(statement))
+            path = await load_driving_path(session, 1, 6)
+            self.assertEqual(len(statements), 1)
+            self.assertEqual([(r.id, r.predecessor_id, r.successor_id) for r in path], [(1, 1, 2), (2, 2, 3), (5, 3, 6)])
+            self.assertEqual((path[1].type, path[1].lag), ("SS", 8.0))
+
+            self.assertEqual(await load_driving_path(session, 1, 1), [])
+            self.assertEqual([r.id for r in await load_driving_path(session, 1, 9)], [6, 7])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import random
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.scheduling_engine import SchedulingEngine
+from app.services.float_paths import FloatPathService
+from app.models.project import Task, TaskRelationship
+
+class TestFloatPaths(unittest.TestCase):
+    def build_engine(self, durations, links):
+        engine = SchedulingEngine(None, 1)
+        engine.tasks = {t_id: Task(id=t_id, title=f"T{t_id}", original_duration=d) for t_id, d in durations.items()}
+        engine.relationships = [
+            TaskRelationship(predecessor_id=a, successor_id=b, type=kind, lag=0) for a, b, kind in links
+        ]
+        for rel in engine.relationships:
+            engine.preds.setdefault(rel.successor_id, []).append(rel)
+            engine.succs.setdefault(rel.predecessor_id, []).append(rel)
+        engine.calculate_dates(datetime(2024, 1, 1, 8, 0))
+        return engine
+
+    def test_paths_ranked_by_float(self):
+        # S -> A (5d) -> T; S -> B (2d) -> C (1d) -> T; S -> D (4d) -> T
+        engine = self.build_engine(
+            {1: 0, 2: 40, 3: 16, 4: 8, 5: 32, 9: 0},
+            [(1, 2, 'FS'), (2, 9, 'FS'), (1, 3, 'FS'), (3, 4, 'FS'), (4, 9, 'FS'), (1, 5, 'FS'), (5, 9, 'FS')],
+        )
+        paths = FloatPathService(engine).float_paths(9)
+        self.assertEqual([[t["task_id"] for t in p["tasks"]] for p in paths], [[1, 2, 9], [5], [3, 4]])
+        self.assertEqual([p["float"] for p in paths], [0.0, 8.0, 16.0])
+        self.assertEqual(len(FloatPathService(engine).float_paths(9, max_paths=2)), 2)
+
+    def test_target_defaults_to_project_finish(self):
+        engine = self.build_engine({1: 8, 2: 8, 3: 24}, [(1, 2, 'FS')])
+        paths = FloatPathService(engine).float_paths()
+        self.assertEqual([t["task_id"] for t in paths[0]["tasks"]], [3])
+
+    def test_random_networks_partition_ancestors(self):
+        rnd = random.Random(3)
+        n = 300
+        durations = {i: rnd.choice([0, 8, 16, 40]) for i in range(1, n + 1)}
+        links = []
+        for _ in range(600):
+            a, b = sorted(rnd.sample(range(1, n + 1), 2))
+            links.append((a, b, rnd.choice(['FS', 'FS', 'SS', 'FF'])))
+        engine = self.build_engine(durations, links)
+        service = FloatPathService(engine)
+        target = service.default_target()
+        paths = service.float_paths(target, max_paths=1000)
+
+        seen = [t["task_id"] for p in paths for t in p["tasks"]]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), set(service.ancestors(target)))
+        floats = [p["float"] for p in paths]
+        self.assertEqual(floats, sorted(floats))
+        self.assertEqual(floats[0], 0.0)
+        # Every activity's relative float is at least its path's float
+        for p in paths:
+            for t in p["tasks"]:
+                self.assertGreaterEqual(t["relative_float"], p["float"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.scheduling_engine import SchedulingEngine
+from app.services.monte_carlo import MonteCarloSimulation
+from app.services.work_calendar import ProjectCalendar, parse_work_week
+from app.models.project import Task, TaskRelationship
+
+START = datetime(2024, 1, 1, 8, 0)
+
+class TestMonteCarlo(unittest.TestCase):
+    def build_engine(self):
+        # A (5d) -> C (2d); B (1d) -> C
+        engine = SchedulingEngine(None, 1)
+        engine.tasks = {
+            1: Task(id=1, title="A", original_duration=40),
+            2: Task(id=2, title="B", original_duration=8),
+            3: Task(id=3, title="C", original_duration=16),
+        }
+        engine.relationships = [
+            TaskRelationship(predecessor_id=1, successor_id=3, type='FS', lag=0),
+            TaskRelationship(predecessor_id=2, successor_id=3, type='FS', lag=0),
+        ]
+        for rel in engine.relationships:
+            engine.preds.setdefault(rel.successor_id, []).append(rel)
+            engine.succs.setdefault(rel.predecessor_id, []).append(rel)
+        return engine
+
+    def test_fixed_durations_match_cpm(self):
+        result = MonteCarloSimulation(self.build_engine(), iterations=50, optimistic_factor=1,
+                                      pessimistic_factor=1, seed=1).run(START)
+        self.assertEqual(result["deterministic_finish"], datetime(2024, 1, 9, 17, 0))
+        self.assertEqual(set(result["finish_percentiles"].values()), {datetime(2024, 1, 9, 17, 0)})
+        criticality = {t["task_id"]: t["criticality_index"] for t in result["tasks"]}
+        self.assertEqual(criticality, {1: 1.0, 2: 0.0, 3: 1.0})
+
+    def test_percentiles_and_sensitivity(self):
+        result = MonteCarloSimulation(self.build_engine(), iterations=2000, seed=7).run(START, workers=4)
+        self.assertEqual(result["iterations"], 2000)
+        p = result["finish_percentiles"]
+        self.assertLessEqual(p["P50"], p["P80"])
+        self.assertLessEqual(p["P80"], p["P90"])
+        # The long driving task dominates the finish; the short parallel one never drives it
+        self.assertEqual(result["tasks"][0]["task_id"], 1)
+        tasks = {t["task_id"]: t for t in result["tasks"]}
+        self.assertAlmostEqual(tasks[2]["sensitivity"], 0.0, places=1)
+        self.assertEqual(tasks[2]["criticality_index"], 0.0)
+
+    def test_batches_are_reproducible(self):
+        first = MonteCarloSimulation(self.build_engine(), iterations=300, seed=3).run(START, workers=3)
+        second = MonteCarloSimulation(self.build_engine(), iterations=300, seed=3).run(START, workers=3)
+        self.assertEqual(first, second)
+
+    def test_occurred_risk_delays_finish(self):
+        risk = SimpleNamespace(task_id=1, probability=0.2, impact=5, status='occurred')
+        result = MonteCarloSimulation(self.build_engine(), iterations=20, optimistic_factor=1,
+                                      pessimistic_factor=1, risks=[risk], seed=1).run(START)
+        # A grows by 50% (impact 5 x 10%): 60h + 16h
+        self.assertEqual(result["finish_percentiles"]["P50"], datetime(2024, 1, 12, 12, 0))
+
+    def test_rejects_other_calendars(self):
+        round_the_clock = ProjectCalendar(work_week=parse_work_week({str(d): [["00:00", "24:00"]] for d in range(7)}))
+        engine = self.build_engine()
+        engine.calendars = {3: round_the_clock}
+        engine.tasks[2].calendar_id = 3
+        with self.assertRaises(ValueError):
+            MonteCarloSimulation(engine, iterations=10, seed=1).prepare(START)
+
+        engine = self.build_engine()
+        engine.calendars = {3: round_the_clock}
+        engine.relationships[0].calendar_id = 3 # Lag calendar
+        with self.assertRaises(ValueError):
+            MonteCarloSimulation(engine, iterations=10, seed=1).prepare(START)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.database import Base
+from app.models.project import Project, Task, TaskRelationship
+from app.services.portfolio_scheduler import PortfolioScheduler
+from app.services.schedule_snapshot import schedule_snapshot
+
+DATA_DATE = datetime(2024, 1, 1, 8, 0)
+
+class TestPortfolioScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with self.Session() as session:
+            for p in range(1, 4):
+                project = Project(id=p, title=f"P{p}", status="completed" if p == 3 else "active")
+                session.add(project)
+                for i in range(1, 4):
+                    session.add(Task(id=p * 10 + i, project_id=p, title=f"T{i}", original_duration=8 * i))
+                session.add(TaskRelationship(project_id=p, predecessor_id=p * 10 + 1, successor_id=p * 10 + 2, type='FS', lag=0))
+                session.add(TaskRelationship(project_id=p, predecessor_id=p * 10 + 2, successor_id=p * 10 + 3, type='FS', lag=0))
+            # Project 2 has a logic loop
+            session.add(TaskRelationship(project_id=2, predecessor_id=23, successor_id=21, type='FS', lag=0))
+            await session.commit()
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+
+    async def test_reschedules_active_projects(self):
+        async with self.Session() as session:
+            with ThreadPoolExecutor(2) as pool:
+                report = await PortfolioScheduler(session).reschedule(DATA_DATE, pool=pool)
+
+        self.assertEqual([p["project_id"] for p in report["projects"]], [1, 2])
+        self.assertEqual((report["succeeded"], report["failed"]), (1, 1))
+        failed = report["projects"][1]
+        self.assertEqual(failed["status"], "failed")
+        self.assertEqual(failed["cycles"][0]["task_ids"], [21, 22, 23])
+
+        async with self.Session() as session:
+            tasks = {t.id: t for t in (await session.execute(select(Task))).scalars().all()}
+            rels = (await session.execute(select(TaskRelationship).where(TaskRelationship.project_id == 1))).scalars().all()
+        # T1 8h, T2 16h, T3 24h in sequence (6 working days) -> Mon Jan 8 17:00
+        self.assertEqual(tasks[13].early_finish, datetime(2024, 1, 8, 17, 0))
+        self.assertEqual(tasks[11].total_float, 0.0)
+        self.assertTrue(all(r.is_driving for r in rels))
+        self.assertIsNone(tasks[21].early_start) # Failed project untouched
+        self.assertIsNone(tasks[31].early_start) # Completed project skipped
+
+    async def test_snapshots_pickle_for_worker_processes(self):
+        async with self.Session() as session:
+            snapshots = await PortfolioScheduler(session).load_snapshots([1])
+        snapshot = pickle.loads(pickle.dumps(snapshots[1]))
+        result = schedule_snapshot(snapshot, DATA_DATE)
+        self.assertIsNone(result["error"])
+        self.assertEqual(len(result["tasks"]), 3)
+
+if __name__ == '__main__':
+    unittest.main()
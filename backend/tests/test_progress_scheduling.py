@@ -0,0 +1,124 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.schedule_snapshot import ProjectSnapshot, TaskNode, RelNode
+
+
+def snapshot(tasks, links):
+    snap = ProjectSnapshot(1)
+    snap.tasks = tasks
+    snap.relationships = [RelNode(i, pred, succ, 'FS', 0.0) for i, (pred, succ) in enumerate(links, start=1)]
+    return snap
+
+
+class TestProgressScheduling(unittest.TestCase):
+    def test_completed_frozen_and_remaining_from_data_date(self):
+        # A (done) -> B (in progress, 4h left) -> C (8h, not started)
+        engine = snapshot([
+            TaskNode(1, 16, actual_start=datetime(2024, 1, 1, 8), actual_end=datetime(2024, 1, 2, 17)),
+            TaskNode(2, 16, actual_start=datetime(2024, 1, 3, 8), remaining_duration=4),
+            TaskNode(3, 8),
+        ], [(1, 2), (2, 3)]).engine()
+        engine.calculate_progress_dates(datetime(2024, 1, 4, 8))
+        a, b, c = (engine.tasks[i] for i in (1, 2, 3))
+
+        self.assertEqual((a.early_start, a.early_finish), (datetime(2024, 1, 1, 8), datetime(2024, 1, 2, 17)))
+        self.assertEqual((a.late_start, a.late_finish), (a.early_start, a.early_finish))
+        self.assertIsNone(a.total_float)
+        self.assertEqual((b.early_start, b.early_finish), (datetime(2024, 1, 3, 8), datetime(2024, 1, 4, 12)))
+        self.assertEqual((c.early_start, c.early_finish), (datetime(2024, 1, 4, 13), datetime(2024, 1, 5, 12)))
+        self.assertEqual((b.total_float, c.total_float), (0, 0))
+        self.assertEqual(engine.critical_chain(), [2, 3])
+
+    def test_retained_logic_and_progress_override(self):
+        # B started out of sequence, before its FS predecessor A finished
+        def tasks():
+            return [
+                TaskNode(1, 16, actual_start=datetime(2024, 1, 1, 8), remaining_duration=8),
+                TaskNode(2, 16, actual_start=datetime(2024, 1, 2, 8), remaining_duration=8),
+            ]
+        retained = snapshot(tasks(), [(1, 2)]).engine()
+        retained.calculate_progress_dates(datetime(2024, 1, 3, 8), "retained_logic")
+        self.assertEqual(retained.tasks[1].early_finish, datetime(2024, 1, 3, 17))
+        self.assertEqual(retained.tasks[2].early_start, datetime(2024, 1, 2, 8))
+        self.assertEqual(retained.tasks[2].early_finish, datetime(2024, 1, 4, 17))
+        self.assertTrue(retained.relationships[0].is_driving)
+
+        override = snapshot(tasks(), [(1, 2)]).engine()
+        override.calculate_progress_dates(datetime(2024, 1, 3, 8), "progress_override")
+        self.assertEqual(override.tasks[2].early_finish, datetime(2024, 1, 3, 17))
+        self.assertFalse(override.relationships[0].is_driving)
+
+        with self.assertRaises(ValueError):
+            override.calculate_progress_dates(datetime(2024, 1, 3, 8), "as_late_as_possible")
+
+    def test_open_work_starts_at_data_date(self):
+        engine = snapshot([
+            TaskNode(1, 8),
+            # No remaining estimate: original less the 16 working hours elapsed
+            TaskNode(2, 24, actual_start=datetime(2024, 1, 1, 8), remaining_duration=0.0),
+        ], []).engine()
+        engine.calculate_progress_dates(datetime(2024, 1, 3, 8))
+        self.assertEqual(engine.tasks[1].early_start, datetime(2024, 1, 3, 8))
+        self.assertEqual(engine.tasks[2].early_finish, datetime(2024, 1, 3, 17))
+
+    def test_completed_prefix_is_pruned(self):
+        n, done = 1000, 700
+        tasks = [TaskNode(i, 8) for i in range(1, n + 1)]
+        for i, task in enumerate(tasks[:done]):
+            task.actual_start = datetime(2023, 1, 2, 8)
+            task.actual_end = datetime(2023, 6, 1, 17)
+        engine = snapshot(tasks, [(i, i + 1) for i in range(1, n)]).engine()
+
+        computed = []
+        compute = engine.compute_early_dates
+        engine.compute_early_dates = lambda task, start: computed.append(task.id) or compute(task, start)
+        engine.calculate_progress_dates(datetime(2024, 1, 1, 8))
+
+        self.assertEqual(computed, list(range(done + 1, n + 1)))
+        self.assertEqual(engine.tasks[done + 1].early_start, datetime(2024, 1, 1, 8))
+        self.assertEqual(engine.tasks[n].total_float, 0)
+
+    def test_reschedule_keeps_actuals_and_data_date(self):
+        def tasks():
+            return [
+                TaskNode(1, 16, actual_start=datetime(2024, 1, 1, 8), actual_end=datetime(2024, 1, 2, 17)),
+                TaskNode(2, 16, actual_start=datetime(2024, 1, 3, 8), remaining_duration=4),
+                TaskNode(3, 8),
+                TaskNode(4, 8),
+            ]
+        data_date = datetime(2024, 1, 4, 8)
+        engine = snapshot(tasks(), [(1, 2), (2, 3), (1, 4)]).engine()
+        engine.calculate_progress_dates(data_date)
+        engine.tasks[4].original_duration = 16
+        moved = engine.reschedule({4}, data_date)
+
+        full = snapshot(tasks(), [(1, 2), (2, 3), (1, 4)]).engine()
+        full.tasks[4].original_duration = 16
+        full.calculate_progress_dates(data_date)
+        for t_id, task in full.tasks.items():
+            self.assertEqual((engine.tasks[t_id].early_start, engine.tasks[t_id].early_finish),
+                             (task.early_start, task.early_finish))
+        self.assertIn(4, moved)
+        self.assertNotIn(1, moved)
+        # Unstarted work never moves before the data date
+        self.assertEqual(engine.tasks[4].early_start, data_date)
+
+    def test_reschedule_without_progress_drops_remaining(self):
+        engine = snapshot([TaskNode(1, 16, actual_start=datetime(2024, 1, 1, 8), remaining_duration=4), TaskNode(2, 8)],
+                          [(1, 2)]).engine()
+        engine.calculate_progress_dates(datetime(2024, 1, 2, 8))
+        engine.tasks[1].actual_start = None
+        engine.reschedule({1}, datetime(2024, 1, 1, 8))
+        self.assertIsNone(engine.progress_mode)
+        self.assertEqual(engine.tasks[1].early_finish, datetime(2024, 1, 2, 17))
+        self.assertEqual(engine.tasks[2].early_start, datetime(2024, 1, 3, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
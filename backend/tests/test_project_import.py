@@ -0,0 +1,357 @@
+import unittest
+import asyncio
+import io
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event, func, select
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.database import Base
+from app.models.calendar import WorkCalendar, CalendarException
+from app.models.project import Project, Task, TaskRelationship
+from app.services.import_parsers import parse_xml, parse_xml_stream
+from app.services.xer_parser import parse_xer_stream
+from app.services.import_jobs import ImportJobs
+from app.services.import_writer import write_tasks
+
+MSPDI_TASK = (
+    '<Task><UID>{i}</UID><ID>{i}</ID><Name>Task {i}</Name><WBS>1.{i}</WBS><OutlineLevel>2</OutlineLevel>'
+    '<Duration>PT16H30M0S</Duration><Start>2024-01-01T08:00:00</Start><Finish>2024-01-02T17:00:00</Finish>'
+    '<Milestone>0</Milestone><Summary>0</Summary><Priority>700</Priority>{links}</Task>'
+)
+MSPDI_LINK = '<PredecessorLink><PredecessorUID>{uid}</PredecessorUID><Type>3</Type><LinkLag>4800</LinkLag></PredecessorLink>'
+
+
+def mspdi(n, encoding="UTF-8", name="Plant.xml"):
+    tasks = "".join(
+        MSPDI_TASK.format(i=i, links=MSPDI_LINK.format(uid=i - 1) if i > 1 else "") for i in range(1, n + 1)
+    )
+    assignments = "".join(f"<Assignment><UID>{i}</UID><TaskUID>{i}</TaskUID></Assignment>" for i in range(1, n + 1))
+    return (
+        f'<?xml version="1.0" encoding="{encoding}"?>\n'
+        f'<Project xmlns="http://schemas.microsoft.com/project"><Name>{name}</Name><Title>Plant</Title>'
+        f'<Calendars><Calendar><UID>1</UID><Name>Standard</Name></Calendar></Calendars>'
+        f'<Tasks>{tasks}</Tasks><Assignments>{assignments}</Assignments></Project>'
+    )
+
+
+class TestXmlStreamImport(unittest.TestCase):
+    def test_mspdi_tasks_and_links(self):
+        parsed = parse_xml_stream(io.BytesIO(mspdi(3).encode("utf-8")))
+        self.assertEqual(parsed["title"], "Plant.xml")
+        tasks = list(parsed["tasks"])
+
+        self.assertEqual([t["title"] for t in tasks], ["Task 1", "Task 2", "Task 3"])
+        second = tasks[1]
+        self.assertEqual(second["xml_uid"], "2")
+        self.assertEqual(second["wbs_code"], "1.2")
+        self.assertEqual(second["outline_level"], 2)
+        self.assertEqual(second["estimated_hours"], 16.5)
+        self.assertEqual(second["priority"], "High")
+        self.assertEqual(second["planned_start"], datetime(2024, 1, 1, 8))
+        self.assertEqual(second["predecessor_links"], [{"uid": "1", "type": "SS", "lag": 8.0}])
+        self.assertEqual(tasks[0]["predecessor_links"], [])
+
+        # The string parser shares the streaming path
+        self.assertEqual(parse_xml(mspdi(3))["tasks"], tasks)
+
+    def test_generic_xml(self):
+        rows = "<rows><row><title>Dig</title><hours>8</hours></row><row><title>Pour</title></row><row/></rows>"
+        parsed = parse_xml_stream(io.BytesIO(rows.encode()))
+        self.assertEqual(parsed["title"], "Imported XML Project")
+        self.assertEqual([(t["title"], t["estimated_hours"]) for t in parsed["tasks"]], [("Dig", 8.0), ("Pour", 0.0)])
+
+        lower = "<plan><Name>Site</Name><tasks><task><name>Survey</name><id>7</id></task></tasks></plan>"
+        parsed = parse_xml_stream(io.BytesIO(lower.encode()))
+        self.assertEqual(parsed["title"], "Site")
+        self.assertEqual([(t["title"], t["xml_uid"]) for t in parsed["tasks"]], [("Survey", "7")])
+
+        # The outer task's fields after a nested task are kept
+        nested = "<tasks><task><task><name>Inner</name></task><name>Outer</name></task></tasks>"
+        self.assertEqual([t["title"] for t in parse_xml_stream(io.BytesIO(nested.encode()))["tasks"]], ["Inner", "Outer"])
+
+        self.assertEqual(parse_xml_stream(io.BytesIO(b"<Project><Tasks/></Project>"))["tasks"], [])
+
+    def test_multibyte_declared_encoding(self):
+        content = mspdi(2, encoding="gbk", name="工程计划")
+        parsed = parse_xml_stream(io.BytesIO(content.encode("gbk")))
+        self.assertEqual(parsed["title"], "工程计划")
+        self.assertEqual(len(list(parsed["tasks"])), 2)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            parse_xml_stream(io.BytesIO(b"<Project><Tasks><Task>"))
+
+        # Malformed past the first task: raised while the tasks are consumed
+        broken = mspdi(3).encode()[:-40]
+        parsed = parse_xml_stream(io.BytesIO(broken))
+        with self.assertRaises(ValueError):
+            list(parsed["tasks"])
+
+    def peak_memory(self, n):
+        raw = mspdi(n).encode()
+        tracemalloc.start()
+        try:
+            count = sum(1 for _ in parse_xml_stream(io.BytesIO(raw))["tasks"])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(count, n)
+        return peak
+
+    def test_memory_stays_flat(self):
+        # Ten times the tasks, about the same peak: nothing accumulates per task
+        self.assertLess(self.peak_memory(2000), 2 * self.peak_memory(200))
+
+class TestImportWriter(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.Session() as session:
+            session.add(Project(id=1, title="P"))
+            await session.commit()
+        self.statements = []
+        event.listen(self.db_engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+
+    async def links(self, session):
+        rows = await session.execute(
+            select(TaskRelationship.predecessor_id, TaskRelationship.successor_id, TaskRelationship.type, TaskRelationship.lag)
+        )
+        return sorted(rows.all())
+
+    async def test_batched_insert_with_forward_links(self):
+        # Chain 1 <- 2 <- ... by source id, plus a link from the last task back to the first's successor
+        tasks = list(parse_xml_stream(io.BytesIO(mspdi(250).encode()))["tasks"])
+        tasks[0]["predecessor_links"] = [{"uid": "250", "type": "FF", "lag": 0.0}]
+
+        async with self.Session() as session:
+            writer = await write_tasks(session, 1, tasks, batch_size=100)
+            await session.commit()
+        self.assertEqual((writer.task_count, writer.relationship_count), (250, 250))
+
+        inserts = [s for s in self.statements if s.startswith("INSERT")]
+        self.assertEqual(len(inserts), 3 + 3) # Per 100 tasks and per 100 relationships
+
+        async with self.Session() as session:
+            ids = dict((await session.execute(select(Task.wbs_code, Task.id))).all())
+            links = await self.links(session)
+            second = (await session.execute(select(Task).where(Task.id == ids["1.2"]))).scalar_one()
+        self.assertEqual(len(ids), 250)
+        self.assertIn((ids["1.1"], ids["1.2"], "SS", 8.0), links)
+        self.assertIn((ids["1.250"], ids["1.1"], "FF", 0.0), links)
+        self.assertEqual((second.title, second.original_duration, second.priority, second.outline_level),
+                         ("Task 2", 16.5, "High", 2))
+
+    async def test_dependencies_by_title(self):
+        tasks = [
+            {"title": "Pour", "estimated_hours": 8, "dependencies_raw": ["Dig", "Missing"]},
+            {"title": "Dig", "estimated_hours": 16},
+            {"title": "Cure", "dependencies_raw": ["Pour"]},
+        ]
+        async with self.Session() as session:
+            writer = await write_tasks(session, 1, tasks)
+            await session.commit()
+            ids = dict((await session.execute(select(Task.title, Task.id))).all())
+            self.assertEqual(await self.links(session), [
+                (ids["Pour"], ids["Cure"], "FS", 0.0), (ids["Dig"], ids["Pour"], "FS", 0.0),
+            ])
+        self.assertEqual(writer.relationship_count, 2)
+
+
+class TestImportJobs(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+        self.spool = tempfile.TemporaryDirectory()
+        self.jobs = ImportJobs(self.Session, spool_dir=self.spool.name, workers=1)
+
+    async def asyncTearDown(self):
+        self.jobs.shutdown()
+        await self.db_engine.dispose()
+        self.spool.cleanup()
+
+    async def count(self, model):
+        async with self.Session() as session:
+            return (await session.execute(select(func.count()).select_from(model))).scalar_one()
+
+    async def test_import_runs_in_background(self):
+        job = await self.jobs.submit(io.BytesIO(mspdi(250).encode()), "plant.xml", "xml", project_title="Plant")
+        self.assertIn(job.status()["stage"], ("queued", "parsing"))
+        self.assertEqual(len(os.listdir(self.spool.name)), 1)
+
+        status = await self.jobs.wait(job.id, timeout=10)
+        self.assertEqual(status["stage"], "completed")
+        self.assertEqual((status["rows_processed"], status["relationships"]), (250, 249))
+        self.assertGreater(status["throughput"], 0)
+        self.assertIsNone(status["error"])
+
+        async with self.Session() as session:
+            project = await session.get(Project, status["project_id"])
+        self.assertEqual((project.title, project.summary), ("Plant", "Imported from plant.xml (250 tasks)"))
+        self.assertEqual(await self.count(Task), 250)
+        self.assertEqual(os.listdir(self.spool.name), []) # Spooled upload removed
+        self.assertEqual(self.jobs.stats(), {"imports": 1, "failures": 0, "active": 0})
+
+    async def test_failures_are_reported_and_rolled_back(self):
+        broken = await self.jobs.submit(io.BytesIO(mspdi(50).encode()[:-40]), "broken.xml", "xml")
+        empty = await self.jobs.submit(io.BytesIO(b"title,hours\n"), "empty.csv", "csv")
+
+        status = await self.jobs.wait(broken.id, timeout=10)
+        self.assertEqual(status["stage"], "failed")
+        self.assertIn("Invalid XML", status["error"])
+        status = await self.jobs.wait(empty.id, timeout=10)
+        self.assertIn("No tasks found", status["error"])
+
+        self.assertEqual((await self.count(Project), await self.count(Task)), (0, 0))
+        self.assertEqual(os.listdir(self.spool.name), [])
+        self.assertIsNone(self.jobs.status("missing"))
+
+    async def test_event_loop_keeps_serving(self):
+        gaps = []
+
+        async def ticker():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticking = asyncio.create_task(ticker())
+        job = await self.jobs.submit(io.BytesIO(mspdi(3000).encode()), "big.xml", "xml")
+        status = await self.jobs.wait(job.id, timeout=60)
+        ticking.cancel()
+
+        self.assertEqual(status["rows_processed"], 3000)
+        self.assertGreater(len(gaps), 5)
+        self.assertLess(max(gaps), 0.5)
+
+
+# Mon-Fri 08-12 / 13-17, Saturday 08-12; New Year's Day 2024 (serial 45292) and the next day off
+CLNDR_DATA = (
+    "(0||CalendarData()(\x7f  (0||DaysOfWeek()(\x7f    (0||1()())"
+    + "".join(f"(0||{d}()((0||0(s|08:00|f|12:00)())(0||1(s|13:00|f|17:00)())))" for d in range(2, 7))
+    + "(0||7()((0||0(s|08:00|f|12:00)())))))"
+    "(0||Exceptions()((0||0(d|45292)())(0||1(d|45293)())))))"
+)
+
+
+def xer(n=3):
+    rows = [
+        "ERMHDR\t19.12\t2024-01-01\tProject\tadmin\tdbxDatabaseNoName\tProject Management\tUSD",
+        "%T\tPROJECT", "%F\tproj_id\tproj_short_name\tclndr_id", "%R\t100\tPLANT\t7",
+        "%T\tCALENDAR", "%F\tclndr_id\tclndr_name\tday_hr_cnt\tclndr_data", f"%R\t7\tSite 5.5d\t8\t{CLNDR_DATA}",
+        "%T\tPROJWBS", "%F\twbs_id\tproj_id\tparent_wbs_id\tseq_num\tproj_node_flag\twbs_short_name\twbs_name",
+        "%R\t1\t100\t\t0\tY\tPLANT\tPower Plant Unit 1",
+        "%R\t3\t100\t2\t0\tN\tCIV\tCivil Works",
+        "%R\t2\t100\t1\t0\tN\tU1\tUnit 1",
+        "%T\tTASK",
+        "%F\ttask_id\twbs_id\tclndr_id\ttask_code\ttask_name\ttask_type\tstatus_code\tpriority_type"
+        "\ttarget_drtn_hr_cnt\tremain_drtn_hr_cnt\ttarget_start_date\ttarget_end_date\tcstr_type\tcstr_date",
+    ]
+    for i in range(1, n + 1):
+        cstr = "CS_MSO\t2024-02-01 08:00" if i == 2 else "\t"
+        rows.append(f"%R\t{1000 + i}\t3\t7\tA{i}\tPour {i}\tTT_Task\tTK_NotStart\tPT_High\t16\t16"
+                    f"\t2024-01-02 08:00\t2024-01-03 17:00\t{cstr}")
+    rows += ["%T\tTASKPRED", "%F\ttask_pred_id\ttask_id\tpred_task_id\tpred_type\tlag_hr_cnt"]
+    rows += [f"%R\t{i}\t{1000 + i}\t{999 + i}\tPR_SS\t4" for i in range(2, n + 1)]
+    rows += ["%R\t0\t1002\t9999\tPR_FS\t0", "%E"]
+    return ("\r\n".join(rows) + "\r\n").encode("utf-8")
+
+
+class TestXerImport(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+        self.spool = tempfile.TemporaryDirectory()
+        self.jobs = ImportJobs(self.Session, spool_dir=self.spool.name, workers=1)
+
+    async def asyncTearDown(self):
+        self.jobs.shutdown()
+        await self.db_engine.dispose()
+        self.spool.cleanup()
+
+    def test_parse(self):
+        parsed = parse_xer_stream(io.BytesIO(xer()))
+        self.assertEqual((parsed["title"], parsed["calendar_ref"]), ("Power Plant Unit 1", "7"))
+        calendar, = parsed["calendars"]
+        self.assertEqual(calendar["name"], "Site 5.5d")
+        self.assertEqual(calendar["work_week"]["0"], [["08:00", "12:00"], ["13:00", "17:00"]])
+        self.assertEqual(calendar["work_week"]["5"], [["08:00", "12:00"]])
+        self.assertNotIn("6", calendar["work_week"])
+        self.assertEqual(calendar["exceptions"], [{
+            "name": "P6 exception", "start_date": datetime(2024, 1, 1).date(),
+            "end_date": datetime(2024, 1, 2).date(), "work_hours": None,
+        }])
+
+        tasks = list(parsed["tasks"])
+        self.assertEqual([(t["wbs_code"], t["path"], t["is_summary"], t["outline_level"]) for t in tasks], [
+            ("U1", "w2", True, 1), ("U1.CIV", "w2.w3", True, 2),
+            ("U1.CIV.A1", "w2.w3.t1001", False, 3), ("U1.CIV.A2", "w2.w3.t1002", False, 3),
+            ("U1.CIV.A3", "w2.w3.t1003", False, 3),
+        ])
+        second = tasks[3]
+        self.assertEqual((second["title"], second["estimated_hours"], second["priority"], second["calendar_ref"]),
+                         ("Pour 2", 16.0, "High", "7"))
+        self.assertEqual((second["constraint_type"], second["constraint_date"]),
+                         ("start_no_earlier_than", datetime(2024, 2, 1, 8)))
+        self.assertIsNone(tasks[2]["constraint_type"])
+
+        self.assertEqual(list(parsed["relationships"]), [
+            ("1002", "1001", "SS", 4.0), ("1003", "1002", "SS", 4.0), ("1002", "9999", "FS", 0.0),
+        ])
+
+    async def test_import_job(self):
+        job = await self.jobs.submit(io.BytesIO(xer(250)), "plant.xer", "xer")
+        status = await self.jobs.wait(job.id, timeout=10)
+        self.assertEqual(status["stage"], "completed", status["error"])
+        self.assertEqual((status["rows_processed"], status["relationships"]), (252, 249)) # Unknown predecessor skipped
+
+        async with self.Session() as session:
+            project = await session.get(Project, status["project_id"])
+            calendar = (await session.execute(select(WorkCalendar))).scalar_one()
+            tasks = (await session.execute(select(Task).where(Task.is_summary.is_(False)))).scalars().all()
+            exceptions = (await session.execute(select(func.count()).select_from(CalendarException))).scalar_one()
+        self.assertEqual(project.title, "Power Plant Unit 1")
+        self.assertEqual(project.calendar_id, calendar.id)
+        self.assertEqual(exceptions, 1)
+        self.assertEqual(len(tasks), 250)
+        self.assertTrue(all(t.calendar_id == calendar.id for t in tasks))
+        self.assertEqual(sum(1 for t in tasks if t.constraint_type == "start_no_earlier_than"), 1)
+
+    def test_memory_stays_flat(self):
+        def peak(n):
+            raw = xer(n)
+            tracemalloc.start()
+            try:
+                parsed = parse_xer_stream(io.BytesIO(raw))
+                count = sum(1 for _ in parsed["tasks"]) + sum(1 for _ in parsed["relationships"])
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            self.assertEqual(count, n + 2 + n)
+            return peak
+        # Tasks and links stream through: ten times the activities, about the same peak
+        self.assertLess(peak(5000), 2 * peak(500))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+import multiprocessing
+import sys
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import resource_leveling
+from app.services.scheduling_engine import SchedulingEngine
+from app.services.resource_leveling import ResourceLeveler, resource_demands, level_engine
+from app.services.schedule_snapshot import ProjectSnapshot, TaskNode, RelNode
+from app.services.work_calendar import ProjectCalendar, parse_work_week
+from app.models.project import Task, TaskRelationship
+
+START = datetime(2024, 1, 1, 8, 0)
+
+class TestResourceLeveling(unittest.TestCase):
+    def build_engine(self, tasks, links):
+        engine = SchedulingEngine(None, 1)
+        engine.tasks = {t.id: t for t in tasks}
+        engine.relationships = [
+            TaskRelationship(predecessor_id=a, successor_id=b, type='FS', lag=0) for a, b in links
+        ]
+        for rel in engine.relationships:
+            engine.preds.setdefault(rel.successor_id, []).append(rel)
+            engine.succs.setdefault(rel.predecessor_id, []).append(rel)
+        engine.calculate_dates(START)
+        return engine
+
+    def test_delays_non_critical_work(self):
+        # A (5d) and B (2d) both need crane 1; A is critical, so B waits for it
+        a = Task(id=1, original_duration=40, priority='Medium', resource_ids=[1])
+        b = Task(id=2, original_duration=16, priority='Medium', resource_ids=[1])
+        c = Task(id=3, original_duration=8, priority='Medium', resource_ids=[])
+        engine = self.build_engine([a, b, c], [(1, 3)])
+        result = ResourceLeveler(engine, {1: 1}).level()
+
+        self.assertEqual(a.planned_start, START)
+        self.assertEqual(b.planned_start, datetime(2024, 1, 8, 8, 0))
+        self.assertEqual(b.planned_end, datetime(2024, 1, 9, 17, 0))
+        # Successors follow the leveled dates; CPM dates are untouched
+        self.assertEqual(c.planned_start, datetime(2024, 1, 8, 8, 0))
+        self.assertEqual(b.early_start, START)
+        self.assertEqual(result["delayed_tasks"], 1)
+        self.assertEqual(result["peak_usage"], {1: 1.0})
+
+    def test_priority_beats_float(self):
+        a = Task(id=1, original_duration=40, priority='Low', resource_ids=[1])
+        b = Task(id=2, original_duration=16, priority='High', resource_ids=[{"id": 1, "units": 2}])
+        engine = self.build_engine([a, b], [])
+        result = ResourceLeveler(engine, {1: 2}).level()
+        self.assertEqual(b.planned_start, START)
+        self.assertEqual(a.planned_start, datetime(2024, 1, 3, 8, 0))
+        self.assertEqual(result["overallocated"], [])
+
+    def test_demand_above_capacity_is_reported(self):
+        a = Task(id=1, original_duration=8, priority='Medium', resource_ids=[{"id": 4, "units": 3}])
+        engine = self.build_engine([a], [])
+        result = ResourceLeveler(engine, {}, default_capacity=2).level()
+        self.assertEqual(result["overallocated"], [1])
+        self.assertEqual(a.planned_start, START)
+
+    def test_random_network_fits_capacities(self):
+        rnd = random.Random(5)
+        n = 400
+        tasks = [
+            Task(id=i, original_duration=rnd.choice([4, 8, 16, 40]), priority=rnd.choice(['High', 'Medium', 'Low']),
+                 resource_ids=rnd.sample(range(1, 6), rnd.randint(0, 2)))
+            for i in range(1, n + 1)
+        ]
+        links = {tuple(sorted(rnd.sample(range(1, n + 1), 2))) for _ in range(600)}
+        engine = self.build_engine(tasks, links)
+        capacities = {r: 2 for r in range(1, 6)}
+        leveler = ResourceLeveler(engine, capacities)
+        leveler.level()
+
+        calendar = engine.calendar
+        spans = {t.id: (calendar.to_offset(t.planned_start), calendar.to_offset(t.planned_end)) for t in tasks}
+        for a, b in links:
+            self.assertLessEqual(spans[a][1], spans[b][0])
+        for resource_id, capacity in capacities.items():
+            events = []
+            for t in tasks:
+                units = resource_demands(t).get(resource_id)
+                if units:
+                    events += [(spans[t.id][0], units), (spans[t.id][1], -units)]
+            load = 0
+            for _, delta in sorted(events, key=lambda e: (e[0], e[1])):
+                load += delta
+                self.assertLessEqual(load, capacity)
+    def test_rejects_other_calendars(self):
+        a = Task(id=1, original_duration=8, priority='Medium', resource_ids=[1], calendar_id=3)
+        engine = self.build_engine([a], [])
+        engine.calendars = {3: ProjectCalendar(work_week=parse_work_week({str(d): [["00:00", "24:00"]] for d in range(7)}))}
+        with self.assertRaises(ValueError):
+            ResourceLeveler(engine, {1: 1}).level()
+
+    def test_actuals_are_kept(self):
+        # A and B overlapped on the crane (done); C is half done, D not started
+        day = lambda d, h: datetime(2024, 1, d, h, 0)
+        a = Task(id=1, original_duration=16, priority='Low', resource_ids=[1], actual_start=day(1, 8), actual_end=day(2, 17))
+        b = Task(id=2, original_duration=16, priority='Low', resource_ids=[1], actual_start=day(1, 8), actual_end=day(2, 17))
+        c = Task(id=3, original_duration=16, priority='High', resource_ids=[1], actual_start=day(2, 8), remaining_duration=8)
+        d = Task(id=4, original_duration=8, priority='Low', resource_ids=[1])
+        engine = self.build_engine([a, b, c, d], [(1, 4)])
+        data_date = day(3, 8)
+        engine.calculate_progress_dates(data_date)
+
+        with self.assertRaises(ValueError):
+            ResourceLeveler(engine, {1: 1}).level()
+        result = ResourceLeveler(engine, {1: 1}, data_date=data_date).level()
+        self.assertEqual([(t.planned_start, t.planned_end) for t in (a, b)], [(day(1, 8), day(2, 17))] * 2)
+        self.assertEqual((result["tasks"][1]["delay_hours"], result["tasks"][2]["delay_hours"]), (0.0, 0.0))
+        # Remaining work from the data date, then D after it
+        self.assertEqual((c.planned_start, c.planned_end), (day(2, 8), day(3, 17)))
+        self.assertEqual((d.planned_start, d.planned_end), (day(4, 8), day(4, 17)))
+        self.assertEqual(result["delayed_tasks"], 1)
+        self.assertEqual(result["peak_usage"], {1: 3.0}) # A, B and C all worked on Jan 2
+
+class TestOffloadedLeveling(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def network(self):
+        rnd = random.Random(11)
+        n = 300
+        snapshot = ProjectSnapshot(1)
+        snapshot.tasks = [TaskNode(i, rnd.choice([4, 8, 16, 40])) for i in range(1, n + 1)]
+        links = {tuple(sorted(rnd.sample(range(1, n + 1), 2))) for _ in range(400)}
+        snapshot.relationships = [RelNode(i, a, b) for i, (a, b) in enumerate(sorted(links), start=1)]
+        assignments = {
+            i: (rnd.choice(['High', 'Medium', 'Low']), rnd.sample(range(1, 6), rnd.randint(0, 2)))
+            for i in range(1, n + 1)
+        }
+        engine = snapshot.engine()
+        engine.calculate_dates(START)
+        return engine, assignments
+
+    async def test_pool_matches_inline(self):
+        capacities = {r: 1 for r in range(1, 6)}
+        inline, assignments = self.network()
+        expected = ResourceLeveler(inline, capacities, assignments=assignments).level()
+
+        offloaded, _ = self.network()
+        with patch.object(resource_leveling, "OFFLOAD_MIN_TASKS", 100):
+            result = await level_engine(offloaded, assignments, capacities, pool=self.pool)
+        self.assertEqual(result, expected)
+        self.assertGreater(result["delayed_tasks"], 0)
+        self.assertEqual(
+            [(t.planned_start, t.planned_end) for t in offloaded.tasks.values()],
+            [(t.planned_start, t.planned_end) for t in inline.tasks.values()],
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event, select
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.database import Base
+from app.models.project import Project, Task, TaskRelationship
+from app.services.scheduling_engine import SchedulingEngine
+from app.services.schedule_snapshot import load_engine, TaskNode
+
+DATA_DATE = datetime(2024, 1, 1, 8, 0)
+N = 60
+
+class TestSaveDates(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+
+        # A chain 1 -> 2 -> ... -> N plus an independent task N + 1
+        async with self.Session() as session:
+            session.add(Project(id=1, title="P"))
+            for i in range(1, N + 2):
+                session.add(Task(id=i, project_id=1, title=f"T{i}", original_duration=8))
+            for i in range(1, N):
+                session.add(TaskRelationship(project_id=1, predecessor_id=i, successor_id=i + 1, type='FS', lag=0))
+            await session.commit()
+
+        self.writes = []
+        event.listen(self.db_engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            rows = len(parameters) if executemany else 1
+            self.writes.append((statement.split()[1], rows))
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+
+    async def schedule(self):
+        async with self.Session() as session:
+            engine = SchedulingEngine(session, 1)
+            await engine.load_data()
+            engine.calculate_dates(DATA_DATE, backend="python")
+            written = await engine.save_dates()
+            await session.commit()
+        return written
+
+    async def test_only_changed_rows_are_written(self):
+        self.assertEqual(await self.schedule(), N + 1)
+        self.assertEqual(self.writes, [("tasks", N + 1), ("task_relationships", N - 1)])
+
+        # Nothing moved: no statements at all
+        self.writes.clear()
+        self.assertEqual(await self.schedule(), 0)
+        self.assertEqual(self.writes, [])
+
+        # Lengthening the second-to-last task moves it, the last task and the float
+        # of the independent task; everything upstream is unchanged
+        async with self.Session() as session:
+            (await session.get(Task, N - 1)).original_duration = 16
+            await session.commit()
+        self.writes.clear()
+        written = await self.schedule()
+        self.assertEqual(written, 3)
+        self.assertEqual(self.writes, [("tasks", 3)])
+
+        async with self.Session() as session:
+            tasks = {t.id: t for t in (await session.execute(select(Task))).scalars().all()}
+        self.assertEqual(tasks[N].early_finish, datetime(2024, 3, 25, 17, 0))
+        self.assertEqual(tasks[N + 1].total_float, N * 8.0)
+
+    async def test_lightweight_loader(self):
+        await self.schedule()
+        self.writes.clear()
+        async with self.Session() as session:
+            engine = await load_engine(session, 1)
+            self.assertIsInstance(engine.tasks[1], TaskNode)
+            self.assertEqual(len(engine.succs[1]), 1)
+            self.assertTrue(all(r.is_driving for r in engine.relationships))
+
+            # Stored results are loaded, so an unchanged network writes nothing
+            engine.calculate_dates(DATA_DATE, backend="python")
+            self.assertEqual(await engine.save_dates(), 0)
+            engine.calculate_dates(datetime(2024, 1, 2, 8, 0), backend="python")
+            self.assertEqual(await engine.save_dates(), N + 1)
+            await session.commit()
+            self.assertIsNone(await load_engine(session, 99))
+        self.assertEqual(self.writes, [("tasks", N + 1)])
+
+        async with self.Session() as session:
+            task = await session.get(Task, 1)
+        self.assertEqual(task.early_start, datetime(2024, 1, 2, 8, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.schedule_cache import ScheduleCache, schedule_inputs
+from app.services.schedule_snapshot import ProjectSnapshot, TaskNode, RelNode, CPM_FIELDS
+from app.services.work_calendar import ProjectCalendar
+
+START = datetime(2024, 1, 1, 8, 0)
+
+class TestScheduleCache(unittest.TestCase):
+    def snapshot(self, durations=(8, 16, 8), reverse_links=False):
+        snapshot = ProjectSnapshot(1)
+        snapshot.tasks = [TaskNode(i + 1, d) for i, d in enumerate(durations)]
+        snapshot.relationships = [RelNode(10, 1, 2), RelNode(11, 2, 3), RelNode(12, 1, 3, 'SS', 4)]
+        if reverse_links:
+            snapshot.relationships.reverse()
+        return snapshot
+
+    def key(self, engine, start=START):
+        return schedule_inputs(engine, start)[0]
+
+    def test_hit_skips_computation(self):
+        cache = ScheduleCache(1024 * 1024)
+        first = self.snapshot()
+        first.engine().calculate_dates(START, cache=cache)
+        self.assertEqual((cache.hits, cache.misses, len(cache.entries)), (0, 1, 1))
+
+        # Same inputs loaded in another order: served from the cache, no passes run
+        second = self.snapshot(reverse_links=True)
+        engine = second.engine()
+        engine.topological_sort = lambda: self.fail("CPM ran on a cache hit")
+        engine.calculate_dates(START, cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        for a, b in zip(first.tasks, second.tasks):
+            self.assertEqual([getattr(a, f) for f in CPM_FIELDS], [getattr(b, f) for f in CPM_FIELDS])
+        driving = {r.id: r.is_driving for r in first.relationships}
+        self.assertEqual({r.id: r.is_driving for r in second.relationships}, driving)
+
+    def test_key_tracks_inputs(self):
+        base = self.key(self.snapshot().engine())
+        self.assertEqual(self.key(self.snapshot(reverse_links=True).engine()), base)
+        # A start in non-working time normalizes to the same moment
+        self.assertEqual(self.key(self.snapshot().engine(), datetime(2023, 12, 30, 10, 0)), base)
+
+        self.assertNotEqual(self.key(self.snapshot(durations=(8, 24, 8)).engine()), base)
+        self.assertNotEqual(self.key(self.snapshot().engine(), datetime(2024, 1, 2, 8, 0)), base)
+
+        snapshot = self.snapshot()
+        snapshot.relationships[2].lag = 8
+        self.assertNotEqual(self.key(snapshot.engine()), base)
+
+        snapshot = self.snapshot()
+        snapshot.tasks[0].constraint_type = 'start_no_earlier_than'
+        snapshot.tasks[0].constraint_date = datetime(2024, 1, 3, 8, 0)
+        self.assertNotEqual(self.key(snapshot.engine()), base)
+
+        six_day = {d: [(8 * 60, 16 * 60)] for d in range(6)}
+        snapshot = self.snapshot()
+        snapshot.calendars = {5: ProjectCalendar(work_week=six_day)}
+        snapshot.tasks[1].calendar_id = 5
+        self.assertNotEqual(self.key(snapshot.engine()), base)
+        # Calendars are addressed by content, not by id
+        snapshot.calendars = {5: ProjectCalendar()}
+        self.assertEqual(self.key(snapshot.engine()), base)
+
+    def test_lru_eviction_by_size(self):
+        cache = ScheduleCache(1024 * 1024)
+        self.snapshot().engine().calculate_dates(START, cache=cache)
+        entry_size = cache.bytes
+
+        cache = ScheduleCache(entry_size * 2)
+        for hours in (8, 16, 24):
+            self.snapshot(durations=(hours, 8, 8)).engine().calculate_dates(START, cache=cache)
+        self.assertEqual((len(cache.entries), cache.evictions), (2, 1))
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+
+        # The oldest (8h) entry was evicted, the newest are hits
+        self.snapshot(durations=(24, 8, 8)).engine().calculate_dates(START, cache=cache)
+        self.assertEqual(cache.hits, 1)
+        self.snapshot(durations=(8, 8, 8)).engine().calculate_dates(START, cache=cache)
+        self.assertEqual(cache.misses, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import time
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.scheduling_engine import SchedulingEngine, ScheduleCycleError
+from app.models.project import Task, TaskRelationship
+
+class TestScheduleCycles(unittest.TestCase):
+    def build_engine(self, n, links):
+        engine = SchedulingEngine(None, 1)
+        engine.tasks = {i: Task(id=i, original_duration=8) for i in range(1, n + 1)}
+        engine.relationships = [
+            TaskRelationship(id=k, predecessor_id=a, successor_id=b, type='FS', lag=0)
+            for k, (a, b) in enumerate(links, start=1)
+        ]
+        for rel in engine.relationships:
+            engine.preds.setdefault(rel.successor_id, []).append(rel)
+            engine.succs.setdefault(rel.predecessor_id, []).append(rel)
+        return engine
+
+    def test_reports_every_loop(self):
+        # 1 -> 2 -> 3 -> 1 and 5 -> 6 -> 5, a self-link on 8, 4 and 7 hang off the loops
+        engine = self.build_engine(8, [(1, 2), (2, 3), (3, 1), (3, 4), (4, 5), (5, 6), (6, 5), (6, 7), (8, 8)])
+        cycles = engine.find_cycles()
+        self.assertEqual([c["task_ids"] for c in cycles], [[1, 2, 3], [5, 6], [8]])
+        self.assertEqual(len(cycles[0]["relationships"]), 3)
+        self.assertEqual(len(cycles[0]["closing_relationships"]), 1)
+        for cycle in cycles:
+            self.assertTrue(cycle["closing_relationships"])
+
+    def test_closing_relationships_break_all_loops(self):
+        # Two loops sharing tasks: 1 -> 2 -> 1 and 1 -> 3 -> 2
+        engine = self.build_engine(3, [(1, 2), (2, 1), (1, 3), (3, 2), (2, 3)])
+        cycles = engine.find_cycles()
+        closing = {r["id"] for c in cycles for r in c["closing_relationships"]}
+        kept = [(r.predecessor_id, r.successor_id) for r in engine.relationships if r.id not in closing]
+        self.assertEqual(self.build_engine(3, kept).find_cycles(), [])
+
+    def test_calculate_dates_raises_diagnostic(self):
+        engine = self.build_engine(3, [(1, 2), (2, 3), (3, 2)])
+        for backend in ("python", "numpy"):
+            with self.assertRaises(ScheduleCycleError) as ctx:
+                engine.calculate_dates(datetime(2024, 1, 1, 8, 0), backend=backend)
+            self.assertEqual([c["task_ids"] for c in ctx.exception.cycles], [[2, 3]])
+            self.assertIn("Cycle detected in project schedule", str(ctx.exception))
+
+    def test_wide_network_is_linear(self):
+        # 20k independent tasks into a single sink; Kahn with list.pop(0) was quadratic here
+        n = 20000
+        engine = self.build_engine(n + 1, [(i, n + 1) for i in range(1, n + 1)])
+        started = time.perf_counter()
+        self.assertEqual(engine.topological_sort()[-1], n + 1)
+        self.assertEqual(engine.find_cycles(), [])
+        self.assertLess(time.perf_counter() - started, 5.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import asyncio
+import multiprocessing
+import sys
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import schedule_executor
+from app.services.scheduling_engine import CPM_FIELDS, ScheduleCycleError
+from app.services.schedule_snapshot import ProjectSnapshot, TaskNode, RelNode
+from benchmarks.networks import layered, DATA_DATE
+
+
+def network(n, links=None):
+    tasks, rels = layered(n, seed=7)
+    snapshot = ProjectSnapshot(1)
+    snapshot.tasks = [TaskNode(t["id"], t["original_duration"], t.get("constraint_type"), t.get("constraint_date")) for t in tasks]
+    snapshot.relationships = [
+        RelNode(i, r["predecessor_id"], r["successor_id"], r["type"], r["lag"]) for i, r in enumerate(rels, start=1)
+    ]
+    for pred, succ in links or []:
+        snapshot.relationships.append(RelNode(len(snapshot.relationships) + 1, pred, succ))
+    return snapshot.engine()
+
+
+class TestScheduleExecutor(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def results(self, engine):
+        return {t_id: tuple(getattr(t, f) for f in CPM_FIELDS) for t_id, t in engine.tasks.items()}, \
+            [r.is_driving for r in engine.relationships]
+
+    async def test_offloaded_run_matches_inline(self):
+        inline = network(300)
+        await schedule_executor.calculate(inline, DATA_DATE)
+
+        offloaded = network(300)
+        with patch.object(schedule_executor, "OFFLOAD_MIN_TASKS", 100):
+            updated = await schedule_executor.calculate(offloaded, DATA_DATE, pool=self.pool)
+            self.assertEqual(updated, set(offloaded.tasks))
+            self.assertEqual(self.results(offloaded), self.results(inline))
+
+            # Incremental run in the pool, from the results applied above
+            offloaded.tasks[1].original_duration += 80
+            inline.tasks[1].original_duration += 80
+            moved = await schedule_executor.calculate(offloaded, DATA_DATE, changed_ids={1}, pool=self.pool)
+        self.assertEqual(moved, inline.reschedule({1}, DATA_DATE))
+        self.assertEqual(self.results(offloaded), self.results(inline))
+
+    async def test_cycle_error_crosses_the_pool(self):
+        engine = network(300, links=[(300, 1)])
+        with patch.object(schedule_executor, "OFFLOAD_MIN_TASKS", 100):
+            with self.assertRaises(ScheduleCycleError) as ctx:
+                await schedule_executor.calculate(engine, DATA_DATE, pool=self.pool)
+        self.assertTrue(ctx.exception.cycles)
+
+        with self.assertRaises(ValueError):
+            await schedule_executor.calculate(engine, DATA_DATE, progress_mode="fastest")
+
+    async def test_event_loop_keeps_serving(self):
+        engine = network(6000)
+        await asyncio.get_running_loop().run_in_executor(self.pool, abs, 0) # Worker warm-up
+        gaps = []
+
+        async def ticker():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticking = asyncio.create_task(ticker())
+        await schedule_executor.calculate(engine, DATA_DATE, pool=self.pool)
+        ticking.cancel()
+
+        self.assertTrue(all(t.early_finish is not None for t in engine.tasks.values()))
+        self.assertGreater(len(gaps), 5)
+        self.assertLess(max(gaps), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
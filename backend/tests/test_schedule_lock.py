@@ -0,0 +1,94 @@
+import unittest
+import asyncio
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.services.schedule_lock import ScheduleLocks
+
+
+class TestScheduleLocks(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+        self.statements = []
+        event.listen(self.db_engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+        self.locks = ScheduleLocks()
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+
+    async def test_runs_on_a_project_are_serialized(self):
+        active = []
+        overlaps = []
+
+        async def run(project_ids):
+            async with self.Session() as session:
+                async with self.locks.hold(session, project_ids):
+                    overlaps.extend(p for p in project_ids if p in active)
+                    active.extend(project_ids)
+                    await asyncio.sleep(0.01)
+                    for p in project_ids:
+                        active.remove(p)
+
+        await asyncio.gather(run([1]), run([1]), run([2, 1]), run([1, 2]), run([3]))
+        self.assertEqual(overlaps, [])
+        self.assertFalse(self.locks.locked(1))
+        # SQLite: in-process lock only, no advisory lock statements
+        self.assertEqual(self.statements, [])
+
+    async def test_identical_calls_share_one_run(self):
+        calls = []
+
+        async def run():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {"finish": len(calls)}
+
+        results = await asyncio.gather(*(self.locks.single_flight(("schedule", 1), run) for _ in range(5)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"finish": 1}] * 5)
+
+        # Finished runs are not reused
+        self.assertEqual(await self.locks.single_flight(("schedule", 1), run), {"finish": 2})
+
+    async def test_errors_are_shared(self):
+        async def run():
+            await asyncio.sleep(0.01)
+            raise ValueError("loop")
+
+        results = await asyncio.gather(
+            *(self.locks.single_flight("k", run) for _ in range(3)), return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(self.locks.inflight, {})
+
+    async def test_waiter_takes_over_cancelled_run(self):
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fast():
+            return "done"
+
+        leader = asyncio.create_task(self.locks.single_flight("k", slow))
+        await started.wait()
+        follower = asyncio.create_task(self.locks.single_flight("k", fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        self.assertEqual(await follower, "done")
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.database import Base
+from app.models.project import Project, Task, TaskRelationship
+from app.services.schedule_queue import ScheduleQueue, reschedule_project
+
+
+class TestScheduleQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.runs = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def runner(self, project_id, changed_ids):
+        self.runs.append((project_id, changed_ids))
+        await self.release.wait()
+        if changed_ids and -1 in changed_ids:
+            raise RuntimeError("boom")
+
+    async def test_burst_coalesces_into_one_run(self):
+        queue = ScheduleQueue(self.runner, debounce=0.05, max_delay=1.0)
+        revisions = []
+        for i in range(10):
+            revisions.append(queue.request(1, {i}))
+            await asyncio.sleep(0.005)
+        queue.request(2, None)
+
+        self.assertEqual(revisions, list(range(1, 11)))
+        self.assertEqual(queue.status(1)["state"], "pending")
+        status = await queue.wait(1, 10, timeout=2)
+        await queue.wait(2, 1, timeout=2)
+
+        self.assertEqual(status["completed_revision"], 10)
+        self.assertEqual(status["state"], "idle")
+        self.assertEqual(sorted(self.runs, key=lambda r: r[0]), [(1, set(range(10))), (2, None)])
+        self.assertEqual(queue.stats()["runs"], 2)
+
+    async def test_requests_during_run_form_next_batch(self):
+        queue = ScheduleQueue(self.runner, debounce=0.01, max_delay=1.0)
+        self.release.clear()
+        queue.request(1, {1})
+        await asyncio.sleep(0.05)
+        self.assertEqual(queue.status(1)["state"], "running")
+
+        queue.request(1, {2})
+        revision = queue.request(1, {3})
+        self.release.set()
+        status = await queue.wait(1, revision, timeout=2)
+
+        self.assertEqual(status["completed_revision"], 3)
+        self.assertEqual(self.runs, [(1, {1}), (1, {2, 3})])
+
+    async def test_failure_is_reported(self):
+        queue = ScheduleQueue(self.runner, debounce=0.01, max_delay=1.0)
+        status = await queue.wait(1, queue.request(1, {-1}), timeout=2)
+        self.assertIn("RuntimeError", status["error"])
+        self.assertEqual(status["completed_revision"], 1)
+
+        status = await queue.wait(1, queue.request(1, {5}), timeout=2)
+        self.assertIsNone(status["error"])
+
+    async def test_max_delay_bounds_a_stream_of_edits(self):
+        queue = ScheduleQueue(self.runner, debounce=0.05, max_delay=0.1)
+        for i in range(20):
+            queue.request(1, {i})
+            await asyncio.sleep(0.02)
+        await queue.wait(1, 20, timeout=2)
+        self.assertGreater(len(self.runs), 1)
+        self.assertEqual(set().union(*(ids for _, ids in self.runs)), set(range(20)))
+
+
+class TestRescheduleProject(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with self.Session() as session:
+            session.add(Project(id=1, title="P"))
+            session.add(Task(id=1, project_id=1, title="A", original_duration=8, planned_start=datetime(2024, 1, 1, 8)))
+            session.add(Task(id=2, project_id=1, title="B", original_duration=8))
+            session.add(TaskRelationship(project_id=1, predecessor_id=1, successor_id=2, type='FS', lag=0))
+            await session.commit()
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+
+    async def test_planned_dates_follow_cpm(self):
+        async with self.Session() as session:
+            await reschedule_project(session, 1)
+            (await session.get(Task, 1)).original_duration = 16
+            await session.commit()
+            self.assertEqual(await reschedule_project(session, 1, {1}), {1, 2})
+
+        async with self.Session() as session:
+            b = (await session.execute(select(Task).where(Task.id == 2))).scalar_one()
+            self.assertEqual(b.planned_start.replace(tzinfo=None), datetime(2024, 1, 3, 8))
+            self.assertEqual(b.planned_end.replace(tzinfo=None), datetime(2024, 1, 3, 17))
+
+
+if __name__ == '__main__':
+    unittest.main()
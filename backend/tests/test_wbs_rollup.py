@@ -0,0 +1,195 @@
+import unittest
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.database import Base
+from app.models.project import Project, Task
+from app.services.wbs_rollup import ROLLUP_FIELDS, WbsNode, WbsRollup, rollup_project
+
+DAY = datetime(2024, 1, 1, 8, 0)
+
+
+def leaf(t_id, wbs, start_day, days, pct=0.0, cost=0.0, **extra):
+    return WbsNode(
+        t_id, wbs_code=wbs, outline_level=wbs.count('.') + 1, original_duration=days * 8,
+        early_start=DAY + timedelta(days=start_day), early_finish=DAY + timedelta(days=start_day + days),
+        total_float=float(extra.pop('total_float', 0.0)), percent_complete=pct, actual_cost=cost, **extra,
+    )
+
+
+class TestWbsRollup(unittest.TestCase):
+    def tree(self):
+        # 1 ─┬─ 1.1 ─┬─ 1.1.1
+        #    │       └─ 1.1.2
+        #    └─ 1.2
+        # 2 (stand-alone)
+        return WbsRollup([
+            WbsNode(1, wbs_code="1"), WbsNode(2, wbs_code="1.1", outline_level=2),
+            leaf(3, "1.1.1", 0, 2, pct=100, cost=10, total_float=16),
+            leaf(4, "1.1.2", 2, 6, pct=50, cost=5, total_float=8),
+            leaf(5, "1.2", 1, 2, pct=0, cost=1, total_float=40),
+            leaf(6, "2", 0, 1),
+        ])
+
+    def test_full_rollup(self):
+        tree = self.tree()
+        self.assertEqual(tree.rollup(), {1, 2})
+        mid, top = tree.nodes[2], tree.nodes[1]
+
+        self.assertEqual((mid.early_start, mid.early_finish), (DAY, DAY + timedelta(days=8)))
+        self.assertEqual(mid.total_float, 8)
+        self.assertEqual(mid.actual_cost, 15)
+        self.assertAlmostEqual(mid.percent_complete, (2 * 100 + 6 * 50) / 8)
+        self.assertEqual(top.actual_cost, 16)
+        self.assertAlmostEqual(top.percent_complete, (2 * 100 + 6 * 50) / 10)
+        self.assertIsNone(tree.nodes[6].parent_id)
+
+        # Nothing changed: nothing to write
+        self.assertEqual(tree.rollup(), set())
+
+    def test_outline_levels_without_codes(self):
+        tree = WbsRollup([
+            WbsNode(1, outline_level=1), WbsNode(2, outline_level=2),
+            leaf(3, "x", 0, 1), WbsNode(4, outline_level=2), WbsNode(5, outline_level=1),
+        ])
+        tree.nodes[3].outline_level = 3
+        tree.build_tree()
+        self.assertEqual([tree.nodes[i].parent_id for i in range(1, 6)], [None, 1, 2, 1, None])
+
+    def test_incremental_updates_only_ancestors(self):
+        tree = self.tree()
+        tree.rollup()
+        calls = []
+        aggregate = tree.aggregate
+        tree.aggregate = lambda node: calls.append(node.id) or aggregate(node)
+
+        tree.nodes[3].percent_complete = 0.0
+        self.assertEqual(tree.rollup({3}), {1, 2})
+        self.assertEqual(calls, [2, 1])
+
+        # 1.2 moves within its parent's span: the chain stops at the first unchanged summary
+        calls.clear()
+        tree.nodes[5].early_start += timedelta(hours=1)
+        tree.nodes[5].early_finish += timedelta(hours=1)
+        self.assertEqual(tree.rollup({5}), set())
+        self.assertEqual(calls, [1])
+
+    def test_rescheduled_summary_is_rolled_up_again(self):
+        # CPM gave summary 1.1 dates of its own; the roll-up replaces them and climbs on
+        tree = self.tree()
+        tree.rollup()
+        rolled = (tree.nodes[2].early_start, tree.nodes[2].early_finish)
+        tree.nodes[2].early_start = DAY + timedelta(days=20)
+        tree.nodes[2].early_finish = DAY + timedelta(days=30)
+        tree.nodes[1].early_finish = DAY + timedelta(days=30) # Stored before the roll-up
+
+        self.assertEqual(tree.rollup({2, 1}), {1, 2})
+        self.assertEqual((tree.nodes[2].early_start, tree.nodes[2].early_finish), rolled)
+        self.assertEqual(tree.nodes[1].early_finish, DAY + timedelta(days=8))
+
+    def test_incremental_matches_full_with_stored_summary_durations(self):
+        # Imported summaries keep their own span (16h) as original_duration; progress is
+        # weighted by the leaves below them all the same
+        def tree():
+            return WbsRollup([
+                WbsNode(1, wbs_code="1", original_duration=96),
+                WbsNode(2, wbs_code="1.1", outline_level=2, original_duration=16),
+                leaf(3, "1.1.1", 0, 1, pct=100),
+                leaf(4, "1.1.2", 1, 1, pct=0),
+                WbsNode(5, wbs_code="1.2", outline_level=2, original_duration=16),
+                leaf(6, "1.2.1", 0, 10, pct=0),
+            ])
+        full = tree()
+        full.rollup()
+        self.assertAlmostEqual(full.nodes[1].percent_complete, 800 / 96)
+
+        # Reloaded as stored after the full roll-up
+        incremental = tree()
+        for t_id in (1, 2, 5):
+            for field in ROLLUP_FIELDS:
+                setattr(incremental.nodes[t_id], field, getattr(full.nodes[t_id], field))
+        incremental.nodes[4].percent_complete = 50.0
+        self.assertEqual(incremental.rollup({4}), {1, 2})
+        full.nodes[4].percent_complete = 50.0
+        full.rollup()
+        self.assertAlmostEqual(incremental.nodes[1].percent_complete, full.nodes[1].percent_complete)
+        self.assertAlmostEqual(incremental.nodes[1].percent_complete, 1200 / 96)
+        self.assertEqual(incremental.nodes[2].original_duration, 16) # Not overwritten
+
+    def test_deep_tree_is_fast(self):
+        # 12 levels, 3 children each below level 4: ~30k nodes
+        nodes = []
+        codes = ["1"]
+        levels = [codes]
+        for depth in range(2, 13):
+            fan = 3 if depth > 4 else 2
+            codes = [f"{code}.{i}" for code in codes[:2000] for i in range(1, fan + 1)]
+            levels.append(codes)
+        for code in (c for level in levels for c in level):
+            nodes.append(leaf(len(nodes) + 1, code, len(nodes) % 50, 1 + len(nodes) % 5, pct=len(nodes) % 100))
+
+        tree = WbsRollup(nodes)
+        started = time.perf_counter()
+        tree.rollup()
+        full = time.perf_counter() - started
+
+        deepest = nodes[-1]
+        deepest.percent_complete = 100.0 if deepest.percent_complete != 100.0 else 0.0
+        started = time.perf_counter()
+        updated = tree.rollup({deepest.id})
+        incremental = time.perf_counter() - started
+
+        self.assertEqual(max(n.depth for n in tree.nodes.values()), 11)
+        self.assertLessEqual(len(updated), 11)
+        self.assertLess(incremental, 0.01)
+        self.assertLess(full, 2.0)
+
+
+class TestRollupProject(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with self.Session() as session:
+            session.add(Project(id=1, title="P"))
+            session.add(Task(id=1, project_id=1, title="Phase", wbs_code="1", is_summary=True))
+            for i, (days, pct) in enumerate([(1, 100.0), (3, 0.0)], start=2):
+                session.add(Task(
+                    id=i, project_id=1, title=f"T{i}", wbs_code=f"1.{i - 1}", outline_level=2,
+                    original_duration=days * 8, percent_complete=pct, earned_value=days * 100.0,
+                    early_start=DAY, early_finish=DAY + timedelta(days=days),
+                ))
+            await session.commit()
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+
+    async def test_summary_written(self):
+        async with self.Session() as session:
+            self.assertEqual(await rollup_project(session, 1), {1})
+            await session.commit()
+
+        async with self.Session() as session:
+            summary = (await session.execute(select(Task).where(Task.id == 1))).scalar_one()
+            self.assertAlmostEqual(summary.percent_complete, 25.0)
+            self.assertEqual(summary.earned_value, 400.0)
+            self.assertEqual(summary.early_finish.replace(tzinfo=None), DAY + timedelta(days=3))
+
+            task = await session.get(Task, 3)
+            task.percent_complete = 100.0
+            self.assertEqual(await rollup_project(session, 1, {3}), {1})
+            self.assertEqual(await rollup_project(session, 1, {3}), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+import sys
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event, select
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.database import Base
+from app.models.calendar import WorkCalendar
+from app.models.project import Project, Task, TaskRelationship
+from app.services import schedule_executor
+from app.services.scheduling_engine import ScheduleCycleError
+from app.services.schedule_snapshot import ProjectSnapshot, TaskNode, RelNode, load_snapshots
+from app.services.what_if import WhatIfScenario, run_what_if
+from benchmarks.networks import layered
+
+DATA_DATE = datetime(2024, 1, 1, 8, 0)
+
+class TestWhatIf(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+
+        # 1 -> 2 -> 3 and 1 -> 4 -> 3; 4 has one day of float
+        async with self.Session() as session:
+            session.add(Project(id=1, title="P", status="active"))
+            for t_id, hours in ((1, 8), (2, 16), (3, 8), (4, 8)):
+                session.add(Task(id=t_id, project_id=1, title=f"T{t_id}", original_duration=hours))
+            for pred, succ in ((1, 2), (2, 3), (1, 4), (4, 3)):
+                session.add(TaskRelationship(project_id=1, predecessor_id=pred, successor_id=succ, type='FS', lag=0))
+            await session.commit()
+
+        self.statements = []
+        event.listen(self.db_engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement.split(None, 1)[0].upper())
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+
+    async def run_scenario(self, task_edits=(), link_edits=()):
+        async with self.Session() as session:
+            return await run_what_if(session, 1, DATA_DATE, task_edits, link_edits)
+
+    async def test_longer_feeder_moves_finish(self):
+        result = await self.run_scenario(task_edits=[{"task_id": 4, "original_duration": 24}])
+
+        self.assertEqual(result["finish_delta_hours"], 8.0)
+        self.assertEqual(result["scenario_finish"], datetime(2024, 1, 5, 17, 0))
+        changed = {t["task_id"]: t for t in result["changed_tasks"]}
+        self.assertEqual(set(changed), {2, 3, 4})
+        self.assertEqual(changed[3]["start_delta_hours"], 8.0)
+        self.assertEqual(changed[2]["total_float"], 8.0) # Old critical path now has float
+        self.assertEqual(result["critical_task_ids"], [1, 3, 4])
+        self.assertEqual([s for s in self.statements if s != "SELECT"], [])
+
+        # The stored schedule is untouched
+        async with self.Session() as session:
+            tasks = (await session.execute(select(Task))).scalars().all()
+        self.assertTrue(all(t.early_start is None and t.original_duration != 24 for t in tasks))
+
+    async def test_link_edits(self):
+        result = await self.run_scenario(link_edits=[{"action": "remove", "predecessor_id": 2, "successor_id": 3}])
+        self.assertEqual(result["finish_delta_hours"], -8.0)
+
+        result = await self.run_scenario(link_edits=[{"action": "update", "predecessor_id": 2, "successor_id": 3, "lag": 4}])
+        self.assertEqual(result["finish_delta_hours"], 4.0)
+
+        with self.assertRaises(ScheduleCycleError):
+            await self.run_scenario(link_edits=[{"action": "add", "predecessor_id": 3, "successor_id": 1}])
+        with self.assertRaises(ValueError):
+            await self.run_scenario(task_edits=[{"task_id": 99, "original_duration": 1}])
+        async with self.Session() as session:
+            self.assertIsNone(await run_what_if(session, 42, DATA_DATE))
+
+    async def test_snapshot_is_not_mutated(self):
+        async with self.Session() as session:
+            snapshot = (await load_snapshots(session, [1]))[1]
+        edits = [{"task_id": 2, "original_duration": 40, "constraint_type": "SNET", "constraint_date": datetime(2024, 1, 3, 8, 0)}]
+        first = await WhatIfScenario(snapshot, edits).run(DATA_DATE)
+        second = await WhatIfScenario(snapshot, edits).run(DATA_DATE)
+        self.assertEqual(first, second)
+        self.assertEqual(snapshot.tasks[1].original_duration, 16)
+        self.assertEqual(len(snapshot.relationships), 4)
+
+        # Only the edited nodes are copied
+        lag_edit = [{"action": "update", "predecessor_id": 2, "successor_id": 3, "lag": 4}]
+        scenario = WhatIfScenario(snapshot, edits, lag_edit)
+        view = scenario.fork()
+        scenario.apply(view)
+        shared = [a is b for a, b in zip(view.tasks, snapshot.tasks)]
+        self.assertEqual(shared, [True, False, True, True])
+        self.assertEqual(sum(a is not b for a, b in zip(view.relationships, snapshot.relationships)), 1)
+        self.assertEqual([r.lag for r in snapshot.relationships], [0.0] * 4)
+
+    async def test_calendar_edit_loads_the_calendar(self):
+        # A calendar no task of the project uses yet
+        async with self.Session() as session:
+            session.add(WorkCalendar(id=5, name="24/7", work_week={str(d): [["00:00", "24:00"]] for d in range(7)}))
+            await session.commit()
+
+        result = await self.run_scenario(task_edits=[{"task_id": 4, "calendar_id": 5}])
+        changed = {t["task_id"]: t for t in result["changed_tasks"]}
+        self.assertEqual((changed[4]["early_start"], changed[4]["early_finish"]),
+                         (datetime(2024, 1, 1, 17, 0), datetime(2024, 1, 2, 1, 0)))
+
+        with self.assertRaises(ValueError):
+            await self.run_scenario(task_edits=[{"task_id": 4, "calendar_id": 77}])
+
+    async def test_progressed_project_schedules_from_data_date(self):
+        async with self.Session() as session:
+            task = await session.get(Task, 1)
+            task.actual_start, task.actual_end = datetime(2024, 1, 1, 8, 0), datetime(2024, 1, 1, 17, 0)
+            await session.commit()
+            data_date = datetime(2024, 1, 3, 8, 0)
+            result = await run_what_if(session, 1, data_date, [{"task_id": 4, "original_duration": 24}])
+
+        self.assertEqual(result["finish_delta_hours"], 8.0)
+        changed = {t["task_id"]: t for t in result["changed_tasks"]}
+        self.assertEqual(changed[4]["early_start"], data_date)
+        self.assertEqual(result["scenario_finish"], datetime(2024, 1, 8, 17, 0)) # Weekend skipped
+
+class TestOffloadedWhatIf(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def snapshot(self):
+        tasks, rels = layered(300, seed=5)
+        snapshot = ProjectSnapshot(1)
+        snapshot.tasks = [TaskNode(t["id"], t["original_duration"], t.get("constraint_type"), t.get("constraint_date")) for t in tasks]
+        snapshot.relationships = [
+            RelNode(i, r["predecessor_id"], r["successor_id"], r["type"], r["lag"]) for i, r in enumerate(rels, start=1)
+        ]
+        return snapshot
+
+    async def test_pool_matches_inline(self):
+        edits = [{"task_id": 20, "original_duration": 400}]
+        links = [{"action": "add", "predecessor_id": 5, "successor_id": 250, "lag": 80}]
+        expected = await WhatIfScenario(self.snapshot(), edits, links).run(DATA_DATE)
+        with patch.object(schedule_executor, "OFFLOAD_MIN_TASKS", 100):
+            result = await WhatIfScenario(self.snapshot(), edits, links).run(DATA_DATE, pool=self.pool)
+        self.assertEqual(result, expected)
+        self.assertTrue(result["changed_tasks"])
+
+if __name__ == '__main__':
+    unittest.main()
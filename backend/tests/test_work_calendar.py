@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+from datetime import datetime, date, timedelta, timezone
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.work_calendar import ProjectCalendar, compile_calendar, parse_work_week
+from app.services.scheduling_engine import SchedulingEngine
+from pydantic import ValidationError
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.database import Base
+from app.models.calendar import WorkCalendar
+from app.models.project import Project, Task, TaskRelationship
+from app.schemas.calendar import WorkCalendarUpdate
+from app.services.calendar_service import CalendarService
+
+class TestCompiledCalendar(unittest.TestCase):
+    def setUp(self):
+        self.calendar = ProjectCalendar()
+
+    def test_block_boundaries(self):
+        # Mon Jan 1 2024. Finishing exactly at a block end stays on that block (12:00, Fri 17:00),
+        # starting from a boundary moves to the next block (13:00, Mon 08:00).
+        mon = datetime(2024, 1, 1, 8, 0)
+        self.assertEqual(self.calendar.add_working_duration(mon, 4), datetime(2024, 1, 1, 12, 0))
+        self.assertEqual(self.calendar.next_working_moment(datetime(2024, 1, 1, 12, 0)), datetime(2024, 1, 1, 13, 0))
+        self.assertEqual(self.calendar.prev_working_moment(datetime(2024, 1, 8, 8, 0)), datetime(2024, 1, 5, 17, 0))
+        self.assertEqual(self.calendar.subtract_working_duration(datetime(2024, 1, 8, 8, 0), 8), datetime(2024, 1, 5, 8, 0))
+
+    def test_long_durations(self):
+        # 2000h = 250 working days = 50 weeks
+        start = datetime(2024, 1, 1, 8, 0)
+        finish = self.calendar.add_working_duration(start, 2000)
+        self.assertEqual(finish, datetime(2024, 12, 13, 17, 0))
+        self.assertEqual(self.calendar.subtract_working_duration(finish, 2000), start)
+        self.assertEqual(self.calendar.working_hours_between(start, finish), 2000.0)
+
+    def test_queries_before_first_compiled_day(self):
+        # The index is compiled around the first query and must extend backwards
+        self.calendar.add_working_duration(datetime(2030, 6, 3, 8, 0), 8)
+        start = datetime(2020, 1, 6, 8, 0) # Monday
+        self.assertEqual(self.calendar.add_working_duration(start, 40), datetime(2020, 1, 10, 17, 0))
+        self.assertEqual(self.calendar.working_hours_between(start, datetime(2020, 1, 13, 8, 0)), 40.0)
+
+    def test_timezone_is_preserved(self):
+        tz = timezone(timedelta(hours=8))
+        start = datetime(2024, 1, 5, 16, 0, tzinfo=tz) # Fri 16:00
+        self.assertEqual(self.calendar.add_working_duration(start, 2), datetime(2024, 1, 8, 9, 0, tzinfo=tz))
+
+    def test_offsets_round_trip(self):
+        start = datetime(2024, 1, 1, 8, 0)
+        for minutes in (0, 1, 239, 240, 241, 480, 2400, 100000):
+            offset = self.calendar.to_offset(start) + minutes
+            dt = self.calendar.from_offset(offset)
+            self.assertEqual(self.calendar.to_offset(dt), offset)
+            self.assertTrue(self.calendar.is_working_time(dt))
+
+class TestExceptionCalendars(unittest.TestCase):
+    def make_calendar_row(self, version=1, exceptions=()):
+        six_day_week = {str(d): [["08:00", "12:00"], ["13:00", "17:00"]] for d in range(6)}
+        return SimpleNamespace(id=7, version=version, work_week=six_day_week, hours_per_day=8.0, exceptions=list(exceptions))
+
+    def test_shutdown_and_six_day_week(self):
+        shutdown = SimpleNamespace(start_date=date(2024, 2, 9), end_date=date(2024, 2, 17), work_hours=None)
+        calendar = compile_calendar(self.make_calendar_row(exceptions=[shutdown]))
+        # Wed Feb 7 08:00 + 40h: Feb 7-8 (16h), shutdown Feb 9-17, Mon Feb 19 - Wed Feb 21 (24h)
+        self.assertEqual(calendar.add_working_duration(datetime(2024, 2, 7, 8, 0), 40), datetime(2024, 2, 21, 17, 0))
+        # Saturdays are working days
+        self.assertTrue(calendar.is_working_time(datetime(2024, 2, 24, 9, 0)))
+        self.assertFalse(calendar.is_working_time(datetime(2024, 2, 25, 9, 0)))
+
+    def test_overtime_exception(self):
+        overtime = SimpleNamespace(start_date=date(2024, 1, 7), end_date=date(2024, 1, 7), work_hours=[["09:00", "13:00"]])
+        calendar = compile_calendar(self.make_calendar_row(version=2, exceptions=[overtime]))
+        # Sat Jan 6 16:00 + 5h -> 1h Sat, 4h on the Sunday overtime -> Sun 13:00
+        self.assertEqual(calendar.add_working_duration(datetime(2024, 1, 6, 16, 0), 5), datetime(2024, 1, 7, 13, 0))
+
+    def test_compiled_calendars_are_memoized_per_version(self):
+        first = compile_calendar(self.make_calendar_row(version=10))
+        self.assertIs(compile_calendar(self.make_calendar_row(version=10)), first)
+        self.assertIsNot(compile_calendar(self.make_calendar_row(version=11)), first)
+
+    def test_task_calendar_drives_duration(self):
+        engine = SchedulingEngine(None, 1)
+        engine.calendars = {3: ProjectCalendar(work_week=parse_work_week({str(d): [["00:00", "24:00"]] for d in range(7)}))}
+        t1 = Task(id=1, original_duration=8, calendar_id=None)
+        t2 = Task(id=2, original_duration=24, calendar_id=3) # Round-the-clock calendar
+        rel = TaskRelationship(predecessor_id=1, successor_id=2, type='FS', lag=0)
+        engine.tasks = {1: t1, 2: t2}
+        engine.relationships = [rel]
+        engine.preds = {2: [rel]}
+        engine.succs = {1: [rel]}
+
+        engine.calculate_dates(datetime(2024, 1, 5, 8, 0)) # Friday
+        self.assertEqual(t1.early_finish, datetime(2024, 1, 5, 17, 0))
+        self.assertEqual(t2.early_start, datetime(2024, 1, 5, 17, 0))
+        self.assertEqual(t2.early_finish, datetime(2024, 1, 6, 17, 0))
+
+class TestCalendarService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = async_sessionmaker(self.db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def asyncTearDown(self):
+        await self.db_engine.dispose()
+
+    async def test_count_references(self):
+        async with self.Session() as session:
+            week = {"0": [["08:00", "17:00"]]}
+            session.add_all([WorkCalendar(id=1, name="Site", work_week=week), WorkCalendar(id=2, name="Spare", work_week=week)])
+            session.add(Project(id=1, title="P", calendar_id=1))
+            session.add_all([Task(id=1, project_id=1, title="A", calendar_id=1), Task(id=2, project_id=1, title="B")])
+            session.add(TaskRelationship(project_id=1, predecessor_id=1, successor_id=2, calendar_id=1))
+            await session.commit()
+
+            service = CalendarService(session)
+            self.assertEqual(await service.count_references(1), {"projects": 1, "tasks": 1, "relationships": 1})
+            self.assertEqual(await service.count_references(2), {})
+
+    def test_update_rejects_null_required_fields(self):
+        self.assertEqual(WorkCalendarUpdate(description=None).model_dump(exclude_unset=True), {"description": None})
+        for field in ("name", "work_week", "hours_per_day"):
+            with self.assertRaises(ValidationError):
+                WorkCalendarUpdate(**{field: None})
+
+if __name__ == '__main__':
+    unittest.main()
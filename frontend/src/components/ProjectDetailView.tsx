@@ -88,6 +88,8 @@ interface Task {
     early_finish?: string;
     late_start?: string;
     late_finish?: string;
+    percent_complete?: number;
+    schedule_revision?: number | null; // Background reschedule queued by an update
     // Engineering Fields
     is_deliverable?: boolean;
     discipline?: string;
@@ -310,6 +312,20 @@ export default function ProjectDetailView({ projectId, onBack }: { projectId: nu
 
     // --- Handlers ---
 
+    // Task edits reschedule in the background: wait for the returned revision, then reload the moved dates
+    const refreshAfterReschedule = async (revision?: number | null) => {
+        if (!revision) return;
+        try {
+            const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000/api/v1';
+            await axios.get(`${apiUrl}/projects/${projectId}/schedule/status`, { params: { revision, timeout: 30 } });
+            const res = await axios.get(`${apiUrl}/projects/`);
+            const found = res.data.find((p: Project) => p.id === projectId);
+            if (found) setProject(found);
+        } catch (err) {
+            console.error("Failed to reload rescheduled tasks", err);
+        }
+    };
+
     const openEditPanel = React.useCallback((task: Task) => {
         setEditingTaskId(task.id);
         setEditTaskData({
@@ -350,6 +366,7 @@ export default function ProjectDetailView({ projectId, onBack }: { projectId: nu
                 setProject({ ...project, tasks: newTasks });
             }
             closeEditPanel();
+            refreshAfterReschedule(res.data.schedule_revision);
         } catch (err) {
             console.error("Failed to update task", err);
             alert("Update failed. Check console for details.");
@@ -746,7 +763,8 @@ export default function ProjectDetailView({ projectId, onBack }: { projectId: nu
                                             }
                                         }
 
-                                        await axios.put(`${apiUrl}/tasks/${event.data.id}`, updatedTask);
+                                        const res = await axios.put(`${apiUrl}/tasks/${event.data.id}`, updatedTask);
+                                        refreshAfterReschedule(res.data.schedule_revision);
                                     } catch (error) {
                                         console.error("Failed to update task:", error);
                                         event.node.setDataValue(event.colDef.field as string, event.oldValue);
@@ -17,6 +17,18 @@ interface ImportResult {
     tasks: any[];
 }
 
+interface ImportJobStatus {
+    job_id: string;
+    stage: 'queued' | 'parsing' | 'linking' | 'completed' | 'failed';
+    rows_processed: number;
+    relationships: number;
+    throughput: number;
+    project_id: number | null;
+    error: string | null;
+}
+
+const IMPORT_POLL_MS = 1000;
+
 export default function ProjectImportWizard({ onImportComplete }: { onImportComplete?: (project: any) => void }) {
     const [step, setStep] = useState<ImportStep>('select');
     const [file, setFile] = useState<File | null>(null);
@@ -26,6 +38,7 @@ export default function ProjectImportWizard({ onImportComplete }: { onImportComp
     const [result, setResult] = useState<ImportResult | null>(null);
     const [error, setError] = useState('');
     const [preview, setPreview] = useState<string[]>([]);
+    const [job, setJob] = useState<ImportJobStatus | null>(null);
 
     const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000/api/v1';
 
@@ -33,6 +46,7 @@ export default function ProjectImportWizard({ onImportComplete }: { onImportComp
         { ext: 'csv', label: 'CSV', desc: 'Comma-separated values', icon: FileSpreadsheet, color: 'text-emerald-500' },
         { ext: 'json', label: 'JSON', desc: 'Structured JSON data', icon: Code2, color: 'text-blue-500' },
         { ext: 'xml', label: 'XML', desc: 'MS Project XML format', icon: FileText, color: 'text-amber-500' },
+        { ext: 'xer', label: 'XER', desc: 'Primavera P6 export', icon: FileText, color: 'text-violet-500' },
     ];
 
     const handleDrop = useCallback((e: React.DragEvent) => {
@@ -46,9 +60,9 @@ export default function ProjectImportWizard({ onImportComplete }: { onImportComp
         setFile(f);
         setError('');
 
-        // Preview first few lines
+        // Preview first few lines (large schedules are not read whole)
         try {
-            const text = await f.text();
+            const text = await f.slice(0, 16 * 1024).text();
             const lines = text.split('\n').slice(0, 8);
             setPreview(lines);
         } catch {
@@ -73,13 +87,25 @@ export default function ProjectImportWizard({ onImportComplete }: { onImportComp
             if (projectTitle) formData.append('project_title', projectTitle);
             if (industry) formData.append('industry', industry);
 
+            // The upload is queued as a background job; poll it until the project exists
             const res = await axios.post(`${apiUrl}/projects/import`, formData, {
                 headers: { 'Content-Type': 'multipart/form-data' },
             });
+            let status: ImportJobStatus = res.data;
+            setJob(status);
+            while (status.stage !== 'completed' && status.stage !== 'failed') {
+                await new Promise(resolve => setTimeout(resolve, IMPORT_POLL_MS));
+                status = (await axios.get(`${apiUrl}/projects/import/${status.job_id}`)).data;
+                setJob(status);
+            }
+            if (status.stage === 'failed') {
+                throw new Error(status.error || 'Import failed');
+            }
 
-            setResult(res.data);
+            const project = await axios.get(`${apiUrl}/projects/${status.project_id}`);
+            setResult(project.data);
             setStep('success');
-            onImportComplete?.(res.data);
+            onImportComplete?.(project.data);
         } catch (err: any) {
             const detail = err.response?.data?.detail || err.message || 'Import failed';
             setError(detail);
@@ -95,6 +121,7 @@ export default function ProjectImportWizard({ onImportComplete }: { onImportComp
         setResult(null);
         setError('');
         setPreview([]);
+        setJob(null);
     };
 
     const getFileIcon = () => {
@@ -112,7 +139,7 @@ export default function ProjectImportWizard({ onImportComplete }: { onImportComp
             <div className="border-b border-border pb-6 mb-8">
                 <h2 className="text-3xl font-black tracking-tighter uppercase italic">Import Project Plan</h2>
                 <p className="text-muted-foreground mt-1 font-mono text-xs uppercase tracking-widest">
-                    Ingest external schedule data • CSV / JSON / XML (MS Project)
+                    Ingest external schedule data • CSV / JSON / XML (MS Project) / XER (Primavera P6)
                 </p>
             </div>
 
@@ -140,12 +167,12 @@ export default function ProjectImportWizard({ onImportComplete }: { onImportComp
                             {dragOver ? "Release to Upload" : "Drop project file here or click to browse"}
                         </p>
                         <p className="text-[10px] text-muted-foreground mt-2 uppercase tracking-widest">
-                            Supported: CSV, JSON, XML (MS Project)
+                            Supported: CSV, JSON, XML (MS Project), XER (Primavera P6)
                         </p>
                         <input
                             id="file-input"
                             type="file"
-                            accept=".csv,.json,.xml,.mpp"
+                            accept=".csv,.json,.xml,.mpp,.xer"
                             className="hidden"
                             onChange={(e) => {
                                 const f = e.target.files?.[0];
@@ -155,7 +182,7 @@ export default function ProjectImportWizard({ onImportComplete }: { onImportComp
                     </div>
 
                     {/* Format Cards */}
-                    <div className="grid grid-cols-3 gap-3">
+                    <div className="grid grid-cols-4 gap-3">
                         {supportedFormats.map(fmt => (
                             <div key={fmt.ext} className="bg-card border border-border p-4 hover:border-primary/30 transition-all">
                                 <fmt.icon className={cn("w-5 h-5 mb-2", fmt.color)} />
@@ -267,6 +294,13 @@ export default function ProjectImportWizard({ onImportComplete }: { onImportComp
                     <Loader2 className="w-12 h-12 mx-auto text-primary animate-spin mb-4" />
                     <p className="text-sm font-black uppercase tracking-tight">Processing Import Pipeline</p>
                     <p className="text-[10px] text-muted-foreground mt-1 font-mono uppercase">Parsing • Validating • Creating Database Entries</p>
+                    {job && (
+                        <p className="text-[10px] text-muted-foreground mt-3 font-mono uppercase">
+                            {job.stage === 'queued' ? 'Queued' : job.stage === 'linking' ? 'Linking dependencies' : 'Reading tasks'}
+                            {' • '}{job.rows_processed.toLocaleString()} tasks
+                            {job.throughput > 0 && <> • {Math.round(job.throughput).toLocaleString()} / s</>}
+                        </p>
+                    )}
                 </div>
             )}
 